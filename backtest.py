@@ -0,0 +1,265 @@
+# Imports
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATOR_FIELDS, ema, macd, rolling_mean, rsi
+
+# Transaction cost per unit of position traded, as a fraction of the price
+# (10 basis points)
+DEFAULT_COST = 0.001
+
+# Trading days per year, to annualize daily statistics
+TRADING_DAYS = 252
+
+# Default number of processes of a parameter sweep; sweeps run serially
+# unless asked for more
+DEFAULT_WORKERS = 1
+
+# Processes of the pool shared by every parallel sweep
+POOL_WORKERS = min(4, os.cpu_count() or 1)
+
+# Least parameter sets per worker, and least work (parameter sets x bars x
+# tickers), of a sweep run in processes. Calibrated on the suite: sending the
+# fields of the 200 batch tickers to a warm worker (backtest.pool_dispatch,
+# 12 ms) costs about two parameter sets of backtests on them (backtest.sweep,
+# 105 ms for the 16 sets of the SMA grid), and both grow with the fields, so
+# w workers pay off from about 2.5 w / (1 - 1/w) parameter sets; sweeps under
+# about 0.1 s (some 18 million cells per second serially) are not split
+PARALLEL_MIN_SETS = 6
+PARALLEL_MIN_CELLS = 2_000_000
+
+# Statistics reported for every backtest
+STAT_COLUMNS = ["Total Return", "Sharpe", "Max Drawdown", "Trades", "Exposure"]
+
+
+##### Signals #####
+
+# Every signal takes the fields as 2d arrays of bars x tickers, a memo shared
+# by the parameter sets of a sweep (so each moving average is computed once)
+# and its parameters; it returns the target position of every bar, decided at
+# its close, or None when the parameters are not a valid combination
+
+
+# Function to compute a value once per sweep
+def memoized(memo, key, compute):
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+# Long while the fast moving average of the close is above the slow one
+def sma_crossover(fields, memo, fast, slow):
+    if fast >= slow:
+        return None
+    close = fields["Close"]
+    fast_ma = memoized(memo, ("sma", fast), lambda: rolling_mean(close, fast))
+    slow_ma = memoized(memo, ("sma", slow), lambda: rolling_mean(close, slow))
+    return (fast_ma > slow_ma).astype(float)
+
+
+# Long while the fast exponential average of the close is above the slow one
+def ema_crossover(fields, memo, fast, slow):
+    if fast >= slow:
+        return None
+    close = fields["Close"]
+    fast_ma = memoized(memo, ("ema", fast), lambda: ema(close, 2 / (fast + 1)))
+    slow_ma = memoized(memo, ("ema", slow), lambda: ema(close, 2 / (slow + 1)))
+    return (fast_ma > slow_ma).astype(float)
+
+
+# Long from the RSI falling below lower until it rises above upper
+def rsi_reversion(fields, memo, n, lower, upper):
+    if lower >= upper:
+        return None
+    value = memoized(memo, ("rsi", n), lambda: rsi(fields, None, 0, n)[""])
+
+    # Entries and exits, held in between by forward-filling
+    state = np.full(value.shape, np.nan)
+    state[value < lower] = 1.0
+    state[value > upper] = 0.0
+    positions = np.where(np.isfinite(state), np.arange(len(state))[:, None], 0)
+    np.maximum.accumulate(positions, axis=0, out=positions)
+    return np.nan_to_num(state[positions, np.arange(state.shape[1])])
+
+
+# Long while the MACD line is above its signal line
+def macd_trend(fields, memo, fast, slow, signal):
+    if fast >= slow:
+        return None
+    outputs = memoized(memo, ("macd", fast, slow, signal), lambda: macd(fields, None, 0, fast, slow, signal))
+    return (outputs["Hist"] > 0).astype(float)
+
+
+# Available strategies: {name: (signal, default parameter grid)}
+STRATEGIES = {
+    "SMA Crossover": (sma_crossover, {"fast": [5, 10, 20, 50], "slow": [20, 50, 100, 200]}),
+    "EMA Crossover": (ema_crossover, {"fast": [5, 10, 20], "slow": [20, 50, 100]}),
+    "RSI Reversion": (rsi_reversion, {"n": [7, 14, 21], "lower": [20, 30], "upper": [50, 70]}),
+    "MACD Trend": (macd_trend, {"fast": [8, 12], "slow": [21, 26], "signal": [5, 9]}),
+}
+
+##### Signals End #####
+
+
+# Function to backtest target positions over the closes of many tickers at
+# once. A position decided at the close of a bar earns the return of the next
+# bar, and every change of position pays cost per unit traded. Returns the
+# statistics of every ticker as {name: array}.
+def run_backtest(close, positions, cost=DEFAULT_COST, periods_per_year=TRADING_DAYS):
+    # No position without a price
+    listed = np.isfinite(close)
+    positions = np.where(listed, positions, 0.0)
+
+    # Bar returns, and the position held over every bar
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.nan_to_num(close[1:] / close[:-1] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+    held = positions[:-1]
+    traded = np.abs(np.diff(positions, axis=0, prepend=0.0))[:-1]
+
+    # Profit and loss net of costs, and the equity curve
+    pnl = held * returns - cost * traded
+    equity = np.cumprod(1 + pnl, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    # Statistics over the bars each ticker was listed
+    bars = np.maximum(listed[1:].sum(axis=0), 1)
+    mean = pnl.sum(axis=0) / bars
+    std = np.sqrt(np.maximum((pnl**2).sum(axis=0) / bars - mean**2, 0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+
+    return {
+        "Total Return": equity[-1] - 1 if len(equity) else np.zeros(close.shape[1]),
+        "Sharpe": sharpe,
+        "Max Drawdown": drawdown.min(axis=0) if len(drawdown) else np.zeros(close.shape[1]),
+        "Trades": (traded > 0).sum(axis=0),
+        "Exposure": (held != 0).sum(axis=0) / bars,
+    }
+
+
+# Function to backtest a list of parameter sets of a strategy over the same
+# fields; returns one frame of statistics per valid parameter set
+def run_parameter_sets(strategy, param_sets, fields, tickers, cost):
+    signal = STRATEGIES[strategy][0]
+    memo = {}
+    results = []
+    for params in param_sets:
+        positions = signal(fields, memo, **params)
+        if positions is None:
+            continue
+        stats = pd.DataFrame(run_backtest(fields["Close"], positions, cost), index=tickers)
+        results.append(stats.assign(**params))
+    return results
+
+
+# Function to get the pool shared by every parallel sweep, created on first
+# use. Workers are spawned rather than forked, since forking the
+# multi-threaded app server is unsafe.
+@lru_cache(maxsize=None)
+def get_backtest_pool():
+    return ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+# Function to backtest every combination of a parameter grid of a strategy
+# over wide frames (dates x tickers) of the OHLC fields, splitting large
+# grids across worker processes; returns the statistics of every (parameter set,
+# ticker) and the throughput, with the number of processes the sweep ran in
+def sweep(strategy, frames, grid=None, cost=DEFAULT_COST, workers=DEFAULT_WORKERS):
+    start = time.perf_counter()
+    grid = grid or STRATEGIES[strategy][1]
+    param_sets = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+    # Align the fields on the dates and tickers of the closes
+    close = frames["Close"]
+    tickers = close.columns
+    fields = {
+        field: frames[field].reindex(index=close.index, columns=tickers).to_numpy(dtype=float)
+        for field in INDICATOR_FIELDS
+        if field in frames
+    }
+
+    # Run the parameter sets, in the shared pool when asked for several
+    # workers and the sweep is large enough to pay for them; each worker gets
+    # consecutive parameter sets, which share more moving averages
+    workers = max(1, min(workers, POOL_WORKERS, len(param_sets) // PARALLEL_MIN_SETS))
+    if len(param_sets) * close.size < PARALLEL_MIN_CELLS:
+        workers = 1
+    if workers == 1:
+        results = run_parameter_sets(strategy, param_sets, fields, tickers, cost)
+    else:
+        size = -(-len(param_sets) // workers)
+        chunks = [param_sets[i : i + size] for i in range(0, len(param_sets), size)]
+        futures = [
+            get_backtest_pool().submit(run_parameter_sets, strategy, chunk, fields, tickers, cost)
+            for chunk in chunks
+        ]
+        results = [stats for future in futures for stats in future.result()]
+
+    # Combine the statistics, with the parameters and the ticker as columns
+    elapsed = time.perf_counter() - start
+    results = (
+        pd.concat(results).rename_axis("Ticker").reset_index() if results else pd.DataFrame(columns=["Ticker"])
+    )
+    throughput = {
+        "backtests": len(results),
+        "seconds": elapsed,
+        "backtests_per_s": len(results) / elapsed if elapsed else float("inf"),
+        "workers": workers,
+    }
+    return results, throughput
+
+
+# Function to sweep a strategy over the tickers of the price store
+def sweep_store(strategy, grid=None, tickers=None, cost=DEFAULT_COST, workers=DEFAULT_WORKERS):
+    from price_store import get_price_store
+
+    store = get_price_store()
+    frames = {field: store.load(field) for field in INDICATOR_FIELDS}
+    if tickers is not None:
+        frames = {field: frame.reindex(columns=tickers) for field, frame in frames.items()}
+    return sweep(strategy, frames, grid, cost, workers)
+
+
+# Function to summarize a sweep per parameter set: the mean, the median and
+# the share of winning tickers, best mean Sharpe ratio first
+def summarize_sweep(results):
+    params = [column for column in results.columns if column not in ["Ticker", *STAT_COLUMNS]]
+    summary = results.groupby(params).agg(
+        **{
+            "Mean Sharpe": ("Sharpe", "mean"),
+            "Median Return": ("Total Return", "median"),
+            "Winning Share": ("Total Return", lambda r: (r > 0).mean()),
+            "Mean Drawdown": ("Max Drawdown", "mean"),
+            "Mean Trades": ("Trades", "mean"),
+        }
+    )
+    return summary.sort_values("Mean Sharpe", ascending=False)
+
+
+# Function to backtest the selected forecast of a ticker over its test split:
+# long on days the forecast for the next day is above the last close by more
+# than threshold. The forecast is made once from the end of the training
+# split, but its model is the one selected on the test split, so the result
+# is an optimistic one.
+def forecast_backtest(ticker, threshold=0.0, cost=DEFAULT_COST):
+    from prediction import generate_stock_prediction
+
+    _, test_df, _, predictions, _, _ = generate_stock_prediction(ticker)
+    if test_df is None:
+        return None
+
+    close = test_df["Close"].to_numpy(dtype=float)
+    predicted = predictions.reindex(test_df.index).to_numpy(dtype=float)
+    positions = np.zeros(len(close))
+    positions[:-1] = predicted[1:] > close[:-1] * (1 + threshold)
+
+    # The daily series of the prediction includes calendar days
+    stats = run_backtest(close[:, None], positions[:, None], cost, periods_per_year=365)
+    return {name: float(values[0]) for name, values in stats.items()}
@@ -0,0 +1,84 @@
+# Benchmark the figure payloads and build times of the mutual fund charts,
+# plotly express against the downsampled WebGL figure builder, uncached and
+# reused from the figure cache
+#
+# Usage: python benchmarks/chart_payloads.py [number of funds] [years of NAVs]
+
+# Imports
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly_express as px
+
+# Make the app modules importable when run from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from charts import line_figure
+
+
+# Function to build reproducible daily forward-filled NAV series, one per fund
+def build_navs(funds, years, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end="2024-12-31", periods=365 * years)
+    returns = rng.normal(0.0004, 0.01, (len(dates), funds))
+    return pd.DataFrame(
+        10 * np.exp(np.cumsum(returns, axis=0)),
+        index=pd.Index(dates, name="date"),
+        columns=[f"Fund {i + 1}" for i in range(funds)],
+    )
+
+
+# Function to build the rolling CAGR of one NAV series over 1 to 10 years
+def build_cagrs(nav):
+    frames = []
+    for years in range(1, 11):
+        returns = nav / nav.shift(365 * years) - 1
+        cagr = 100 * ((1 + returns) ** (1 / years) - 1)
+        frames.append(pd.DataFrame({"date": nav.index, "years": years, "cagr": cagr.to_numpy()}).dropna())
+    return pd.concat(frames)
+
+
+# Function to time building a figure and measure its serialized size
+def measure(build, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build()
+        payload = fig.to_json()
+        times.append(time.perf_counter() - start)
+    points = sum(len(trace.x) for trace in fig.data)
+    return points, len(payload), min(times)
+
+
+# Function to run the benchmark
+def main(funds=6, years=20):
+    navs = build_navs(funds, years)
+    first = navs.iloc[:, 0]
+
+    # The charts of the mutual fund page
+    nav_df = first.rename("nav").reset_index()
+    cagr_df = build_cagrs(first)
+    comparison_df = navs.div(navs.iloc[0]).reset_index().melt(id_vars="date", var_name="mf", value_name="nav")
+    charts = {
+        "NAV history": (nav_df, dict(x="date", y="nav", log_y=True)),
+        "CAGR (10 horizons)": (cagr_df, dict(x="date", y="cagr", color="years")),
+        f"Comparison ({funds} funds)": (comparison_df, dict(x="date", y="nav", color="mf", log_y=True)),
+    }
+
+    # Report
+    print(f"{'chart':<24}{'builder':<14}{'points':>9}{'payload':>12}{'build':>10}")
+    for name, (df, kwargs) in charts.items():
+        for builder, build in [
+            ("px.line", lambda: px.line(df, **kwargs)),
+            ("line_figure", lambda: line_figure.__wrapped__(df, **kwargs)),
+            ("cached", lambda: line_figure(df, **kwargs)),
+        ]:
+            points, size, seconds = measure(build)
+            print(f"{name:<24}{builder:<14}{points:>9}{size / 1024:>9.0f} KB{seconds * 1000:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
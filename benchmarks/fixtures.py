@@ -0,0 +1,255 @@
+# Offline fixtures for the benchmark suite: Yahoo Finance price histories,
+# mfapi.in NAV responses and NewsAPI articles. Recorded responses in
+# benchmarks/fixtures are used when present (see record_fixtures); otherwise
+# deterministic synthetic data of the same shape stands in for them.
+
+# Imports
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# Repository root and location of the recorded responses
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Data files the app reads from data/
+DATA_FILES = ["equity_issuers.csv", "mf_codes.txt"]
+
+# Size of the synthetic data: trading days of price history, years of daily
+# NAVs, and articles per news query
+HISTORY_DAYS = 500
+NAV_YEARS = 20
+NEWS_ARTICLES = 100
+
+# Words used to build synthetic news descriptions
+NEWS_WORDS = [
+    "growth", "strong", "record", "profit", "beat", "upgrade", "surge", "gain",
+    "loss", "weak", "miss", "downgrade", "fall", "lawsuit", "fraud", "decline",
+    "not", "very", "but", "hardly", "quarter", "shares", "revenue", "outlook",
+]
+
+
+# Function to turn a name into a fixture file name
+def fixture_path(kind, name, suffix):
+    safe = "".join(c if c.isalnum() else "_" for c in str(name))
+    return FIXTURES_DIR / f"{kind}_{safe}{suffix}"
+
+
+# Function to get a seed that depends only on a name
+def name_seed(name):
+    return sum(ord(c) * (i + 1) for i, c in enumerate(str(name)))
+
+
+# Function to get the price history of a ticker as yf.Ticker.history returns it
+def history_fixture(ticker):
+    path = fixture_path("history", ticker, ".parquet")
+    if path.exists():
+        return pd.read_parquet(path)
+
+    # Synthetic daily bars around a geometric random walk
+    rng = np.random.default_rng(name_seed(ticker))
+    index = pd.bdate_range(end="2024-12-31", periods=HISTORY_DAYS, tz="Asia/Kolkata", name="Date")
+    close = 1000 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(index))))
+    spread = np.abs(rng.normal(0, 0.01, len(index)))
+    return pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.005, len(index))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(10_000, 1_000_000, len(index)),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
+
+
+# Function to get the Yahoo Finance info of a ticker
+def info_fixture(ticker):
+    path = fixture_path("info", ticker, ".json")
+    if path.exists():
+        return json.loads(path.read_text())
+
+    # Synthetic values for every field the app reads
+    from fundamentals import ALL_FIELDS
+
+    rng = np.random.default_rng(name_seed(ticker))
+    info = {key: float(rng.lognormal(0, 1)) for key in ALL_FIELDS}
+    info.update(
+        symbol=ticker,
+        longName=f"{ticker} Limited",
+        shortName=ticker,
+        currency="INR",
+        exchange="NSI" if ticker.endswith(".NS") else "BSE",
+    )
+    return info
+
+
+# Function to load the fast info of a ticker, taken from its info fixture
+def fast_info_fixture(ticker):
+    from fundamentals import FAST_INFO_FIELDS
+
+    info = info_fixture(ticker)
+    return SimpleNamespace(**{attribute: info.get(key) for key, attribute in FAST_INFO_FIELDS.items()})
+
+
+# Function to download the bars of many tickers as yf.download does with
+# group_by="column"
+def download_fixture(tickers, start=None, **kwargs):
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    data = pd.concat(
+        {ticker: history_fixture(ticker) for ticker in tickers}, axis=1
+    ).swaplevel(axis=1)
+    data = data[["Open", "High", "Low", "Close", "Volume"]]
+    if start is not None:
+        data = data[data.index.tz_localize(None) >= pd.Timestamp(start)]
+    return data
+
+
+# Function to get the mfapi.in response of a scheme
+def nav_fixture(scheme_code):
+    path = fixture_path("nav", scheme_code, ".json")
+    if path.exists():
+        return json.loads(path.read_text())
+
+    # Synthetic NAVs on business days, newest first like the API
+    rng = np.random.default_rng(name_seed(scheme_code))
+    dates = pd.bdate_range(end="2024-12-31", periods=260 * NAV_YEARS)
+    navs = 10 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, len(dates))))
+    return {
+        "meta": {"scheme_code": int(scheme_code)},
+        "data": [
+            {"date": date.strftime("%d-%m-%Y"), "nav": f"{nav:.4f}"}
+            for date, nav in zip(dates[::-1], navs[::-1])
+        ],
+        "status": "SUCCESS",
+    }
+
+
+# Function to get the NewsAPI articles of a query
+def news_fixture(query):
+    path = fixture_path("news", query, ".json")
+    if path.exists():
+        return json.loads(path.read_text())
+
+    # Synthetic articles mixing lexicon words and VADER rules
+    rng = random.Random(name_seed(query))
+    return [
+        {
+            "source": {"id": None, "name": f"Source {i % 7}"},
+            "title": f"{query} headline {i}",
+            "description": " ".join(rng.choice(NEWS_WORDS) for _ in range(rng.randint(8, 30))) + ".",
+            "url": f"https://news.example/{query}/{i}",
+            "publishedAt": f"2024-12-{i % 28 + 1:02d}T09:00:00Z",
+        }
+        for i in range(NEWS_ARTICLES)
+    ]
+
+
+# Stand-in for yf.Ticker serving the fixture history
+class FixtureTicker:
+    def __init__(self, ticker, *args, **kwargs):
+        self.ticker = ticker
+
+    def history(self, period="1mo", interval="1d", **kwargs):
+        return history_fixture(self.ticker)
+
+    @property
+    def info(self):
+        return info_fixture(self.ticker)
+
+    @property
+    def fast_info(self):
+        return fast_info_fixture(self.ticker)
+
+
+# Stand-in for the NewsAPI client serving the fixture articles page by page
+class FixtureNewsClient:
+    def get_everything(self, q=None, page_size=20, page=1, **kwargs):
+        articles = news_fixture(q)
+        return {
+            "status": "ok",
+            "totalResults": len(articles),
+            "articles": articles[(page - 1) * page_size : page * page_size],
+        }
+
+
+# Function to serve an mfapi.in URL from the fixtures
+def fixture_urlopen(url, *args, **kwargs):
+    scheme_code = str(url).rstrip("/").rsplit("/", 1)[-1]
+    return io.BytesIO(json.dumps(nav_fixture(scheme_code)).encode())
+
+
+# Context manager routing every network call of the app to the fixtures
+@contextmanager
+def offline():
+    import urllib.request
+
+    import yfinance as yf
+
+    import news
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(yf, "Ticker", FixtureTicker))
+        stack.enter_context(mock.patch.object(yf, "download", download_fixture))
+        stack.enter_context(mock.patch.object(urllib.request, "urlopen", fixture_urlopen))
+        stack.enter_context(mock.patch.object(news, "get_news_client", FixtureNewsClient))
+        stack.enter_context(
+            mock.patch.object(news, "get_rate_limiter", lambda: news.RateLimiter(float("inf")))
+        )
+        yield
+
+
+# Context manager running the app from a scratch directory, so the persistent
+# caches under data/cache start empty and never touch the real ones. Enter it
+# before the app modules are imported, since they resolve their paths on
+# import.
+@contextmanager
+def scratch_workdir():
+    workdir = Path(tempfile.mkdtemp(prefix="stockplay-bench-"))
+    (workdir / "data").mkdir()
+    for name in DATA_FILES:
+        (workdir / "data" / name).symlink_to(ROOT / "data" / name)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, str(ROOT))
+    try:
+        yield workdir
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# Function to record real responses as fixtures (needs network access)
+def record_fixtures(tickers=(), scheme_codes=(), queries=()):
+    import urllib.request
+
+    import yfinance as yf
+
+    from news import fetch_article_pages
+
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    for ticker in tickers:
+        history = yf.Ticker(ticker).history(period="2y", interval="1d")
+        history.to_parquet(fixture_path("history", ticker, ".parquet"))
+        info = yf.Ticker(ticker).info
+        fixture_path("info", ticker, ".json").write_text(json.dumps(info))
+    for scheme_code in scheme_codes:
+        with urllib.request.urlopen(f"https://api.mfapi.in/mf/{scheme_code}") as url:
+            fixture_path("nav", scheme_code, ".json").write_bytes(url.read())
+    for query in queries:
+        articles = [article for page in fetch_article_pages(query) for article in page]
+        fixture_path("news", query, ".json").write_text(json.dumps(articles))
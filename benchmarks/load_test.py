@@ -0,0 +1,272 @@
+# Headless load test of the app: drives every page script through Streamlit's
+# testing API against the offline fixtures, with N concurrent sessions each
+# replaying a realistic sequence of widget interactions, and reports the rerun
+# latency percentiles and the memory per session of every page
+#
+# Usage: python benchmarks/load_test.py [--sessions N] [--iterations N] [-k page]
+
+# Imports
+import argparse
+import datetime
+import gc
+import itertools
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from fixtures import ROOT, offline, scratch_workdir
+
+# Seconds a single rerun may take before the session fails
+RERUN_TIMEOUT = 120
+
+# Mutual fund page tabs
+MF_TABS = ["📈 NAV History", "📊 CAGR Analysis", "🔄 Comparative Analysis", "💰 SIP Calculator"]
+
+
+# Function to find a widget of a page by its label
+def widget(at, kind, label):
+    return next(w for w in getattr(at, kind) if w.label == label)
+
+
+# Function to pick a random stock in the sidebar stock selector
+def pick_stock(at, rng):
+    selector = widget(at, "selectbox", "Choose a stock")
+    selector.select_index(rng.randrange(len(selector.options)))
+
+
+# Function to zoom the price chart to a random window; the slider's values are
+# bar positions shown as dates, so the positions are recovered from the labels
+# of every bar, up to the first position past the last bar
+def zoom(at, rng):
+    slider = widget(at, "select_slider", "Zoom")
+    positions = {}
+    for i in itertools.count():
+        try:
+            positions[slider.format_func(i)] = i
+        except IndexError:
+            break
+    lower, upper = sorted(rng.sample(slider.options, 2))
+    slider.set_range(positions[lower], positions[upper])
+
+
+# Function to pick three random funds to compare; the scheme list also holds
+# the header row of the codes file, which is no fund
+def pick_funds(at, rng):
+    selector = widget(at, "multiselect", "Select Funds for Comparison:")
+    funds = [name for name in selector.options[:50] if name != "Scheme Name"]
+    selector.set_value(rng.sample(funds, 3))
+
+
+# Widget interactions replayed by every session of a page, after its first
+# load; each takes the page and a random generator and sets one widget
+SCENARIOS = {
+    "00_😎_Main.py": [],
+    "pages/01_🏛️_Stock_Info.py": [
+        pick_stock,
+        lambda at, rng: widget(at, "radio", "Choose a stock exchange").set_value("BSE"),
+        pick_stock,
+    ],
+    "pages/02_📈_Stock_Prediction.py": [
+        pick_stock,
+        lambda at, rng: widget(at, "selectbox", "Choose a period").set_value("2y"),
+        zoom,
+    ],
+    "pages/03_📰_Stock_News_Article.py": [
+        lambda at, rng: at.text_input[0].set_value(rng.choice(["Infosys", "Reliance", "TCS"])),
+        lambda at, rng: at.text_input[0].set_value("Infosys, Reliance, TCS, Wipro"),
+    ],
+    "pages/04_🚀_Mutual_fund_analysis.py": [
+        lambda at, rng: at.session_state.__setitem__("mf_tab", MF_TABS[1]),
+        lambda at, rng: at.session_state.__setitem__("mf_tab", MF_TABS[2]),
+        pick_funds,
+        lambda at, rng: at.session_state.__setitem__("mf_tab", MF_TABS[3]),
+        lambda at, rng: widget(at, "date_input", "End Date 📅").set_value(
+            datetime.date(rng.randint(2012, 2024), 12, 31)
+        ),
+    ],
+    "pages/05_🔎_Stock_Screener.py": [
+        lambda at, rng: widget(at, "number_input", "Maximum Price to Book").set_value(rng.uniform(0.5, 3)),
+        lambda at, rng: widget(at, "number_input", "Minimum Return on Equity").set_value(rng.uniform(0.5, 2)),
+        lambda at, rng: widget(at, "checkbox", "Ascending").check(),
+    ],
+    "pages/06_🗺️_Sector_Heatmap.py": [
+        lambda at, rng: widget(at, "selectbox", "Group by").set_value("Igroup Name"),
+        lambda at, rng: widget(at, "selectbox", "Color by").set_value("Volatility"),
+        lambda at, rng: widget(at, "selectbox", "Group by").set_value("ISubgroup Name"),
+    ],
+    "pages/07_🧪_Strategy_Backtest.py": [
+        lambda at, rng: widget(at, "selectbox", "Choose a strategy").set_value(
+            rng.choice(["SMA Crossover", "EMA Crossover"])
+        ),
+        lambda at, rng: widget(at, "text_input", "fast (comma separated)").set_value("5, 10.5"),
+        lambda at, rng: widget(at, "text_input", "fast (comma separated)").set_value("5, 10, 20"),
+        lambda at, rng: widget(at, "button", "Run backtest").click(),
+    ],
+}
+
+
+# Context manager sharing one mock Streamlit runtime between every session.
+# AppTest installs a runtime of its own for the duration of each run and
+# removes it afterwards, which breaks runs of other sessions in flight. Every
+# session also parses the page on its first load, and parsing in several
+# threads at once can fail on Python 3.11 (CPython issue 106905), so parses
+# are made one at a time.
+@contextmanager
+def shared_runtime():
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import magic
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.media_file_manager import MediaFileManager
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+
+    parse_lock = threading.Lock()
+    add_magic = magic.add_magic
+
+    def add_magic_serially(*args, **kwargs):
+        with parse_lock:
+            return add_magic(*args, **kwargs)
+
+    with mock.patch.object(Runtime, "instance", lambda: runtime), mock.patch.object(
+        Runtime, "exists", lambda: True
+    ), mock.patch.object(magic, "add_magic", add_magic_serially):
+        yield runtime
+
+
+# Function to fill the fundamentals snapshot and the price store the screener
+# and the sector heatmap read
+def prepare_stores():
+    from price_store import get_price_store
+    from screener import refresh_snapshot
+    from tickers import fetch_issuers
+
+    refresh_snapshot()
+    get_price_store().update(list(fetch_issuers().index))
+
+
+# Function to fail a session whose last run raised
+def check_run(page, at):
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].value}")
+
+
+# Function to run one session of a page: the first load, then the scenario
+# repeated iterations times; returns the session and its load and rerun times
+def run_session(page, iterations, seed, start_barrier):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(ROOT / page), default_timeout=RERUN_TIMEOUT)
+    start_barrier.wait()
+
+    # First load
+    start = time.perf_counter()
+    at.run()
+    load_time = time.perf_counter() - start
+
+    check_run(page, at)
+
+    # Widget interactions
+    rerun_times = []
+    for _ in range(iterations):
+        for action in SCENARIOS[page]:
+            action(at, rng)
+            start = time.perf_counter()
+            at.run()
+            rerun_times.append(time.perf_counter() - start)
+            check_run(page, at)
+
+    return at, load_time, rerun_times
+
+
+# Function to run sessions of a page concurrently, starting them all at once;
+# returns the result of every session and the elapsed time
+def run_sessions(page, sessions, iterations):
+    start_barrier = threading.Barrier(sessions)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        futures = [
+            executor.submit(run_session, page, iterations, seed, start_barrier)
+            for seed in range(sessions)
+        ]
+        results = [future.result() for future in futures]
+    return results, time.perf_counter() - start
+
+
+# Function to load test one page with concurrent sessions
+def load_test_page(page, sessions, iterations):
+    results, elapsed = run_sessions(page, sessions, iterations)
+
+    # Latency of the first loads and of the reruns
+    load_times = np.array([load_time for _, load_time, _ in results])
+    rerun_times = np.array([t for _, _, times in results for t in times])
+    stats = {
+        "load_p50": np.percentile(load_times, 50),
+        "reruns_per_s": (len(load_times) + len(rerun_times)) / elapsed,
+    }
+    for q in (50, 95, 99):
+        stats[f"rerun_p{q}"] = np.percentile(rerun_times, q) if len(rerun_times) else np.nan
+
+    # Memory held by the sessions, measured in a separate traced pass once the
+    # shared caches are warm, with every session still alive
+    del results
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results, _ = run_sessions(page, sessions, 1)
+    gc.collect()
+    stats["memory_per_session"] = (tracemalloc.get_traced_memory()[0] - before) / sessions
+    tracemalloc.stop()
+
+    return stats
+
+
+# Function to run the load test
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions per page")
+    parser.add_argument("--iterations", type=int, default=2, help="scenario repetitions per session")
+    parser.add_argument("-k", default="", help="only test pages whose path contains this")
+    args = parser.parse_args()
+
+    pages = [page for page in SCENARIOS if args.k in page]
+    with scratch_workdir(), offline(), shared_runtime():
+        prepare_stores()
+
+        # Report
+        print(f"sessions: {args.sessions}, scenario iterations: {args.iterations}\n")
+        print(
+            f"{'page':<28}{'load p50':>10}{'rerun p50':>11}{'p95':>9}{'p99':>9}"
+            f"{'reruns/s':>10}{'MiB/session':>13}"
+        )
+        for page in pages:
+            stats = load_test_page(page, args.sessions, args.iterations)
+            name = "".join(c for c in Path(page).stem if c.isascii()).replace("__", "_")
+            print(
+                f"{name:<28}{stats['load_p50'] * 1000:>7.0f} ms{stats['rerun_p50'] * 1000:>8.0f} ms"
+                f"{stats['rerun_p95'] * 1000:>6.0f} ms{stats['rerun_p99'] * 1000:>6.0f} ms"
+                f"{stats['reruns_per_s']:>10.1f}{stats['memory_per_session'] / 2**20:>13.1f}"
+            )
+
+        # Stop the shared worker pools while still offline; waiting for them
+        # at exit would leave the quote poller polling the live provider
+        from backtest import get_backtest_pool
+        from forecasting import get_forecast_pool
+
+        for get_pool in (get_forecast_pool, get_backtest_pool):
+            if get_pool.cache_info().currsize:
+                get_pool().shutdown()
+
+
+if __name__ == "__main__":
+    main()
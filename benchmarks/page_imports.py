@@ -0,0 +1,72 @@
+# Benchmark the import cost of every page, i.e. what a page's first render
+# after a worker start pays before its first element
+#
+# Usage: python benchmarks/page_imports.py [number of runs per page]
+
+# Imports
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+# Repository root, where the app runs from
+ROOT = Path(__file__).resolve().parent.parent
+
+# Number of heaviest top-level imports listed per page
+TOP_IMPORTS = 3
+
+
+# Function to extract the top-level import statements of a page
+def page_imports(path):
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+# Function to run the imports in a fresh interpreter with -X importtime; returns
+# the total import time and the cumulative time of each top-level import, in
+# seconds
+def profile_imports(source):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", source],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0.0
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total += int(self_us) / 1e6
+
+        # Top-level imports are the ones without indentation
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative_us) / 1e6
+
+    return total, top_level
+
+
+# Function to run the benchmark
+def main(runs=3):
+    pages = [ROOT / "00_😎_Main.py"] + sorted((ROOT / "pages").glob("*.py"))
+
+    # Report the best of the runs of every page
+    print(f"{'page':<30}{'imports':>10}  heaviest")
+    for path in pages:
+        source = page_imports(path)
+        total, top_level = min((profile_imports(source) for _ in range(runs)), key=lambda r: r[0])
+        heaviest = sorted(top_level.items(), key=lambda item: -item[1])[:TOP_IMPORTS]
+        name = "".join(c for c in path.stem if c.isascii()).replace("__", "_")
+        print(
+            f"{name:<30}{total * 1000:>7.0f} ms  "
+            + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in heaviest)
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
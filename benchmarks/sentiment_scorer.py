@@ -0,0 +1,77 @@
+# Benchmark the bulk sentiment scorer against per-article VADER scoring
+#
+# Usage: python benchmarks/sentiment_scorer.py [number of descriptions]
+
+# Imports
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Make the app modules importable when run from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from news import BulkSentimentScorer, get_analyzer
+
+# Words used to build synthetic news descriptions
+SUBJECTS = ["Shares of the company", "The stock", "Investors", "Analysts", "The board"]
+MODIFIERS = ["very", "extremely", "slightly", "not", "never", "hardly", "kind of", "no", ""]
+CONNECTORS = ["and", "but", "while", "as", "after"]
+
+
+# Function to build reproducible descriptions mixing lexicon words and rules
+def build_descriptions(count, seed=0):
+    rng = random.Random(seed)
+    lexicon = sorted(get_analyzer().lexicon)
+
+    descriptions = []
+    for _ in range(count):
+        clauses = []
+        for _ in range(rng.randint(1, 3)):
+            word = rng.choice(lexicon)
+            if rng.random() < 0.05:
+                word = word.upper()
+            clauses.append(
+                f"{rng.choice(SUBJECTS)} looked {rng.choice(MODIFIERS)} {word} "
+                f"on the {rng.choice(lexicon)} quarterly results"
+            )
+        text = f" {rng.choice(CONNECTORS)} ".join(clauses)
+        descriptions.append(text + rng.choice([".", "!", "!!", "?", "??"]))
+
+    return descriptions
+
+
+# Function to run the benchmark
+def main(count=10_000):
+    descriptions = build_descriptions(count)
+    analyzer = get_analyzer()
+
+    # Reference: one polarity_scores call per description
+    start = time.perf_counter()
+    reference = np.array([analyzer.polarity_scores(d)["compound"] for d in descriptions])
+    reference_time = time.perf_counter() - start
+
+    # Bulk scorer, including building the vocabulary index
+    start = time.perf_counter()
+    scorer = BulkSentimentScorer(analyzer)
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = scorer.polarity_scores(descriptions)["compound"].to_numpy()
+    bulk_time = time.perf_counter() - start
+
+    # Report
+    error = np.abs(bulk - reference)
+    print(f"descriptions:            {count}")
+    print(f"polarity_scores loop:    {reference_time:.3f} s")
+    print(f"bulk scorer setup:       {setup_time:.3f} s")
+    print(f"bulk scorer:             {bulk_time:.3f} s")
+    print(f"speedup:                 {reference_time / bulk_time:.1f}x")
+    print(f"max compound difference: {error.max():.4f}")
+    print(f"mismatches above 1e-3:   {(error > 1e-3).sum()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
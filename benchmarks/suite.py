@@ -0,0 +1,366 @@
+# Offline benchmark suite for the app's data and page computations. Every
+# benchmark runs against the fixtures in benchmarks/fixtures.py; results are
+# stored per commit in benchmarks/results/<commit>.json (not checked in) to
+# track latency and memory over time. Comparing against a commit without
+# stored results first runs the suite at that commit, in a git worktree.
+#
+# Usage: python benchmarks/suite.py [-k filter] [--repeat N] [--compare COMMIT]
+#        python benchmarks/suite.py --record   (records real fixtures)
+
+# Imports
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+
+# Repository root and location of the stored results
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Inputs shared by the benchmarks
+TICKER = "RELIANCE.NS"
+SCHEME_CODE = "122639"
+COMPARISON_CODES = ["122639", "118825", "120503", "119551", "120716", "118989"]
+NEWS_QUERY = "Reliance Industries"
+BATCH_TICKERS = [f"TICKER{i}.NS" for i in range(200)]
+
+# Registered benchmarks: {name: (run, setup)}
+BENCHMARKS = {}
+
+
+# Decorator registering a benchmark; setup runs untimed before every run
+def benchmark(name, setup=None):
+    def register(run):
+        BENCHMARKS[name] = (run, setup)
+        return run
+
+    return register
+
+
+##### Benchmarks #####
+
+
+# Function to clear the cached issuer master
+def clear_issuer_master():
+    from tickers import fetch_issuer_master
+
+    fetch_issuer_master.cache_clear()
+
+
+@benchmark("tickers.fetch_stocks", setup=clear_issuer_master)
+def bench_fetch_stocks():
+    from tickers import fetch_stocks
+
+    fetch_stocks()
+
+
+@benchmark("history.fetch_stock_history")
+def bench_fetch_stock_history():
+    from history import fetch_stock_history
+
+    fetch_stock_history(TICKER, "2y", "1d")
+
+
+# Function to clear the fitted candidates of the forecaster
+def clear_forecast_cache():
+    from forecasting import forecast_cache
+
+    forecast_cache.entries.clear()
+
+
+@benchmark("prediction.generate_stock_prediction", setup=clear_forecast_cache)
+def bench_generate_stock_prediction():
+    from prediction import generate_stock_prediction
+
+    if generate_stock_prediction(TICKER)[0] is None:
+        raise RuntimeError("prediction failed")
+
+
+@benchmark("forecasting.select_ar_order")
+def bench_select_ar_order():
+    from forecasting import select_ar_order
+    from history import fetch_stock_history
+
+    select_ar_order(fetch_stock_history(TICKER, "2y", "1d")["Close"], criterion="aic")
+
+
+# Function to clear the cache of one of the mutual fund functions
+def clear_cache(name):
+    def clear():
+        import mutual_funds
+
+        getattr(mutual_funds, name).clear()
+
+    return clear
+
+
+@benchmark("mutual_funds.get_scheme_codes", setup=clear_cache("get_scheme_codes"))
+def bench_get_scheme_codes():
+    from mutual_funds import get_scheme_codes
+
+    get_scheme_codes()
+
+
+@benchmark("mutual_funds.get_nav", setup=clear_cache("get_nav"))
+def bench_get_nav():
+    from mutual_funds import get_nav
+
+    get_nav(SCHEME_CODE)
+
+
+@benchmark("mutual_funds.get_cagrs")
+def bench_get_cagrs():
+    from mutual_funds import get_cagrs, get_nav
+
+    get_cagrs(get_nav(SCHEME_CODE))
+
+
+# Function to clear the cached comparison of several schemes, keeping the NAVs
+def clear_comparison():
+    from mutual_funds import get_comparison, get_fund_cagrs
+
+    get_comparison.clear()
+    get_fund_cagrs.clear()
+
+
+@benchmark("mutual_funds.get_comparison", setup=clear_comparison)
+def bench_get_comparison():
+    from mutual_funds import get_comparison
+
+    names = [f"Fund {code}" for code in COMPARISON_CODES]
+    weights = [100 / (len(COMPARISON_CODES) - 1)] * (len(COMPARISON_CODES) - 1)
+    get_comparison(names, COMPARISON_CODES, weights)
+
+
+@benchmark("mutual_funds.get_sip", setup=clear_cache("get_sip"))
+def bench_get_sip():
+    from mutual_funds import get_sip
+
+    get_sip(SCHEME_CODE, datetime.date(2006, 5, 1), datetime.date(2024, 12, 31))
+
+
+# Function to start the news benchmark from an empty article store
+def clear_article_store():
+    import news
+
+    news.get_article_store.cache_clear()
+    news.ARTICLE_STORE_PATH.unlink(missing_ok=True)
+
+
+@benchmark("news.fetch_news_sentiment", setup=clear_article_store)
+def bench_fetch_news_sentiment():
+    from news import fetch_news_sentiment
+
+    fetch_news_sentiment(NEWS_QUERY)
+
+
+@benchmark("indicators.compute_indicators")
+def bench_compute_indicators():
+    from history import fetch_stock_history
+    from indicators import INDICATORS, compute_indicators
+
+    compute_indicators(fetch_stock_history(TICKER, "2y", "1d"), list(INDICATORS))
+
+
+# Function to build the wide frames (dates x tickers) of the batch tickers once
+@lru_cache(maxsize=None)
+def batch_frames():
+    import pandas as pd
+
+    from fixtures import history_fixture
+    from indicators import INDICATOR_FIELDS
+
+    histories = {ticker: history_fixture(ticker) for ticker in BATCH_TICKERS}
+    return {field: pd.DataFrame({t: h[field] for t, h in histories.items()}) for field in INDICATOR_FIELDS}
+
+
+@benchmark("indicators.batch_indicators")
+def bench_batch_indicators():
+    from indicators import INDICATORS, batch_indicators
+
+    batch_indicators(batch_frames(), list(INDICATORS))
+
+
+@benchmark("indicators.IndicatorStream.push")
+def bench_indicator_stream_push():
+    from indicators import INDICATORS, IndicatorStream
+
+    frames = batch_frames()
+    stream = IndicatorStream(list(INDICATORS), frames["Close"].columns)
+    for date in frames["Close"].index:
+        stream.push({field: frame.loc[date] for field, frame in frames.items()}, date)
+
+
+@benchmark("backtest.sweep")
+def bench_backtest_sweep():
+    from backtest import sweep
+
+    sweep("SMA Crossover", batch_frames(), workers=1)
+
+
+# Function to start the shared backtest pool before it is timed
+def warm_backtest_pool():
+    from backtest import get_backtest_pool
+
+    get_backtest_pool().submit(int).result()
+
+
+@benchmark("backtest.pool_dispatch", setup=warm_backtest_pool)
+def bench_backtest_pool_dispatch():
+    from backtest import get_backtest_pool, run_parameter_sets
+
+    frames = batch_frames()
+    fields = {field: frame.to_numpy(dtype=float) for field, frame in frames.items()}
+    get_backtest_pool().submit(run_parameter_sets, "SMA Crossover", [], fields, frames["Close"].columns, 0).result()
+
+
+##### Benchmarks End #####
+
+
+# Function to time a benchmark; returns the run times and the peak memory
+# allocated by one run, measured in a separate traced run
+def measure(run, setup, repeat):
+    # Warm up imports and lazily built singletons
+    if setup:
+        setup()
+    run()
+
+    # Timed runs
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    # Traced run
+    if setup:
+        setup()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return times, peak
+
+
+# Function to run a git command in the repository; returns its output
+def git(*args):
+    return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+
+# Function to get the current commit, flagged when the tree has local changes
+def current_commit():
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(git("status", "--porcelain", "--untracked-files=no"))
+    return commit, dirty
+
+
+# Function to run the suite at another commit in a temporary worktree, storing
+# its results under that commit; returns the path of the results
+def run_at_commit(commit, k, repeat):
+    path = RESULTS_DIR / f"{commit}.json"
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = Path(tmp) / commit
+        subprocess.run(["git", "worktree", "add", "--detach", str(worktree), commit], cwd=ROOT, check=True)
+        try:
+            print(f"running the suite at {commit}")
+            subprocess.run(
+                [sys.executable, "benchmarks/suite.py", "-k", k, "--repeat", str(repeat)], cwd=worktree, check=True
+            )
+            RESULTS_DIR.mkdir(exist_ok=True)
+            shutil.copy(worktree / "benchmarks" / "results" / f"{commit}.json", path)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=ROOT)
+    return path
+
+
+# Function to print the results, with the ratio to a stored run if given
+def report(results, baseline=None):
+    header = f"{'benchmark':<40}{'median':>10}{'min':>10}{'peak mem':>12}"
+    print(header + ("   vs base" if baseline else ""))
+    for name, result in results.items():
+        line = (
+            f"{name:<40}{result['median_s'] * 1000:>7.1f} ms{result['min_s'] * 1000:>7.1f} ms"
+            f"{result['peak_kib'] / 1024:>8.1f} MiB"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            line += f"{result['median_s'] / base['median_s']:>9.2f}x"
+        print(line)
+
+
+# Function to run the suite
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("-k", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--compare", help="commit of stored results to compare against")
+    parser.add_argument("--record", action="store_true", help="record real fixtures instead")
+    args = parser.parse_args()
+
+    # Record the fixtures from the live services
+    if args.record:
+        from fixtures import record_fixtures, scratch_workdir
+
+        with scratch_workdir():
+            record_fixtures([TICKER], COMPARISON_CODES, [NEWS_QUERY])
+        return
+
+    from fixtures import offline, scratch_workdir
+
+    # Run the benchmarks offline
+    results = {}
+    with scratch_workdir(), offline():
+        for name, (run, setup) in BENCHMARKS.items():
+            if args.k in name:
+                times, peak = measure(run, setup, args.repeat)
+                results[name] = {
+                    "median_s": statistics.median(times),
+                    "min_s": min(times),
+                    "peak_kib": peak / 1024,
+                    "runs": len(times),
+                }
+
+    # Load the stored run to compare against, running the suite at that
+    # commit when it has no stored results
+    baseline = None
+    if args.compare:
+        compare = git("rev-parse", "--short", args.compare) or args.compare
+        path = RESULTS_DIR / f"{compare}.json"
+        if not path.exists():
+            path = run_at_commit(compare, args.k, args.repeat)
+        baseline = json.loads(path.read_text())["benchmarks"]
+
+    # Store the results of this commit
+    commit, dirty = current_commit()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{commit}{'-dirty' if dirty else ''}.json"
+    stored = json.loads(path.read_text()) if path.exists() else {"benchmarks": {}}
+    stored.update(
+        commit=commit,
+        dirty=dirty,
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        machine=platform.platform(),
+    )
+    stored["benchmarks"].update(results)
+    path.write_text(json.dumps(stored, indent=2))
+
+    # Report
+    report(results, baseline)
+    print(f"\nresults stored in {path.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
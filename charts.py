@@ -0,0 +1,255 @@
+# Imports
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Default number of points per trace, about one per horizontal pixel of a
+# full-width chart
+MAX_POINTS = 1500
+
+# Memory budget of the figure cache shared by every session of the app
+FIGURE_CACHE_BYTES = 128 * 1024 * 1024
+
+
+# Function to aggregate OHLC bars into at most max_points buckets of
+# consecutive bars, preserving the first open, highest high, lowest low and
+# last close of every bucket; extra columns (e.g. indicators) keep their value
+# at the last bar of every bucket, like the close
+def downsample_ohlc(df, max_points=MAX_POINTS, columns=()):
+    if len(df) <= max_points:
+        return df
+
+    # Start position of every bucket
+    size = int(np.ceil(len(df) / max_points))
+    starts = np.arange(0, len(df), size)
+    ends = np.append(starts[1:], len(df)) - 1
+
+    # Aggregate every bucket at once
+    return pd.DataFrame(
+        {
+            "Open": df["Open"].to_numpy()[starts],
+            "High": np.maximum.reduceat(df["High"].to_numpy(), starts),
+            "Low": np.minimum.reduceat(df["Low"].to_numpy(), starts),
+            "Close": df["Close"].to_numpy()[ends],
+            **{column: df[column].to_numpy()[ends] for column in columns},
+        },
+        index=df.index[starts],
+    )
+
+
+# Function to pick the positions of at most max_points points of a line,
+# keeping the lowest and highest point of every bucket of consecutive points
+# so peaks and troughs survive at any zoom level
+def minmax_indices(y, max_points=MAX_POINTS):
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Lay the points out as one row per bucket, padding the last bucket with
+    # its final value
+    size = int(np.ceil(n / max(max_points // 2, 1)))
+    rows = int(np.ceil(n / size))
+    padded = np.empty(rows * size)
+    padded[:n] = y
+    padded[n:] = y[-1]
+    buckets = padded.reshape(rows, size)
+
+    # Positions of the extremes of every bucket, in chronological order
+    starts = np.arange(rows) * size
+    selected = np.concatenate(
+        [[0, n - 1], starts + buckets.argmin(axis=1), starts + buckets.argmax(axis=1)]
+    )
+    return np.unique(np.minimum(selected, n - 1))
+
+
+# Function to downsample a pandas series to its bucket extremes, keeping its
+# index
+def downsample_series(series, max_points=MAX_POINTS):
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+
+    return series.iloc[minmax_indices(series.to_numpy(dtype=float), max_points)]
+
+
+# Function to convert a datetime index to milliseconds since the epoch, which
+# plotly serializes as a compact binary array instead of one date string per
+# point (other indexes are returned unchanged)
+def epoch_ms(index):
+    if not isinstance(index, pd.DatetimeIndex):
+        return index
+
+    # Keep the wall-clock times of timezone-aware indexes
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit("ms").asi8.astype(float)
+
+
+# Function to hash the contents of a frame, index included
+def frame_digest(df):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(repr((list(df.columns), list(df.dtypes))).encode())
+    return digest.hexdigest()
+
+
+# Function to estimate the memory held by a figure's trace arrays
+def figure_nbytes(fig):
+    nbytes = 0
+    for trace in fig.data:
+        for value in trace.to_plotly_json().values():
+            if isinstance(value, np.ndarray):
+                nbytes += value.nbytes
+            elif isinstance(value, (list, tuple)):
+                nbytes += 8 * len(value)
+    return nbytes
+
+
+# Thread-safe LRU cache of built figures, evicting the least recently used
+# figures once their arrays exceed max_bytes
+class FigureCache:
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    # Return the cached figure of a key (None on a miss)
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    # Store a figure, evicting old figures beyond the memory budget
+    def put(self, key, fig):
+        size = figure_nbytes(fig)
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            self.entries[key] = (fig, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                self.nbytes -= self.entries.popitem(last=False)[1][1]
+
+
+# Shared cache instance
+figure_cache = FigureCache()
+
+
+# Decorator caching a figure builder on the contents of its input frame and
+# its options, so reruns with unchanged inputs reuse the built figure. Cached
+# figures are shared between sessions and must not be modified.
+def cached_figure(builder):
+    @wraps(builder)
+    def wrapper(df, *args, **kwargs):
+        key = (builder.__name__, frame_digest(df), repr(args), repr(sorted(kwargs.items())))
+        fig = figure_cache.get(key)
+        if fig is None:
+            fig = builder(df, *args, **kwargs)
+            figure_cache.put(key, fig)
+        return fig
+
+    return wrapper
+
+
+# Function to build a line chart from a long-format frame, like px.line, with
+# one WebGL trace per color group downsampled to the point budget; layout holds
+# extra layout options
+@cached_figure
+def line_figure(df, x, y, color=None, log_y=False, title=None, layout=None, max_points=MAX_POINTS):
+    groups = df.groupby(color, sort=False) if color is not None else [(y, df)]
+
+    # Add one trace per group
+    fig = go.Figure()
+    for name, group in groups:
+        line = downsample_series(group.set_index(x)[y], max_points)
+        fig.add_trace(
+            go.Scattergl(
+                x=epoch_ms(line.index),
+                y=line.to_numpy(),
+                name=str(name),
+                mode="lines",
+                showlegend=color is not None,
+            )
+        )
+
+    # Label the chart like plotly express does
+    fig.update_layout(
+        title=title,
+        xaxis_title=x,
+        xaxis_type="date" if pd.api.types.is_datetime64_any_dtype(df[x]) else None,
+        yaxis_title=y,
+        legend_title_text=color,
+    )
+    if log_y:
+        fig.update_yaxes(type="log")
+    fig.update_layout(layout)
+
+    # Return the figure
+    return fig
+
+
+# Function to build a candlestick chart of OHLC bars aggregated to the point
+# budget; overlays are columns of df drawn as lines over the price, panels are
+# groups of columns drawn in panels below it, and layout holds extra layout
+# options
+@cached_figure
+def candlestick_figure(df, layout=None, max_points=MAX_POINTS, overlays=(), panels=()):
+    bars = downsample_ohlc(df, max_points, [*overlays, *(column for panel in panels for column in panel)])
+    x = epoch_ms(bars.index)
+
+    # Stack the price chart over the indicator panels
+    if panels:
+        fig = make_subplots(
+            rows=1 + len(panels),
+            cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.03,
+            row_heights=[3] + [1] * len(panels),
+        )
+        fig.update_layout(height=450 + 150 * len(panels))
+        price_cell = dict(row=1, col=1)
+    else:
+        fig = go.Figure()
+        price_cell = {}
+
+    # Add the price and its overlays
+    fig.add_trace(
+        go.Candlestick(
+            x=x,
+            open=bars["Open"].to_numpy(),
+            high=bars["High"].to_numpy(),
+            low=bars["Low"].to_numpy(),
+            close=bars["Close"].to_numpy(),
+            name="Price",
+        ),
+        **price_cell,
+    )
+    for column in overlays:
+        fig.add_trace(
+            go.Scattergl(x=x, y=bars[column].to_numpy(), name=column, mode="lines", line=dict(width=1)),
+            **price_cell,
+        )
+
+    # Add the panels
+    for row, panel in enumerate(panels, start=2):
+        for column in panel:
+            fig.add_trace(
+                go.Scattergl(x=x, y=bars[column].to_numpy(), name=column, mode="lines", line=dict(width=1)),
+                row=row,
+                col=1,
+            )
+
+    fig.update_xaxes(type="date")
+    fig.update_layout(layout)
+
+    # Return the figure
+    return fig
@@ -0,0 +1,341 @@
+# Imports
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+
+import numpy as np
+
+from metrics import increment, span
+
+# Days forecast past the end of the test split
+FORECAST_DAYS = 90
+
+# Seconds model selection may take; candidates still fitting by then are left
+# out of this selection, and cached for the next one when they finish
+SELECTION_BUDGET = 20
+
+# Processes of the pool shared by every session, in which candidates are fit
+# in parallel; the pool is spawned once and kept warm, so a selection only
+# pays for sending the closes to it
+POOL_WORKERS = min(4, os.cpu_count() or 1)
+
+# Number of fitted candidates kept across reruns
+FORECAST_CACHE_ENTRIES = 256
+
+# Largest order considered by the autoregressive lag selection
+MAX_AR_LAGS = 150
+
+
+# Function to compute the coefficient of determination of predictions, as
+# sklearn.metrics.r2_score does for a single output
+def r2_score(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=float).ravel()
+    y_pred = np.asarray(y_pred, dtype=float).ravel()
+    return 1 - np.sum((y_true - y_pred) ** 2) / np.sum((y_true - y_true.mean()) ** 2)
+
+
+# Function to compute the mean absolute percentage error of predictions, as
+# sklearn.metrics.mean_absolute_percentage_error does for a single output
+def mean_absolute_percentage_error(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=float).ravel()
+    y_pred = np.asarray(y_pred, dtype=float).ravel()
+    return np.mean(np.abs(y_pred - y_true) / np.maximum(np.abs(y_true), np.finfo(float).eps))
+
+
+# Function to select the order of an autoregressive model of a series by an
+# information criterion, "aic" or "bic". Every order is fit on the same
+# observations, those after the largest order. Since the columns of a smaller
+# order are a prefix of those of a larger one, one QR decomposition of the
+# largest lag matrix gives the residuals of every order: the orthonormal
+# columns past an order only add their projections of the target.
+def select_ar_order(series, max_lags=MAX_AR_LAGS, criterion="aic"):
+    series = np.asarray(series, dtype=float)
+    max_lags = max(1, min(max_lags, (len(series) - 1) // 2))
+
+    # Constant and lags 1..max_lags of every observation after the first max_lags
+    target = series[max_lags:]
+    lagged = np.lib.stride_tricks.sliding_window_view(series[:-1], max_lags)[:, ::-1]
+    design = np.column_stack([np.ones(len(target)), lagged])
+
+    # Residual sum of squares of every order 0..max_lags: that of the largest
+    # order plus the projections on the columns left out
+    q, _ = np.linalg.qr(design)
+    projections = q.T @ target
+    residual = np.sum((target - q @ projections) ** 2)
+    left_out = np.append(np.cumsum((projections**2)[::-1])[::-1][1:], 0.0)
+    rss = residual + left_out
+
+    # Information criterion of orders 1..max_lags
+    observations = len(target)
+    orders = np.arange(1, max_lags + 1)
+    penalty = np.log(observations) if criterion == "bic" else 2.0
+    with np.errstate(divide="ignore"):
+        ics = observations * np.log(rss[1:] / observations) + penalty * (orders + 1)
+    return int(orders[np.argmin(ics)])
+
+
+##### Models #####
+
+# Every model is fit on a 1d array of daily closes and predicts the closes of
+# the days right after it. statsmodels is imported on first use, since it
+# takes seconds to import.
+
+
+# Autoregressive model of the closes, with a fixed number of lags or one
+# selected by an information criterion ("aic" or "bic")
+class AutoRegForecaster:
+    def __init__(self, lags):
+        self.lags = lags
+
+    # Fit the model to the closes
+    def fit(self, history):
+        from statsmodels.tsa.ar_model import AutoReg
+
+        if isinstance(self.lags, str):
+            self.lags = select_ar_order(history, criterion=self.lags)
+        self.result = AutoReg(history, self.lags).fit(cov_type="HC0")
+        self.observations = len(history)
+        return self
+
+    # Predict the closes of the next steps days
+    def predict(self, steps):
+        return self.result.predict(start=self.observations, end=self.observations + steps - 1, dynamic=True)
+
+
+# ARIMA model of the closes
+class ARIMAForecaster:
+    def __init__(self, order):
+        self.order = order
+
+    # Fit the model to the closes
+    def fit(self, history):
+        from statsmodels.tsa.arima.model import ARIMA
+
+        self.result = ARIMA(history, order=self.order).fit()
+        return self
+
+    # Predict the closes of the next steps days
+    def predict(self, steps):
+        return self.result.forecast(steps)
+
+
+# Exponential smoothing of the closes, with a damped additive trend
+class ExponentialSmoothingForecaster:
+    def __init__(self, damped_trend=True):
+        self.damped_trend = damped_trend
+
+    # Fit the model to the closes
+    def fit(self, history):
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+        self.result = ExponentialSmoothing(history, trend="add", damped_trend=self.damped_trend).fit()
+        return self
+
+    # Predict the closes of the next steps days
+    def predict(self, steps):
+        return self.result.forecast(steps)
+
+
+# Ridge regression of the close on the lagged closes
+class RidgeForecaster:
+    def __init__(self, lags, alpha):
+        self.lags = lags
+        self.alpha = alpha
+
+    # Fit the model to the closes
+    def fit(self, history):
+        # Scale the closes so the penalty does not depend on the price level
+        self.scale = history.mean()
+        closes = history / self.scale
+
+        # Rows of lagged closes (oldest first) and the close that follows them
+        lagged = np.lib.stride_tricks.sliding_window_view(closes[:-1], self.lags)
+        target = closes[self.lags :]
+
+        # Solve the penalized normal equations, leaving the intercept out of
+        # the penalty by centering
+        lagged_mean = lagged.mean(axis=0)
+        centered = lagged - lagged_mean
+        self.coef = np.linalg.solve(
+            centered.T @ centered + self.alpha * np.eye(self.lags),
+            centered.T @ (target - target.mean()),
+        )
+        self.intercept = target.mean() - lagged_mean @ self.coef
+        self.last = closes[-self.lags :]
+        return self
+
+    # Predict the closes of the next steps days, feeding every prediction back
+    # as a lag of the next one
+    def predict(self, steps):
+        window = np.concatenate([self.last, np.empty(steps)])
+        for i in range(steps):
+            window[self.lags + i] = self.intercept + window[i : self.lags + i] @ self.coef
+        return window[self.lags :] * self.scale
+
+
+# Candidate models: {name: (model, parameters)}
+FORECASTERS = {
+    "AutoReg AIC": (AutoRegForecaster, {"lags": "aic"}),
+    "AutoReg BIC": (AutoRegForecaster, {"lags": "bic"}),
+    "ARIMA 1,1,1": (ARIMAForecaster, {"order": (1, 1, 1)}),
+    "Exponential Smoothing": (ExponentialSmoothingForecaster, {"damped_trend": True}),
+    "Ridge 30": (RidgeForecaster, {"lags": 30, "alpha": 1.0}),
+}
+
+##### Models End #####
+
+
+# Function to fit a candidate to the closes and predict the next steps days;
+# returns None when the model fails to fit or predicts non-finite closes
+def fit_candidate(name, history, steps):
+    model, params = FORECASTERS[name]
+    try:
+        # Convergence warnings of the candidates are expected
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            path = np.asarray(model(**params).fit(history).predict(steps), dtype=float)
+    except Exception:
+        return None
+    return path if np.isfinite(path).all() else None
+
+
+# Cache of the predictions of fitted candidates, keyed by candidate and by the
+# closes they were fit on, evicting the least recently used
+class ForecastCache:
+    def __init__(self, max_entries=FORECAST_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Return whether a candidate is cached, and its predictions
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return False, None
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+
+    # Store the predictions of a candidate
+    def put(self, key, path):
+        with self.lock:
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+# Shared cache instance
+forecast_cache = ForecastCache()
+
+
+# Function to import the models in a worker process as it starts, so no
+# selection waits for statsmodels to be imported
+def init_worker():
+    import statsmodels.tsa.ar_model  # noqa: F401
+    import statsmodels.tsa.arima.model  # noqa: F401
+    import statsmodels.tsa.holtwinters  # noqa: F401
+
+
+# Function to get the pool shared by every session, created on first use.
+# Workers are spawned rather than forked, since forking the multi-threaded app
+# server is unsafe.
+@lru_cache(maxsize=None)
+def get_forecast_pool():
+    return ProcessPoolExecutor(
+        POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker
+    )
+
+
+# Function to cache the predictions of a candidate fit in a worker process
+def cache_candidate(key, future):
+    if not future.cancelled() and future.exception() is None:
+        forecast_cache.put(key, future.result())
+
+
+# Function to fit candidates in the shared pool within a time budget; returns
+# the predictions of those that finished in time, waiting past the budget
+# for the first one that fits when none has. Candidates still fitting at the
+# end are left running and cached when they finish.
+def fit_in_pool(names, history, steps, digest, timeout):
+    pool = get_forecast_pool()
+    futures = {}
+    for name in names:
+        future = pool.submit(fit_candidate, name, history, steps)
+        future.add_done_callback(partial(cache_candidate, (name, digest, steps)))
+        futures[future] = name
+
+    paths = {}
+    done, pending = wait(futures, timeout=timeout)
+    while True:
+        for future in done:
+            if future.exception() is None:
+                paths[futures[future]] = future.result()
+        if not pending or any(path is not None for path in paths.values()):
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    # Leave the candidates not started yet to other selections
+    for future in pending:
+        future.cancel()
+    return paths
+
+
+# Function to select the model predicting the actual closes after the history
+# best: every candidate is fit on the history and scored by the mean absolute
+# percentage error of its predictions, within a time budget, in the shared
+# pool unless parallel is False; a single candidate left to fit after the
+# cache is fit in process. Candidates are not left out before one of them fits,
+# and ties go to the first in FORECASTERS. Returns the name of the best
+# model, its predictions for the actual closes and horizon days further, and
+# the error of every candidate; the name is None when no candidate fit.
+def select_forecast(history, actual, horizon=FORECAST_DAYS, budget=SELECTION_BUDGET, parallel=True):
+    start = time.perf_counter()
+    history = np.asarray(history, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    steps = len(actual) + horizon
+
+    # Reuse the candidates already fit on the same closes
+    digest = hashlib.sha1(history.tobytes()).hexdigest()
+    paths = {}
+    pending = []
+    for name in FORECASTERS:
+        found, path = forecast_cache.get((name, digest, steps))
+        if found:
+            paths[name] = path
+        else:
+            pending.append(name)
+    increment("stockplay_cache_hits_total", len(paths), cache="forecasts")
+    increment("stockplay_cache_misses_total", len(pending), cache="forecasts")
+
+    # Fit the other candidates
+    if parallel and len(pending) > 1:
+        try:
+            paths.update(fit_in_pool(pending, history, steps, digest, max(budget - (time.perf_counter() - start), 0)))
+            pending = []
+        except BrokenProcessPool:
+            # Replace the broken pool for the next selections, and fit serially
+            get_forecast_pool.cache_clear()
+    for name in pending:
+        if time.perf_counter() - start > budget and any(path is not None for path in paths.values()):
+            break
+        with span("forecast.fit", model=name):
+            paths[name] = fit_candidate(name, history, steps)
+        forecast_cache.put((name, digest, steps), paths[name])
+
+    # Score the candidates on the actual closes, in the order of FORECASTERS
+    errors = {
+        name: mean_absolute_percentage_error(actual, paths[name][: len(actual)])
+        for name in FORECASTERS
+        if paths.get(name) is not None
+    }
+    if not errors:
+        return None, None, errors
+    best = min(errors, key=errors.get)
+    return best, paths[best], errors
@@ -0,0 +1,276 @@
+# Imports
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+
+from tickers import batch_bad_tickers, is_known_bad, mark_bad
+
+# Fields shown for a stock, grouped by section: {section: {info key: label}}
+STOCK_INFO_FIELDS = {
+    "Basic Information": {
+        "symbol": "Symbol",
+        "longName": "Issuer Name",
+        "currency": "Currency",
+        "exchange": "Exchange",
+    },
+    "Market Data": {
+        "currentPrice": "Current Price",
+        "previousClose": "Previous Close",
+        "open": "Open",
+        "dayLow": "Day Low",
+        "dayHigh": "Day High",
+        "regularMarketPreviousClose": "Regular Market Previous Close",
+        "regularMarketOpen": "Regular Market Open",
+        "regularMarketDayLow": "Regular Market Day Low",
+        "regularMarketDayHigh": "Regular Market Day High",
+        "fiftyTwoWeekLow": "Fifty-Two Week Low",
+        "fiftyTwoWeekHigh": "Fifty-Two Week High",
+        "fiftyDayAverage": "Fifty-Day Average",
+        "twoHundredDayAverage": "Two-Hundred-Day Average",
+    },
+    "Volume and Shares": {
+        "volume": "Volume",
+        "regularMarketVolume": "Regular Market Volume",
+        "averageVolume": "Average Volume",
+        "averageVolume10days": "Average Volume (10 Days)",
+        "averageDailyVolume10Day": "Average Daily Volume (10 Day)",
+        "sharesOutstanding": "Shares Outstanding",
+        "impliedSharesOutstanding": "Implied Shares Outstanding",
+        "floatShares": "Float Shares",
+    },
+    "Dividends and Yield": {
+        "dividendRate": "Dividend Rate",
+        "dividendYield": "Dividend Yield",
+        "payoutRatio": "Payout Ratio",
+    },
+    "Valuation and Ratios": {
+        "marketCap": "Market Cap",
+        "enterpriseValue": "Enterprise Value",
+        "priceToBook": "Price to Book",
+        "debtToEquity": "Debt to Equity",
+        "grossMargins": "Gross Margins",
+        "profitMargins": "Profit Margins",
+    },
+    "Financial Performance": {
+        "totalRevenue": "Total Revenue",
+        "revenuePerShare": "Revenue Per Share",
+        "totalCash": "Total Cash",
+        "totalCashPerShare": "Total Cash Per Share",
+        "totalDebt": "Total Debt",
+        "earningsGrowth": "Earnings Growth",
+        "revenueGrowth": "Revenue Growth",
+        "returnOnAssets": "Return on Assets",
+        "returnOnEquity": "Return on Equity",
+    },
+    "Cash Flow": {
+        "freeCashflow": "Free Cash Flow",
+        "operatingCashflow": "Operating Cash Flow",
+    },
+    "Analyst Targets": {
+        "targetHighPrice": "Target High Price",
+        "targetLowPrice": "Target Low Price",
+        "targetMeanPrice": "Target Mean Price",
+        "targetMedianPrice": "Target Median Price",
+    },
+}
+
+
+# Fields that move with the market during the day, refreshed from the fast
+# info (derived from the price chart) rather than the full info: {info key:
+# fast info attribute}
+FAST_INFO_FIELDS = {
+    "currentPrice": "last_price",
+    "previousClose": "previous_close",
+    "open": "open",
+    "dayLow": "day_low",
+    "dayHigh": "day_high",
+    "regularMarketPreviousClose": "regular_market_previous_close",
+    "regularMarketOpen": "open",
+    "regularMarketDayLow": "day_low",
+    "regularMarketDayHigh": "day_high",
+    "fiftyTwoWeekLow": "year_low",
+    "fiftyTwoWeekHigh": "year_high",
+    "fiftyDayAverage": "fifty_day_average",
+    "twoHundredDayAverage": "two_hundred_day_average",
+    "volume": "last_volume",
+    "regularMarketVolume": "last_volume",
+    "averageVolume": "three_month_average_volume",
+    "averageVolume10days": "ten_day_average_volume",
+    "averageDailyVolume10Day": "ten_day_average_volume",
+    "marketCap": "market_cap",
+}
+
+# Flat list of every field, and the subset refreshed on the short TTL
+ALL_FIELDS = [key for fields in STOCK_INFO_FIELDS.values() for key in fields]
+PRICE_FIELDS = set(FAST_INFO_FIELDS)
+
+# Seconds before price fields and slow-moving fields are fetched again
+PRICE_TTL = 5 * 60
+FUNDAMENTALS_TTL = 24 * 60 * 60
+
+# Number of entries (one per ticker for the fundamentals and one for the
+# price fields) kept by the fundamentals cache
+FUNDAMENTALS_CACHE_ENTRIES = 20_000
+
+# Number of concurrent Yahoo Finance requests
+MAX_WORKERS = 8
+
+
+# Thread-safe in-process cache of flattened fundamentals per key, shared by
+# every session of the app and evicting the least recently used. Concurrent
+# misses of a key wait for a single fetch, through a lock kept only while
+# some session is fetching or waiting for the key: {key: [lock, sessions]}
+class FundamentalsCache:
+    def __init__(self, max_entries=FUNDAMENTALS_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.fetch_locks = {}
+        self.lock = threading.Lock()
+
+    # Return the cached fields of a key if they are younger than ttl
+    def get(self, key, ttl):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        if entry is None or time.time() - entry[0] > ttl:
+            return None
+        return entry[1]
+
+    # Store the fields of a key
+    def put(self, key, info):
+        with self.lock:
+            self.entries[key] = (time.time(), info)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # Return the cached fields of a key, fetching them once when missing or
+    # older than ttl
+    def get_or_fetch(self, key, ttl, fetch):
+        info = self.get(key, ttl)
+        if info is not None:
+            return info
+
+        with self.lock:
+            fetch_lock = self.fetch_locks.setdefault(key, [threading.Lock(), 0])
+            fetch_lock[1] += 1
+        try:
+            with fetch_lock[0]:
+                # Another session may have fetched them meanwhile
+                info = self.get(key, ttl)
+                if info is None:
+                    info = fetch()
+                    self.put(key, info)
+        finally:
+            # Drop the lock once no session needs it, whether the fetch
+            # succeeded or failed
+            with self.lock:
+                fetch_lock[1] -= 1
+                if not fetch_lock[1]:
+                    del self.fetch_locks[key]
+        return info
+
+
+# Shared cache instance
+fundamentals_cache = FundamentalsCache()
+
+
+# Function to fetch the flattened fundamentals of a ticker from Yahoo Finance
+def fetch_info(ticker):
+    # Never query symbols already known to have no data
+    if is_known_bad(ticker):
+        raise ValueError(f"No data for {ticker}")
+
+    # Pull the full info of the stock
+    info = yf.Ticker(ticker).info
+
+    # Remember symbols Yahoo Finance does not know
+    if not info.get("longName") and not info.get("shortName"):
+        mark_bad(ticker)
+        raise ValueError(f"No data for {ticker}")
+
+    # Keep only the fields the app uses; missing fields are None. The price
+    # fields come along, so they are cached too.
+    info = {key: info.get(key) for key in ALL_FIELDS}
+    fundamentals_cache.put((ticker, "prices"), {key: info[key] for key in PRICE_FIELDS})
+    return info
+
+
+# Function to fetch the price fields of a ticker from the fast info of Yahoo
+# Finance, which is derived from the price chart
+def fetch_prices(ticker):
+    # Never query symbols already known to have no data
+    if is_known_bad(ticker):
+        raise ValueError(f"No data for {ticker}")
+
+    # Read every field, leaving those the chart cannot give as None
+    fast_info = yf.Ticker(ticker).fast_info
+    prices = {}
+    for key, attribute in FAST_INFO_FIELDS.items():
+        try:
+            prices[key] = getattr(fast_info, attribute)
+        except Exception:
+            prices[key] = None
+    return prices
+
+
+# Function to get the fundamentals of a ticker. The slow-moving fields and the
+# price fields are cached apart, each fetched only when its cached copy is
+# older than its TTL.
+def get_fundamentals(ticker, fields=None):
+    fields = ALL_FIELDS if fields is None else fields
+
+    # Serve from the cache while fresh
+    info = {}
+    if set(fields) - PRICE_FIELDS:
+        info.update(fundamentals_cache.get_or_fetch((ticker, "fundamentals"), FUNDAMENTALS_TTL, lambda: fetch_info(ticker)))
+    if PRICE_FIELDS.intersection(fields):
+        info.update(fundamentals_cache.get_or_fetch((ticker, "prices"), PRICE_TTL, lambda: fetch_prices(ticker)))
+
+    # Return the requested fields
+    return {key: info[key] for key in fields}
+
+
+# Function to get fundamentals without failing the whole batch
+def try_get_fundamentals(ticker, fields=None):
+    try:
+        return get_fundamentals(ticker, fields)
+    except Exception:
+        return None
+
+
+# Function to fetch the fundamentals of many tickers as a tidy table with one
+# row per ticker and one column per field (failed tickers are all NaN)
+def fetch_fundamentals(tickers, fields=None, max_workers=MAX_WORKERS):
+    fields = ALL_FIELDS if fields is None else list(fields)
+    tickers = list(dict.fromkeys(tickers))
+
+    # Fetch the tickers with bounded parallelism, recording the bad ones once
+    with batch_bad_tickers(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda t: try_get_fundamentals(t, fields), tickers))
+
+    # Return the table
+    return pd.DataFrame(
+        [result or {} for result in results], index=pd.Index(tickers, name="ticker"), columns=fields
+    )
+
+
+# Function to fetch the stock info
+def fetch_stock_info(stock_ticker):
+    # Fetch the fundamentals through the shared cache
+    info = get_fundamentals(stock_ticker)
+
+    # Group the fields by section, using "N/A" for missing values
+    stock_data_info = {
+        section: {key: "N/A" if info[key] is None else info[key] for key in fields}
+        for section, fields in STOCK_INFO_FIELDS.items()
+    }
+
+    # Return the stock data
+    return stock_data_info
@@ -1,214 +1,42 @@
 # Imports
-import datetime as dt
-import os
-from pathlib import Path
-
-import yfinance as yf
-#import xgboost as xgb
-import pandas as pd
-import numpy as np
-import datetime as dt
-from sklearn.metrics import r2_score, mean_absolute_percentage_error
-
-# Import pandas
-import pandas as pd
-
-# Import yfinance
-import yfinance as yf
-
-# Import the required libraries
-from statsmodels.tsa.ar_model import AutoReg
-
-# Import sccuracy metrics from sklearn
-
-from sklearn.metrics import r2_score, mean_absolute_percentage_error
-
-
-# Create function to fetch stock name and id
-def fetch_stocks():
-    # Load the data
-    df = pd.read_csv(Path.cwd() / "data" / "equity_issuers.csv")
-
-    # Filter the data
-    df = df[["Security Code", "Issuer Name"]]
-
-    # Create a dictionary
-    stock_dict = dict(zip(df["Security Code"], df["Issuer Name"]))
-
-    # Return the dictionary
-    return stock_dict
-
-
-# Create function to fetch periods and intervals
-def fetch_periods_intervals():
-    # Create dictionary for periods and intervals
-    periods = {
-        "1d": ["1m", "2m", "5m", "15m", "30m", "60m", "90m"],
-        "5d": ["1m", "2m", "5m", "15m", "30m", "60m", "90m"],
-        "1mo": ["30m", "60m", "90m", "1d"],
-        "3mo": ["1d", "5d", "1wk", "1mo"],
-        "6mo": ["1d", "5d", "1wk", "1mo"],
-        "1y": ["1d", "5d", "1wk", "1mo"],
-        "2y": ["1d", "5d", "1wk", "1mo"],
-        "5y": ["1d", "5d", "1wk", "1mo"],
-        "10y": ["1d", "5d", "1wk", "1mo"],
-        "max": ["1d", "5d", "1wk", "1mo"],
-    }
-
-    # Return the dictionary
-    return periods
-
-
-# Function to fetch the stock info
-def fetch_stock_info(stock_ticker):
-    # Pull the data for the first security
-    stock_data = yf.Ticker(stock_ticker)
-
-    # Extract full of the stock
-    stock_data_info = stock_data.info
-
-    # Function to safely get value from dictionary or return "N/A"
-    def safe_get(data_dict, key):
-        return data_dict.get(key, "N/A")
-
-    # Extract only the important information
-    stock_data_info = {
-        "Basic Information": {
-            "symbol": safe_get(stock_data_info, "symbol"),
-            "longName": safe_get(stock_data_info, "longName"),
-            "currency": safe_get(stock_data_info, "currency"),
-            "exchange": safe_get(stock_data_info, "exchange"),
-        },
-        "Market Data": {
-            "currentPrice": safe_get(stock_data_info, "currentPrice"),
-            "previousClose": safe_get(stock_data_info, "previousClose"),
-            "open": safe_get(stock_data_info, "open"),
-            "dayLow": safe_get(stock_data_info, "dayLow"),
-            "dayHigh": safe_get(stock_data_info, "dayHigh"),
-            "regularMarketPreviousClose": safe_get(
-                stock_data_info, "regularMarketPreviousClose"
-            ),
-            "regularMarketOpen": safe_get(stock_data_info, "regularMarketOpen"),
-            "regularMarketDayLow": safe_get(stock_data_info, "regularMarketDayLow"),
-            "regularMarketDayHigh": safe_get(stock_data_info, "regularMarketDayHigh"),
-            "fiftyTwoWeekLow": safe_get(stock_data_info, "fiftyTwoWeekLow"),
-            "fiftyTwoWeekHigh": safe_get(stock_data_info, "fiftyTwoWeekHigh"),
-            "fiftyDayAverage": safe_get(stock_data_info, "fiftyDayAverage"),
-            "twoHundredDayAverage": safe_get(stock_data_info, "twoHundredDayAverage"),
-        },
-        "Volume and Shares": {
-            "volume": safe_get(stock_data_info, "volume"),
-            "regularMarketVolume": safe_get(stock_data_info, "regularMarketVolume"),
-            "averageVolume": safe_get(stock_data_info, "averageVolume"),
-            "averageVolume10days": safe_get(stock_data_info, "averageVolume10days"),
-            "averageDailyVolume10Day": safe_get(
-                stock_data_info, "averageDailyVolume10Day"
-            ),
-            "sharesOutstanding": safe_get(stock_data_info, "sharesOutstanding"),
-            "impliedSharesOutstanding": safe_get(
-                stock_data_info, "impliedSharesOutstanding"
-            ),
-            "floatShares": safe_get(stock_data_info, "floatShares"),
-        },
-        "Dividends and Yield": {
-            "dividendRate": safe_get(stock_data_info, "dividendRate"),
-            "dividendYield": safe_get(stock_data_info, "dividendYield"),
-            "payoutRatio": safe_get(stock_data_info, "payoutRatio"),
-        },
-        "Valuation and Ratios": {
-            "marketCap": safe_get(stock_data_info, "marketCap"),
-            "enterpriseValue": safe_get(stock_data_info, "enterpriseValue"),
-            "priceToBook": safe_get(stock_data_info, "priceToBook"),
-            "debtToEquity": safe_get(stock_data_info, "debtToEquity"),
-            "grossMargins": safe_get(stock_data_info, "grossMargins"),
-            "profitMargins": safe_get(stock_data_info, "profitMargins"),
-        },
-        "Financial Performance": {
-            "totalRevenue": safe_get(stock_data_info, "totalRevenue"),
-            "revenuePerShare": safe_get(stock_data_info, "revenuePerShare"),
-            "totalCash": safe_get(stock_data_info, "totalCash"),
-            "totalCashPerShare": safe_get(stock_data_info, "totalCashPerShare"),
-            "totalDebt": safe_get(stock_data_info, "totalDebt"),
-            "earningsGrowth": safe_get(stock_data_info, "earningsGrowth"),
-            "revenueGrowth": safe_get(stock_data_info, "revenueGrowth"),
-            "returnOnAssets": safe_get(stock_data_info, "returnOnAssets"),
-            "returnOnEquity": safe_get(stock_data_info, "returnOnEquity"),
-        },
-        "Cash Flow": {
-            "freeCashflow": safe_get(stock_data_info, "freeCashflow"),
-            "operatingCashflow": safe_get(stock_data_info, "operatingCashflow"),
-        },
-        "Analyst Targets": {
-            "targetHighPrice": safe_get(stock_data_info, "targetHighPrice"),
-            "targetLowPrice": safe_get(stock_data_info, "targetLowPrice"),
-            "targetMeanPrice": safe_get(stock_data_info, "targetMeanPrice"),
-            "targetMedianPrice": safe_get(stock_data_info, "targetMedianPrice"),
-        },
-    }
-
-    # Return the stock data
-    return stock_data_info
-
-
-
-
-
-# Function to fetch the stock history
-def fetch_stock_history(stock_ticker, period, interval):
-    # Pull the data for the first security
-    stock_data = yf.Ticker(stock_ticker)
-
-    # Extract full of the stock
-    stock_data_history = stock_data.history(period=period, interval=interval)[
-        ["Open", "High", "Low", "Close"]
-    ]
-
-    # Return the stock data
-    return stock_data_history
-
-# Function to generate the stock prediction
-def generate_stock_prediction(stock_ticker):
-    # Try to generate the predictions
-    try:
-        # Pull the data for the first security
-        stock_data = yf.Ticker(stock_ticker)
-
-        # Extract the data for last 1yr with 1d interval
-        stock_data_hist = stock_data.history(period="2y", interval="1d")
-
-        # Clean the data for to keep only the required columns
-        stock_data_close = stock_data_hist[["Close"]]
-
-        # Change frequency to day
-        stock_data_close = stock_data_close.asfreq("D", method="ffill")
-
-        # Fill missing values
-        stock_data_close = stock_data_close.ffill()
-
-        # Define training and testing area
-        train_df = stock_data_close.iloc[: int(len(stock_data_close) * 0.9) + 1]  # 90%
-        test_df = stock_data_close.iloc[int(len(stock_data_close) * 0.9) :]  # 10%
-
-        # Define training model
-        model = AutoReg(train_df["Close"], 100).fit(cov_type="HC0")
-
-        # Predict data for test data
-        predictions = model.predict(
-            start=test_df.index[0], end=test_df.index[-1], dynamic=True
-        )
-
-        # Predict 90 days into the future
-        forecast = model.predict(
-            start=test_df.index[0],
-            end=test_df.index[-1] + dt.timedelta(days=90),
-            dynamic=True,
-        )
-        r2=r2_score(test_df, predictions)
-        MAPE = mean_absolute_percentage_error(test_df, predictions)
-		# Return the required data
-        return train_df, test_df, forecast, predictions, r2, MAPE
-
-    # If error occurs
-    except:
-        # Return None
-        return None, None, None, None, None, None
+import importlib
+import time
+
+from metrics import timed
+
+# Module providing each helper; a module is only imported the first time one
+# of its helpers is used, so pages only pay for the services they use
+SERVICES = {
+    "fetch_stocks": "tickers",
+    "resolve_ticker": "tickers",
+    "STOCK_INFO_FIELDS": "fundamentals",
+    "fetch_stock_info": "fundamentals",
+    "fetch_periods_intervals": "history",
+    "fetch_stock_history": "history",
+    "generate_stock_prediction": "prediction",
+    "POLL_INTERVAL": "quotes",
+    "fetch_quote": "quotes",
+}
+
+# Helpers exported by "from helper import *"
+__all__ = list(SERVICES)
+
+# Seconds spent importing each service module, in import order
+import_times = {}
+
+
+# Function to import a service module, recording how long the import took
+def load_service(module):
+    start = time.perf_counter()
+    service = importlib.import_module(module)
+    import_times.setdefault(module, time.perf_counter() - start)
+    return service
+
+
+# Function to resolve a helper on first access; functions are timed as
+# helper.<name> spans when metrics are enabled
+def __getattr__(name):
+    if name not in SERVICES:
+        raise AttributeError(f"module 'helper' has no attribute '{name}'")
+    value = getattr(load_service(SERVICES[name]), name)
+    return timed(value, name=f"helper.{name}") if callable(value) else value
@@ -0,0 +1,57 @@
+# Imports
+import pandas as pd
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError
+
+from tickers import is_known_bad, mark_bad
+
+
+# Create function to fetch periods and intervals
+def fetch_periods_intervals():
+    # Create dictionary for periods and intervals
+    periods = {
+        "1d": ["1m", "2m", "5m", "15m", "30m", "60m", "90m"],
+        "5d": ["1m", "2m", "5m", "15m", "30m", "60m", "90m"],
+        "1mo": ["30m", "60m", "90m", "1d"],
+        "3mo": ["1d", "5d", "1wk", "1mo"],
+        "6mo": ["1d", "5d", "1wk", "1mo"],
+        "1y": ["1d", "5d", "1wk", "1mo"],
+        "2y": ["1d", "5d", "1wk", "1mo"],
+        "5y": ["1d", "5d", "1wk", "1mo"],
+        "10y": ["1d", "5d", "1wk", "1mo"],
+        "max": ["1d", "5d", "1wk", "1mo"],
+    }
+
+    # Return the dictionary
+    return periods
+
+
+# Function to fetch the stock history
+def fetch_stock_history(stock_ticker, period, interval):
+    # Skip symbols already known to have no data
+    if is_known_bad(stock_ticker):
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close"])
+
+    # Pull the data for the first security
+    stock_data = yf.Ticker(stock_ticker)
+
+    # Extract full of the stock
+    try:
+        stock_data_history = stock_data.history(
+            period=period, interval=interval, raise_errors=True
+        )[["Open", "High", "Low", "Close"]]
+
+    # Remember symbols Yahoo Finance itself says it has no prices for. A
+    # missing timezone or price response without Yahoo's reason is also what
+    # a network failure looks like, so it does not blame the symbol.
+    except YFPricesMissingError as e:
+        if e.yahoo_reason is not None:
+            mark_bad(stock_ticker)
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close"])
+
+    # Any other failure returns no data without blaming the symbol
+    except Exception:
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close"])
+
+    # Return the stock data
+    return stock_data_history
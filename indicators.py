@@ -0,0 +1,616 @@
+# Imports
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Number of series kept by the incremental indicator cache
+INDICATOR_CACHE_ENTRIES = 256
+
+# Bars a live stream starts from: the longest window is 50 bars and the
+# slowest average forgets a bar within a few hundred, so older bars do not
+# change the live values
+LIVE_SEED_BARS = 500
+
+# Number of series kept by the live streams
+LIVE_STREAM_ENTRIES = 256
+
+# Last bars of a cached series compared with a new call to check that the
+# series only gained bars; an adjustment for a split or a dividend changes
+# every close, so it shows in these too
+TAIL_CHECK_BARS = 50
+
+# Fields the indicators read
+INDICATOR_FIELDS = ["Open", "High", "Low", "Close"]
+
+
+##### Primitives #####
+
+# Every primitive works on 2d arrays of bars x tickers, so one call computes a
+# single ticker (one column) or a whole wide frame of the price store at once
+
+
+# Function to forward-fill the gaps of every column
+def ffill(x):
+    positions = np.where(np.isfinite(x), np.arange(len(x))[:, None], 0)
+    np.maximum.accumulate(positions, axis=0, out=positions)
+    return x[positions, np.arange(x.shape[1])]
+
+
+# Function to get the previous value of an output column (None when starting)
+def last(prev, key):
+    return None if prev is None else prev[key]
+
+
+# Function to compute an exponential moving average with smoothing factor
+# alpha, as one linear filter over every column. The average continues from
+# prev (its value at the bar before x) when given, otherwise it is seeded with
+# the first value like pandas' ewm(adjust=False); gaps are forward-filled.
+def ema(x, alpha, prev=None):
+    from scipy.signal import lfilter
+
+    if not len(x):
+        return x
+    x = ffill(x)
+    valid = np.isfinite(x)
+    first = x[valid.argmax(axis=0), np.arange(x.shape[1])]
+    seed = first if prev is None else np.where(np.isfinite(prev), prev, first)
+
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t - 1], starting from the seed
+    y = lfilter([alpha], [1, alpha - 1], np.where(valid, x, seed), axis=0, zi=((1 - alpha) * seed)[None, :])[0]
+
+    # Keep the bars before the first value empty
+    started = np.logical_or.accumulate(valid, axis=0)
+    if prev is not None:
+        started |= np.isfinite(prev)
+    y[~started] = np.nan
+    return y
+
+
+# Function to compute the mean over a trailing window of n bars from cumulative
+# sums; windows with missing bars are empty
+def rolling_mean(x, n):
+    valid = np.isfinite(x)
+    sums = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[n:] = sums[n:] - sums[:-n]
+    counts[n:] = counts[n:] - counts[:-n]
+    with np.errstate(invalid="ignore"):
+        return np.where(counts == n, sums / n, np.nan)
+
+
+##### Primitives End #####
+
+
+##### Indicators #####
+
+# Every indicator takes the fields as 2d arrays, the last row of its previous
+# outputs (None for a full computation) and the number of leading lookback
+# bars, which only feed its windows; it returns its output columns for the
+# bars after the lookback. Columns starting with "_" hold recurrence state.
+
+
+# Simple moving average of the close
+def sma(fields, prev, skip, n):
+    return {"": rolling_mean(fields["Close"], n)[skip:]}
+
+
+# Exponential moving average of the close
+def exponential_ma(fields, prev, skip, n):
+    return {"": ema(fields["Close"][skip:], 2 / (n + 1), last(prev, ""))}
+
+
+# Bollinger bands: moving average of the close and k standard deviations
+# around it (the close is centered on its last value to keep the sums of
+# squares precise)
+def bollinger(fields, prev, skip, n, k):
+    close = fields["Close"]
+    center = ffill(close)[-1]
+    mean = rolling_mean(close - center, n)
+    std = np.sqrt(np.clip(rolling_mean((close - center) ** 2, n) - mean**2, 0, None))
+    mean = mean + center
+    return {
+        "Upper": (mean + k * std)[skip:],
+        "Middle": mean[skip:],
+        "Lower": (mean - k * std)[skip:],
+    }
+
+
+# Relative strength index with Wilder's smoothing of the gains and losses
+def rsi(fields, prev, skip, n):
+    change = np.diff(fields["Close"], axis=0, prepend=np.nan)[skip:]
+    gain = ema(np.maximum(change, 0), 1 / n, last(prev, "_gain"))
+    loss = ema(np.maximum(-change, 0), 1 / n, last(prev, "_loss"))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {"": 100 * gain / (gain + loss), "_gain": gain, "_loss": loss}
+
+
+# Moving average convergence divergence, its signal line and histogram
+def macd(fields, prev, skip, fast, slow, signal):
+    close = fields["Close"][skip:]
+    fast_ema = ema(close, 2 / (fast + 1), last(prev, "_fast"))
+    slow_ema = ema(close, 2 / (slow + 1), last(prev, "_slow"))
+    line = fast_ema - slow_ema
+    signal_line = ema(line, 2 / (signal + 1), last(prev, "Signal"))
+    return {"": line, "Signal": signal_line, "Hist": line - signal_line, "_fast": fast_ema, "_slow": slow_ema}
+
+
+# Average true range with Wilder's smoothing
+def atr(fields, prev, skip, n):
+    high, low, close = fields["High"], fields["Low"], fields["Close"]
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return {"": ema(true_range[skip:], 1 / n, last(prev, ""))}
+
+
+# Available indicators: {name: (function, parameters, lookback bars, drawn
+# over the price)}
+INDICATORS = {
+    "SMA 20": (sma, dict(n=20), 19, True),
+    "SMA 50": (sma, dict(n=50), 49, True),
+    "EMA 20": (exponential_ma, dict(n=20), 0, True),
+    "Bollinger 20": (bollinger, dict(n=20, k=2), 19, True),
+    "RSI 14": (rsi, dict(n=14), 1, False),
+    "MACD 12/26/9": (macd, dict(fast=12, slow=26, signal=9), 0, False),
+    "ATR 14": (atr, dict(n=14), 1, False),
+}
+
+##### Indicators End #####
+
+
+# Function to compute one indicator from bar start on, continuing from its
+# outputs for the earlier bars. The new bars are written into the output
+# arrays in place, which are grown by doubling when full, so an append only
+# copies the outputs once in a while; returns the output arrays, of which the
+# first start + new bars rows are valid.
+def extend_indicator(name, fields, outputs=None, start=0):
+    function, params, lookback, _ = INDICATORS[name]
+    begin = max(start - lookback, 0)
+    prev = None if start == 0 else {key: values[start - 1] for key, values in outputs.items()}
+
+    # Compute the new bars, with the lookback bars feeding the windows
+    new = function({field: values[begin:] for field, values in fields.items()}, prev, start - begin, **params)
+    if start == 0:
+        return new
+
+    # Write them after the earlier bars
+    bars = start + len(next(iter(new.values())))
+    for key, values in new.items():
+        if len(outputs[key]) < bars:
+            grown = np.empty((max(bars, 2 * len(outputs[key])), values.shape[1]))
+            grown[:start] = outputs[key][:start]
+            outputs[key] = grown
+        outputs[key][start:bars] = values
+    return outputs
+
+
+# Function to get the column name of an indicator output
+def column_name(name, key):
+    return f"{name} {key}" if key else name
+
+
+# Function to list the output columns of an indicator in a frame
+def indicator_columns(frame, name):
+    return [column for column in frame.columns if column == name or column.startswith(f"{name} ")]
+
+
+# Cache of computed indicators per series, extended incrementally: when the
+# bars of a series only gained new bars at the end, only those are computed
+# (plus the last cached bar, which may have been a partial day). The check
+# and the computation only read the last bars, so their cost does not grow
+# with the history; building the frames of the results still does.
+class IndicatorCache:
+    def __init__(self, max_entries=INDICATOR_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Return the first bar of a series not computed yet: the last cached bar
+    # when the series starts like the cached one and ends with the same bars,
+    # otherwise 0
+    @staticmethod
+    def first_new_bar(entry, index, fields):
+        if entry["index"] is None:
+            return 0
+        seen = len(entry["index"]) - 1
+        tail = slice(max(seen - TAIL_CHECK_BARS, 0), seen)
+        if (
+            seen > 0
+            and len(index) >= seen
+            and index[0] == entry["index"][0]
+            and index[tail].equals(entry["index"][tail])
+            and all(
+                np.array_equal(values[tail], entry["fields"][field][tail], equal_nan=True)
+                for field, values in fields.items()
+            )
+        ):
+            return seen
+        return 0
+
+    # Return the outputs {name: {key: 2d array}} of the indicators over the
+    # fields of a series
+    def compute(self, key, index, fields, names):
+        # Get the entry of the series; it is computed under a lock of its own,
+        # so sessions showing other series do not wait on each other
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = {"lock": threading.Lock(), "index": None, "fields": None, "outputs": {}, "bars": {}}
+                self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        with entry["lock"]:
+            start = self.first_new_bar(entry, index, fields)
+            if start == 0:
+                entry["outputs"], entry["bars"] = {}, {}
+
+            # Compute the new bars of the cached indicators (those left out of
+            # the last calls may lag further behind), and the added indicators
+            # over every bar
+            outputs = {}
+            for name in names:
+                cached = entry["outputs"].get(name)
+                if cached is None:
+                    entry["outputs"][name] = extend_indicator(name, fields)
+                else:
+                    extend_indicator(name, fields, cached, min(start, entry["bars"][name] - 1))
+                entry["bars"][name] = len(index)
+                outputs[name] = {output: values[: len(index)] for output, values in entry["outputs"][name].items()}
+
+            # Remember the bars of the series
+            entry["index"], entry["fields"] = index, fields
+
+        return outputs
+
+
+# Shared cache instance
+indicator_cache = IndicatorCache()
+
+
+# Function to convert frames to the 2d field arrays the indicators read
+def field_arrays(frames):
+    return {field: frames[field].to_numpy(dtype=float).reshape(len(frames[field]), -1) for field in INDICATOR_FIELDS}
+
+
+# Function to compute indicators over the OHLC bars of one ticker, e.g.
+# compute_indicators(fetch_stock_history("TCS.NS", "1y", "1d"), ["RSI 14"]);
+# returns one column per output. With a key, the results are cached and
+# later calls with more bars only compute the new ones.
+def compute_indicators(bars, names, key=None):
+    fields = field_arrays(bars)
+    if key is None:
+        outputs = {name: extend_indicator(name, fields) for name in names}
+    else:
+        outputs = indicator_cache.compute(key, bars.index, fields, names)
+
+    return pd.DataFrame(
+        {
+            column_name(name, output): values[:, 0]
+            for name in names
+            for output, values in outputs[name].items()
+            if not output.startswith("_")
+        },
+        index=bars.index,
+    )
+
+
+# Function to compute indicators for many tickers at once over wide frames
+# (dates x tickers) of every field; returns {column: wide frame}
+def batch_indicators(frames, names, key=None):
+    close = frames["Close"]
+    frames = {field: frames[field].reindex(index=close.index, columns=close.columns) for field in INDICATOR_FIELDS}
+    fields = field_arrays(frames)
+    if key is None:
+        outputs = {name: extend_indicator(name, fields) for name in names}
+    else:
+        outputs = indicator_cache.compute(key, close.index, fields, names)
+
+    return {
+        column_name(name, output): pd.DataFrame(values, index=close.index, columns=close.columns)
+        for name in names
+        for output, values in outputs[name].items()
+        if not output.startswith("_")
+    }
+
+
+# Function to compute indicators for every ticker of the price store, updated
+# incrementally as the store gains new daily bars
+def store_indicators(names):
+    from price_store import get_price_store
+
+    store = get_price_store()
+    return batch_indicators({field: store.load(field) for field in INDICATOR_FIELDS}, names, key="price_store")
+
+
+##### Streaming #####
+
+# Streaming counterparts of the indicators: each updates its state for one
+# new bar of every ticker (1d arrays) in O(1) work per ticker and returns its
+# outputs for that bar. The state is a flat dict of arrays, so it can be
+# copied, restored and saved as is; steps replace its arrays instead of
+# modifying them, except for the rows of the ring buffers.
+
+
+# Function to get an array of the state, creating it when missing
+def state_array(state, key, width, fill=np.nan):
+    if key not in state:
+        state[key] = np.full(width, fill)
+    return state[key]
+
+
+# Function to update an exponential moving average with one bar, with the
+# same forward-filling and seeding as ema
+def ema_step(state, key, x, alpha):
+    x = np.where(np.isfinite(x), x, state_array(state, f"{key}/input", len(x)))
+    prev = state_array(state, key, len(x))
+    state[f"{key}/input"] = x
+    state[key] = np.where(np.isfinite(prev), alpha * x + (1 - alpha) * prev, x)
+    return state[key]
+
+
+# Function to push one bar into a ring buffer of the last n bars, keeping
+# running sums of the values and of their squares. The sums are recomputed
+# from the buffer every time it wraps around, so rounding errors cannot build
+# up over long streams.
+def ring_push(state, key, x, n):
+    values = state.get(f"{key}/values")
+    if values is None:
+        values = state[f"{key}/values"] = np.full((n, len(x)), np.nan)
+        state[f"{key}/pos"] = np.zeros(1, dtype=int)
+        state[f"{key}/sum"] = state[f"{key}/sum_sq"] = state[f"{key}/count"] = np.zeros(len(x))
+
+    # Swap the oldest bar for the new one, keeping the old row to undo it
+    pos = int(state[f"{key}/pos"][0])
+    old = values[pos].copy()
+    ok, ok_old = np.isfinite(x), np.isfinite(old)
+    state[f"{key}/sum"] = state[f"{key}/sum"] + np.where(ok, x, 0.0) - np.where(ok_old, old, 0.0)
+    state[f"{key}/sum_sq"] = state[f"{key}/sum_sq"] + np.where(ok, x * x, 0.0) - np.where(ok_old, old * old, 0.0)
+    state[f"{key}/count"] = state[f"{key}/count"] + ok - ok_old
+    state[f"{key}/last"] = old
+    values[pos] = x
+    state[f"{key}/pos"] = np.array([(pos + 1) % n])
+
+    # Recompute the sums once per turn
+    if pos == n - 1:
+        finite = np.isfinite(values)
+        state[f"{key}/sum"] = np.where(finite, values, 0.0).sum(axis=0)
+        state[f"{key}/sum_sq"] = np.where(finite, values * values, 0.0).sum(axis=0)
+
+
+# Function to get the mean and the standard deviation of the windows of a ring
+# buffer that are full
+def ring_stats(state, key, n):
+    full = state[f"{key}/count"] == n
+    mean = state[f"{key}/sum"] / n
+    std = np.sqrt(np.clip(state[f"{key}/sum_sq"] / n - mean * mean, 0, None))
+    return np.where(full, mean, np.nan), np.where(full, std, np.nan)
+
+
+# Streaming simple moving average
+def sma_step(state, name, bar, n):
+    ring_push(state, name, bar["Close"], n)
+    return {"": ring_stats(state, name, n)[0]}
+
+
+# Streaming exponential moving average
+def exponential_ma_step(state, name, bar, n):
+    return {"": ema_step(state, name, bar["Close"], 2 / (n + 1))}
+
+
+# Streaming Bollinger bands
+def bollinger_step(state, name, bar, n, k):
+    ring_push(state, name, bar["Close"], n)
+    mean, std = ring_stats(state, name, n)
+    return {"Upper": mean + k * std, "Middle": mean, "Lower": mean - k * std}
+
+
+# Streaming relative strength index
+def rsi_step(state, name, bar, n):
+    close = bar["Close"]
+    change = close - state_array(state, f"{name}/close", len(close))
+    state[f"{name}/close"] = close
+    gain = ema_step(state, f"{name}/gain", np.maximum(change, 0), 1 / n)
+    loss = ema_step(state, f"{name}/loss", np.maximum(-change, 0), 1 / n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {"": 100 * gain / (gain + loss)}
+
+
+# Streaming moving average convergence divergence
+def macd_step(state, name, bar, fast, slow, signal):
+    close = bar["Close"]
+    fast_ema = ema_step(state, f"{name}/fast", close, 2 / (fast + 1))
+    slow_ema = ema_step(state, f"{name}/slow", close, 2 / (slow + 1))
+    line = fast_ema - slow_ema
+    signal_line = ema_step(state, f"{name}/signal", line, 2 / (signal + 1))
+    return {"": line, "Signal": signal_line, "Hist": line - signal_line}
+
+
+# Streaming average true range
+def atr_step(state, name, bar, n):
+    high, low, close = bar["High"], bar["Low"], bar["Close"]
+    prev_close = state_array(state, f"{name}/close", len(close))
+    state[f"{name}/close"] = close
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return {"": ema_step(state, name, true_range, 1 / n)}
+
+
+# Streaming step of every indicator function
+STREAM_STEPS = {
+    sma: sma_step,
+    exponential_ma: exponential_ma_step,
+    bollinger: bollinger_step,
+    rsi: rsi_step,
+    macd: macd_step,
+    atr: atr_step,
+}
+
+
+# Indicators of many tickers updated bar by bar, for live updates: pushing a
+# bar costs O(1) per ticker and indicator whatever the length of the history.
+# The last bar can be replaced while it is still forming (e.g. a live 1m bar).
+class IndicatorStream:
+    def __init__(self, names, tickers):
+        self.names = list(names)
+        self.tickers = pd.Index(tickers)
+        self.state = {}
+        self.committed = None
+        self.last_date = None
+
+    # Add a bar ({field: values per ticker}); with replace, the bar replaces
+    # the last one pushed instead of following it
+    def push(self, bar, date=None, replace=False):
+        bar = {
+            field: np.asarray(
+                bar[field].reindex(self.tickers) if isinstance(bar[field], pd.Series) else bar[field], dtype=float
+            )
+            for field in INDICATOR_FIELDS
+        }
+
+        # Go back to the state before the last bar
+        if replace and self.committed is not None:
+            for key in [key for key in self.committed if key.endswith("/values")]:
+                prefix = key[: -len("/values")]
+                self.state[key][int(self.committed[f"{prefix}/pos"][0])] = self.state[f"{prefix}/last"]
+            self.state = dict(self.committed)
+        self.committed = dict(self.state)
+
+        # Update every indicator
+        for name in self.names:
+            function, params, _, _ = INDICATORS[name]
+            for output, values in STREAM_STEPS[function](self.state, name, bar, **params).items():
+                self.state[f"out:{column_name(name, output)}"] = values
+        self.last_date = date
+
+    # Return the latest value of every output per ticker
+    def latest(self):
+        return pd.DataFrame(
+            {key[len("out:") :]: values for key, values in self.state.items() if key.startswith("out:")},
+            index=self.tickers,
+        )
+
+    # Save the state, e.g. next to the price store
+    def save(self, path):
+        arrays = {f"state:{key}": value for key, value in self.state.items()}
+        arrays.update({f"committed:{key}": value for key, value in (self.committed or {}).items()})
+        np.savez(
+            path,
+            names=np.array(self.names),
+            tickers=np.array(self.tickers, dtype=str),
+            last_date=np.array(str(self.last_date)),
+            **arrays,
+        )
+
+    # Load a saved stream
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            stream = cls(data["names"].tolist(), data["tickers"].tolist())
+            stream.state = {key[len("state:") :]: data[key] for key in data.files if key.startswith("state:")}
+            committed = {key[len("committed:") :]: data[key] for key in data.files if key.startswith("committed:")}
+            stream.committed = committed or None
+            last_date = str(data["last_date"])
+
+        # Share the ring buffers between the state and the committed state
+        for key, value in stream.state.items():
+            if key.endswith("/values") and stream.committed and key in stream.committed:
+                stream.committed[key] = value
+        stream.last_date = None if last_date == "None" else pd.Timestamp(last_date)
+        return stream
+
+
+# Function to bring a stream up to date with the daily bars of the price
+# store: the last bar seen is replaced (it may have been a partial day) and
+# the later ones are pushed
+def update_stream(stream, store):
+    frames = {field: store.load(field) for field in INDICATOR_FIELDS}
+    dates = frames["Close"].index
+    if stream.last_date is not None:
+        dates = dates[dates >= stream.last_date]
+
+    for date in dates:
+        bar = {field: frame.loc[date] for field, frame in frames.items()}
+        stream.push(bar, date, replace=date == stream.last_date)
+    return stream
+
+
+# Streams of the price store, kept in memory and saved next to it
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+# Function to get the indicators of every ticker of the price store as of its
+# last daily bar, kept up to date incrementally and persisted with the store
+def store_indicator_stream(names):
+    from price_store import get_price_store
+
+    store = get_price_store()
+    names = list(names)
+    tickers = store.load("Close").columns
+    path = store.path / f"indicators_{safe_key(names)}.npz"
+
+    with _streams_lock:
+        stream = _streams.get(path)
+        if stream is None and path.exists():
+            stream = IndicatorStream.load(path)
+
+        # Start over when the set of tickers changed
+        if stream is None or not stream.tickers.equals(tickers):
+            stream = IndicatorStream(names, tickers)
+
+        update_stream(stream, store)
+        if stream.last_date is not None:
+            stream.save(path)
+        _streams[path] = stream
+
+    return stream.latest()
+
+
+# Live streams of single series: {key: stream}, least recently used first
+_live_streams = OrderedDict()
+
+
+# Function to get the indicators of one series (an OHLC frame, e.g. the 1m
+# bars of a ticker) with its last bar updated by a live price, as {column:
+# value}. The stream of the series is kept between calls: new bars of the
+# series are pushed as they come, and a live price replaces the forming last
+# bar, so an update costs O(1) whatever the length of the series.
+def live_indicators(key, bars, names, price=None):
+    names = list(names)
+    with _streams_lock:
+        # Start a stream from the last bars, unless the kept one can go on
+        # from its last bar
+        stream = _live_streams.get(key)
+        if stream is None or stream.names != names or stream.last_date not in bars.index:
+            stream = IndicatorStream(names, [key])
+            new_bars = bars.iloc[-LIVE_SEED_BARS:]
+        else:
+            new_bars = bars.loc[stream.last_date :]
+        _live_streams[key] = stream
+        _live_streams.move_to_end(key)
+        while len(_live_streams) > LIVE_STREAM_ENTRIES:
+            _live_streams.popitem(last=False)
+
+        # Push the new bars, replacing the last one seen (it may have been
+        # forming)
+        fields = new_bars[INDICATOR_FIELDS].to_numpy(dtype=float)
+        for date, values in zip(new_bars.index, fields):
+            stream.push(dict(zip(INDICATOR_FIELDS, values[:, None])), date, replace=date == stream.last_date)
+
+        # Update the forming bar with the live price
+        if price is not None and len(fields):
+            open_, high, low, _ = fields[-1]
+            bar = {"Open": open_, "High": max(high, price), "Low": min(low, price), "Close": price}
+            stream.push({field: np.array([value]) for field, value in bar.items()}, stream.last_date, replace=True)
+
+        return stream.latest().iloc[0].to_dict()
+
+
+# Function to turn indicator names into a file-name safe key
+def safe_key(names):
+    return "-".join("".join(c if c.isalnum() else "_" for c in name) for name in names)
+
+
+##### Streaming End #####
@@ -0,0 +1,242 @@
+# Imports
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from profiling import finish_profile, start_profile
+
+# Instrumentation is off unless STOCKPLAY_METRICS is set; when off, spans and
+# decorators reduce to no-ops
+METRICS_ENABLED = os.environ.get("STOCKPLAY_METRICS", "") not in ("", "0")
+
+# Prometheus text file rewritten after every rerun, e.g. for the node exporter
+# textfile collector
+METRICS_PATH = Path(os.environ.get("STOCKPLAY_METRICS_PATH", Path.cwd() / "data" / "cache" / "metrics.prom"))
+
+# Port of the optional /metrics endpoint (off when unset)
+METRICS_PORT = int(os.environ.get("STOCKPLAY_METRICS_PORT", "0"))
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Shared no-op span returned while instrumentation is off
+NULL_SPAN = nullcontext()
+
+
+# Thread-safe registry of counters and latency histograms, keyed by metric name
+# and label values
+class MetricsRegistry:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    # Add to a counter
+    def increment(self, name, labels, value=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    # Record one observation in a histogram
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    # Render every metric in the Prometheus text exposition format
+    def export(self):
+        # Label values escape backslashes, double quotes and line feeds, as
+        # the text format requires
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def label_text(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: {**h, "buckets": list(h["buckets"])} for key, h in self.histograms.items()}
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{label_text(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(BUCKETS, histogram["buckets"]):
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry instance
+registry = MetricsRegistry()
+
+# Spans recorded by the current rerun of each session thread, for the debug panel
+_local = threading.local()
+
+
+# Function to turn keyword labels into a hashable, ordered key
+def label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# Context manager timing a stage, e.g. with span("fit", model="AutoReg"): ...
+@contextmanager
+def _span(name, labels):
+    key = label_key({"span": name, **labels})
+    spans = getattr(_local, "spans", None)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as error:
+        # Streamlit's control flow (st.stop, reruns) is not a failure
+        if type(error).__module__.split(".")[0] != "streamlit":
+            registry.increment("stockplay_span_errors_total", key)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("stockplay_span_seconds", key, elapsed)
+        if spans is not None:
+            spans.append((name, labels, elapsed))
+
+
+# Function to time a stage as a context manager (a shared no-op when disabled)
+def span(name, **labels):
+    if not METRICS_ENABLED:
+        return NULL_SPAN
+    return _span(name, labels)
+
+
+# Decorator timing every call of a function as a span named after it; when
+# instrumentation is off the function is returned unchanged
+def timed(func=None, name=None):
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+# Function to add to a counter, e.g. increment("stockplay_cache_hits_total", cache="figures")
+def increment(name, value=1, **labels):
+    if METRICS_ENABLED:
+        registry.increment(name, label_key(labels), value)
+
+
+# Function to write the metrics to the text file; each thread writes its own
+# temporary file and swaps it in, so readers never see a partial file
+def write_metrics(path=METRICS_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp.write_text(registry.export())
+    tmp.replace(path)
+
+
+# Handler serving the metrics at /metrics
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.export().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Keep request logs out of the app's output
+    def log_message(self, format, *args):
+        pass
+
+
+# Function to start the /metrics endpoint once per process
+@lru_cache(maxsize=None)
+def start_metrics_server(port=METRICS_PORT):
+    server = ThreadingHTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    return server
+
+
+# Function to mark the start of a page rerun, also starting the profiler when
+# the rerun is profiled
+def start_rerun(page):
+    start_profile(page)
+    if not METRICS_ENABLED:
+        return
+
+    if METRICS_PORT:
+        start_metrics_server()
+    _local.spans = []
+    _local.page = page
+    _local.started = time.perf_counter()
+
+
+# Function to mark the end of a page rerun: writes its profile if profiled,
+# records the rerun latency, exports the metrics and shows the debug panel
+# when ?debug=metrics is in the URL
+def finish_rerun():
+    profile_path = finish_profile()
+    if profile_path is not None:
+        import streamlit as st
+
+        st.caption(f"🔥 Profile written to {profile_path}")
+
+    if not METRICS_ENABLED or getattr(_local, "spans", None) is None:
+        return
+
+    page = _local.page
+    elapsed = time.perf_counter() - _local.started
+    registry.observe("stockplay_rerun_seconds", label_key({"page": page}), elapsed)
+    registry.increment("stockplay_reruns_total", label_key({"page": page}))
+    write_metrics()
+
+    # Show the spans of this rerun
+    import streamlit as st
+
+    if st.query_params.get("debug") == "metrics":
+        with st.expander(f"⏱️ Rerun timings: {elapsed * 1000:.0f} ms"):
+            st.table(
+                [
+                    {
+                        "Stage": name,
+                        "Labels": ", ".join(f"{key}={value}" for key, value in labels.items()),
+                        "ms": round(seconds * 1000, 1),
+                    }
+                    for name, labels, seconds in _local.spans
+                ]
+            )
+    _local.spans = None
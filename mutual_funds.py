@@ -0,0 +1,170 @@
+# Imports
+import json
+import urllib.request
+
+import pandas as pd
+import streamlit as st
+from pyxirr import xirr
+
+# Horizons of the rolling CAGRs, in years
+YEARS = list(range(1, 11))
+
+
+# Function to load the scheme codes and names of every mutual fund
+@st.cache_data(ttl=3600)
+def get_scheme_codes():
+    try:
+        with open('./data/mf_codes.txt', 'r') as fp:
+            list_code = []
+            line = fp.readline()
+            while line:
+                words = line.strip().split(';')
+                if len(words) > 5:
+                    list_code.append([words[i] for i in [0, 1, 3]])
+                line = fp.readline()
+        df_codes = pd.DataFrame(list_code)
+        df_codes.columns = ['schemeCode', 'schemeISIN', 'schemeName']
+        return df_codes
+    except Exception as e:
+        st.error(f"Error loading scheme codes: {str(e)}")
+        return pd.DataFrame()
+
+
+# Function to fetch the daily NAVs of a scheme, forward-filled over holidays
+@st.cache_data(ttl=3600)
+def get_nav(scheme_code='122639'):
+    try:
+        with st.spinner('Fetching NAV data...'):
+            mf_url = f'https://api.mfapi.in/mf/{scheme_code}'
+            with urllib.request.urlopen(mf_url) as url:
+                data = json.load(url)
+            df_navs = pd.DataFrame(data['data'])
+            df_navs['date'] = pd.to_datetime(df_navs.date, format='%d-%m-%Y')
+            df_navs['nav'] = df_navs['nav'].astype(float)
+            df_navs = df_navs.sort_values(['date']).set_index(['date'])
+            df_dates = pd.DataFrame(
+                pd.date_range(start=df_navs.index.min(), end=df_navs.index.max()),
+                columns=['date']
+            ).set_index(['date'])
+            df_navs = df_navs.join(df_dates, how='outer').ffill().reset_index()
+            return df_navs
+    except Exception as e:
+        st.error(f"Error fetching NAV data: {str(e)}")
+        return pd.DataFrame()
+
+
+# Function to compute the rolling CAGR of daily NAVs over a horizon
+def get_cagr(df_navs_orig, num_years=1):
+    df_navs = df_navs_orig.copy()
+    df_navs['prev_nav'] = df_navs.nav.shift(365 * num_years)
+    df_navs = df_navs.dropna()
+    df_navs['returns'] = df_navs['nav'] / df_navs['prev_nav'] - 1
+    df_navs['cagr'] = 100 * ((1 + df_navs['returns']) ** (1 / num_years) - 1)
+    df_navs['years'] = num_years
+    return df_navs[['date', 'years', 'cagr']]
+
+
+# Function to compute the rolling CAGRs of daily NAVs over every horizon
+def get_cagrs(df_navs):
+    return pd.concat([get_cagr(df_navs, y) for y in YEARS])
+
+
+# Function to get the rolling CAGRs of a scheme over every horizon
+@st.cache_data(ttl=3600)
+def get_fund_cagrs(scheme_code):
+    return get_cagrs(get_nav(scheme_code))
+
+
+# Function to summarize the rolling CAGRs of a scheme per horizon
+@st.cache_data(ttl=3600)
+def get_cagr_stats(scheme_code):
+    df_cagrs = get_fund_cagrs(scheme_code)
+    dfx = df_cagrs[['years', 'cagr']].groupby('years').describe().reset_index()
+    dfx.columns = [[a for (a, b) in dfx.columns][0]] + [a for a in dfx.columns.droplevel()][1:]
+    return dfx
+
+
+# Function to join the NAVs and rolling CAGRs of several schemes, one column per
+# scheme; with weights, a 'combo' column holds the weighted mix of every scheme
+# after the first
+@st.cache_data(ttl=3600)
+def get_comparison(names, codes, weights=None):
+    list_navs = []
+    list_cagrs = []
+    for name, code in zip(names, codes):
+        df_nav_comp = get_nav(str(code)).set_index('date')
+        df_nav_comp = df_nav_comp.rename(columns={'nav': name})
+        list_navs.append(df_nav_comp)
+
+        df_cagrs_comp = get_fund_cagrs(str(code)).set_index(['date', 'years'])
+        df_cagrs_comp = df_cagrs_comp.rename(columns={'cagr': name})
+        list_cagrs.append(df_cagrs_comp)
+
+    df_nav_all = pd.concat(list_navs, axis=1).dropna()
+
+    if weights is not None:
+        names_comp = names[1:]
+        for name, weight in zip(names_comp, weights):
+            df_nav_all[name + '_wt'] = df_nav_all[name] * weight / 100
+        names_wt = [name + '_wt' for name in names_comp]
+        df_nav_all['combo'] = df_nav_all[names_wt].sum(axis=1)
+
+        df_nav = df_nav_all.reset_index()[['date', 'combo']]
+        df_nav.columns = ['date', 'nav']
+        df_cagrs_comp = get_cagrs(df_nav).set_index(['date', 'years'])
+        df_cagrs_comp = df_cagrs_comp.rename(columns={'cagr': 'combo'})
+        list_cagrs.append(df_cagrs_comp)
+
+    df_cagr_all = pd.concat(list_cagrs, axis=1).dropna()
+
+    return df_nav_all, df_cagr_all
+
+
+# Function to simulate a monthly SIP of a scheme stepped up 5% a year; returns
+# the XIRR and the long-format frames of the invested amount against the
+# current value, and of the normalized unit accumulation
+@st.cache_data(ttl=3600)
+def get_sip(scheme_code, start_date, end_date):
+    df_navs = get_nav(scheme_code)
+
+    df_dates = pd.DataFrame(pd.date_range(start=start_date, end=end_date, freq='ME'))
+    df_dates.columns = ['date']
+
+    df_cf = df_navs.merge(df_dates, on='date')
+    df_cf['amount'] = 1000
+    df_cf['units'] = df_cf['amount'] / df_cf['nav']
+    df_cf['cum_units'] = df_cf['units'].cumsum()
+    df_cf['cur_value'] = df_cf['cum_units'] * df_cf['nav']
+    df_cf['inv_amount'] = df_cf['amount'].cumsum()
+    df_cf = df_cf.reset_index()
+    df_cf['amount'] = df_cf['amount'] * (1.05)**(df_cf['index'] // 12)
+
+    df_investment = df_cf[['date', 'amount']]
+    df_redemption = pd.DataFrame(
+        [{'date': df_cf.iloc[-1:].date.values[0],
+          'amount': -df_cf['units'].sum() * df_cf.iloc[-1:].nav.values[0]}])
+    df_irr = pd.concat([df_investment, df_redemption]).reset_index(drop=True)
+
+    xirr_value = xirr(df_irr[['date', 'amount']]) * 100
+
+    df_daily_dates = pd.DataFrame(
+        pd.date_range(start=df_cf['date'].min(), end=df_cf['date'].max(), freq='D'))
+    df_daily_dates.columns = ['date']
+    df_daily_navs = df_navs.merge(df_daily_dates, on='date')
+    del df_cf['nav']
+    df_cfs = df_cf.merge(df_daily_navs, on='date', how='right').sort_values(['date'])
+    df_cfs = df_cfs.ffill()
+    df_cfs['cur_value'] = df_cfs['cum_units'] * df_cfs['nav']
+    df_cf_long = pd.melt(df_cfs[['date', 'inv_amount', 'cur_value']], id_vars=['date'],
+                         value_vars=['inv_amount', 'cur_value'], var_name='component', value_name='amount')
+    df_cf_long.loc[df_cf_long['component'] == 'inv_amount', 'component'] = 'Invested Amount'
+    df_cf_long.loc[df_cf_long['component'] == 'cur_value', 'component'] = 'Current Value'
+
+    df_cfs['cum_units'] = (df_cfs['cum_units'] / df_cfs.iloc[-1:].cum_units.values[0])
+    df_cfs['inv_amount'] = (df_cfs['inv_amount'] / df_cfs.iloc[-1:].inv_amount.values[0])
+    df_cf_long1 = pd.melt(df_cfs[['date', 'inv_amount', 'cum_units']], id_vars=['date'],
+                         value_vars=['inv_amount', 'cum_units'], var_name='component', value_name='proportion')
+    df_cf_long1.loc[df_cf_long1['component'] == 'inv_amount', 'component'] = 'Invested Amount'
+    df_cf_long1.loc[df_cf_long1['component'] == 'cum_units', 'component'] = 'Accumulated Units'
+
+    return xirr_value, df_cf_long, df_cf_long1
@@ -0,0 +1,739 @@
+# Imports
+import hashlib
+import json
+import os
+import sqlite3
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from newsapi import NewsApiClient
+from vaderSentiment.vaderSentiment import (
+    B_INCR,
+    BOOSTER_DICT,
+    C_INCR,
+    N_SCALAR,
+    NEGATE,
+    SPECIAL_CASES,
+    SentimentIntensityAnalyzer,
+)
+
+# NewsAPI key (override with the NEWSAPI_KEY environment variable)
+NEWSAPI_KEY = os.environ.get("NEWSAPI_KEY", "868d82c67ccf4bb586a4ced2c1a0f258")
+
+# Number of concurrent NewsAPI requests
+MAX_WORKERS = 16
+
+# Maximum NewsAPI requests started per second across all workers
+REQUESTS_PER_SECOND = 20
+
+# Articles per NewsAPI page, and results per query (the developer plan
+# returns at most 100 results per query, so a query is one full page)
+PAGE_SIZE = 100
+MAX_RESULTS = 100
+
+# Articles of the small first page requested when streaming, so the first
+# results show quickly; the full page follows
+FIRST_PAGE_SIZE = 20
+
+# Characters stripped from the ends of tokens
+PUNCTUATION = string.punctuation
+
+# Location of the persistent article store
+ARTICLE_STORE_PATH = Path.cwd() / "data" / "cache" / "news_articles.sqlite"
+
+# Seconds before a query is sent to NewsAPI again
+QUERY_TTL = 15 * 60
+
+# Seconds an article is kept in the store after it was last seen
+ARTICLE_TTL = 7 * 24 * 60 * 60
+
+# Number of new articles from which the vectorized scorer replaces VADER
+BULK_SCORER_MIN_BATCH = 500
+
+
+# Simple thread-safe rate limiter spacing out request starts
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        # Reserve the next free slot
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+
+        # Sleep outside the lock until the slot starts
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Vectorized VADER scorer for large batches of texts. It tokenizes the whole
+# batch once, maps the tokens to lexicon valences through a precomputed
+# vocabulary index and applies VADER's booster, negation, capitalization,
+# idiom and "but" rules with array operations over all tokens at once.
+# Compound scores match SentimentIntensityAnalyzer.polarity_scores to within
+# rounding, apart from emojis glued to neighbouring words.
+class BulkSentimentScorer:
+    def __init__(self, analyzer=None):
+        analyzer = analyzer or SentimentIntensityAnalyzer()
+
+        # Words the rules look at, on top of the lexicon itself
+        rule_words = {"no", "but", "least", "at", "very", "kind", "of", "never"}
+        rule_words |= {"so", "this", "without", "doubt", "or", "nor"}
+        phrase_words = {
+            word for phrase in [*SPECIAL_CASES, *BOOSTER_DICT] for word in phrase.split()
+        }
+        words = sorted(
+            set(analyzer.lexicon) | set(BOOSTER_DICT) | set(NEGATE) | rule_words | phrase_words
+        )
+
+        # Vocabulary index; the extra last row holds the features of unknown
+        # tokens, which get_indexer maps to -1
+        self.vocab = pd.Index(words)
+        self.valence = np.array([analyzer.lexicon.get(w, 0.0) for w in words] + [0.0])
+        self.in_lexicon = np.array([w in analyzer.lexicon for w in words] + [False])
+        self.booster = np.array([BOOSTER_DICT.get(w, 0.0) for w in words] + [0.0])
+        self.negation = np.array([w in NEGATE for w in words] + [False])
+        self.ids = {word: i for i, word in enumerate(words)}
+
+        # Multi-word special cases and booster phrases as vocabulary ids
+        self.special_cases = [
+            ([self.ids[w] for w in phrase.split()], value)
+            for phrase, value in SPECIAL_CASES.items()
+            if " " in phrase
+        ]
+        self.booster_phrases = [
+            ([self.ids[w] for w in phrase.split()], value)
+            for phrase, value in BOOSTER_DICT.items()
+            if " " in phrase
+        ]
+
+        # Emojis are replaced by their textual description
+        self.emoji_table = str.maketrans(
+            {emoji: f" {text} " for emoji, text in analyzer.emojis.items() if len(emoji) == 1}
+        )
+
+    # Score a batch of texts, returning a frame of neg/neu/pos/compound
+    def polarity_scores(self, texts):
+        texts = pd.Series(
+            [str(text).translate(self.emoji_table).strip() for text in texts], dtype=object
+        )
+        n_docs = len(texts)
+
+        # Tokenize the batch, keeping emoticons and short tokens unstripped
+        raw = texts.str.split().explode().dropna()
+        doc = raw.index.to_numpy(dtype=np.int64)
+        stripped = raw.str.strip(PUNCTUATION)
+        tokens = raw.where(stripped.str.len() <= 2, stripped)
+        lower = tokens.str.lower()
+
+        # Position of every token within its text
+        n_tokens = np.bincount(doc, minlength=n_docs)
+        starts = np.concatenate([[0], np.cumsum(n_tokens)[:-1]])
+        pos = np.arange(len(doc)) - starts[doc]
+        length = n_tokens[doc]
+
+        # Token features from the vocabulary index
+        tid = self.vocab.get_indexer(lower.to_numpy())
+        tid[tid < 0] = len(self.vocab)
+        is_upper = tokens.str.isupper().to_numpy(dtype=bool)
+        in_lexicon = self.in_lexicon[tid]
+        booster = self.booster[tid]
+        negation = self.negation[tid] | lower.str.contains("n't", regex=False).to_numpy(dtype=bool)
+
+        # Some but not all words of a text are in capitals
+        n_upper = np.bincount(doc, weights=is_upper, minlength=n_docs)
+        cap_diff = ((n_upper > 0) & (n_upper < n_tokens))[doc]
+
+        # Shift a token array by k positions within each text
+        def shift(values, k, fill):
+            out = np.full_like(values, fill)
+            if k > 0:
+                out[k:] = values[:-k]
+                return np.where(pos >= k, out, fill)
+            out[:k] = values[-k:]
+            return np.where(pos < length + k, out, fill)
+
+        unknown = len(self.vocab)
+        prev = {k: shift(tid, k, unknown) for k in (1, 2, 3)}
+        nxt = {k: shift(tid, -k, unknown) for k in (1, 2)}
+        ids = self.ids
+
+        def is_word(values, *words):
+            return np.isin(values, [ids[w] for w in words])
+
+        # Boosters and "kind of" carry no valence; other lexicon words do
+        skip = (booster != 0) | ((tid == ids["kind"]) & (nxt[1] == ids["of"]))
+        scored = in_lexicon & ~skip
+        valence = self.valence[tid].copy()
+
+        # "no" directly before a lexicon word negates it instead
+        valence[(tid == ids["no"]) & self.in_lexicon[nxt[1]]] = 0.0
+        negated_by_no = (
+            (prev[1] == ids["no"])
+            | (prev[2] == ids["no"])
+            | ((prev[3] == ids["no"]) & is_word(prev[1], "or", "nor"))
+        )
+        valence = np.where(negated_by_no, self.valence[tid] * N_SCALAR, valence)
+
+        # Capitalized emphasis
+        cap = is_upper & cap_diff
+        valence += np.where(cap, np.where(valence > 0, C_INCR, -C_INCR), 0.0)
+
+        # Boosters, dampeners and negations in the three preceding words
+        for start_i, damp in enumerate((1.0, 0.95, 0.9)):
+            k = start_i + 1
+            active = (pos > start_i) & ~self.in_lexicon[prev[k]]
+
+            prev_booster = self.booster[prev[k]]
+            prev_upper = shift(is_upper, k, False)
+            scalar = np.where(valence < 0, -prev_booster, prev_booster)
+            scalar += np.where(
+                (prev_booster != 0) & prev_upper & cap_diff,
+                np.where(valence > 0, C_INCR, -C_INCR),
+                0.0,
+            )
+            valence = np.where(active, valence + scalar * damp, valence)
+
+            prev_negated = shift(negation, k, False)
+            if start_i == 0:
+                factor = np.where(prev_negated, N_SCALAR, 1.0)
+            elif start_i == 1:
+                never = (prev[2] == ids["never"]) & is_word(prev[1], "so", "this")
+                doubt = (prev[2] == ids["without"]) & (prev[1] == ids["doubt"])
+                factor = np.where(never, 1.25, np.where(~doubt & prev_negated, N_SCALAR, 1.0))
+            else:
+                never = ((prev[3] == ids["never"]) & is_word(prev[2], "so", "this")) | is_word(
+                    prev[1], "so", "this"
+                )
+                doubt = (prev[3] == ids["without"]) & (
+                    (prev[2] == ids["doubt"]) | (prev[1] == ids["doubt"])
+                )
+                factor = np.where(never, 1.25, np.where(~doubt & prev_negated, N_SCALAR, 1.0))
+            valence = np.where(active, valence * factor, valence)
+
+            if start_i == 2:
+                valence = np.where(active, self.idioms(valence, tid, prev, nxt, pos, length), valence)
+
+        # Negation by a preceding "least" (but not "at least" / "very least")
+        least = (prev[1] == ids["least"]) & ((pos == 1) | ~is_word(prev[2], "at", "very"))
+        valence = np.where(least, valence * N_SCALAR, valence)
+
+        sentiments = np.where(scored, valence, 0.0)
+
+        # Contrastive "but" halves the words before it and boosts the words
+        # after it. VADER's implementation looks words up by value, which
+        # matters when valences repeat, so texts containing "but" reuse it.
+        lower = lower.to_numpy()
+        for d in np.unique(doc[tid == ids["but"]]):
+            span = slice(starts[d], starts[d] + n_tokens[d])
+            sentiments[span] = SentimentIntensityAnalyzer._but_check(
+                list(lower[span]), list(sentiments[span])
+            )
+
+        return self.score_valence(texts, doc, sentiments, n_tokens)
+
+    # Apply the special case idioms and booster phrases around each token
+    def idioms(self, valence, tid, prev, nxt, pos, length):
+        window = {-3: prev[3], -2: prev[2], -1: prev[1], 0: tid, 1: nxt[1], 2: nxt[2]}
+
+        def matches(word_ids, offsets):
+            hit = np.ones(len(tid), dtype=bool)
+            for word_id, offset in zip(word_ids, offsets):
+                hit &= window[offset] == word_id
+            return hit
+
+        # Preceding sequences; the first match in VADER's order wins
+        sequences = [(-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2)]
+        for offsets in reversed(sequences):
+            for word_ids, value in self.special_cases:
+                if len(word_ids) == len(offsets):
+                    valence = np.where(matches(word_ids, offsets), value, valence)
+
+        # Following sequences override the preceding ones
+        for offsets, room in (((0, 1), 1), ((0, 1, 2), 2)):
+            for word_ids, value in self.special_cases:
+                if len(word_ids) == len(offsets):
+                    hit = matches(word_ids, offsets) & (pos < length - room)
+                    valence = np.where(hit, value, valence)
+
+        # Booster phrases such as "kind of" before the token
+        for offsets in ((-3, -2, -1), (-3, -2), (-2, -1)):
+            for word_ids, value in self.booster_phrases:
+                if len(word_ids) == len(offsets):
+                    valence = np.where(matches(word_ids, offsets), valence + value, valence)
+
+        return valence
+
+    # Turn per-token sentiments into VADER's per-text scores
+    def score_valence(self, texts, doc, sentiments, n_tokens):
+        n_docs = len(texts)
+
+        # Emphasis from exclamation points and question marks
+        ep = np.minimum(texts.str.count("!").to_numpy(), 4) * 0.292
+        qm_count = texts.str.count(r"\?").to_numpy()
+        qm = np.where(qm_count > 3, 0.96, np.where(qm_count > 1, qm_count * 0.18, 0.0))
+        punct = ep + qm
+
+        # Compound score
+        sum_s = np.bincount(doc, weights=sentiments, minlength=n_docs)
+        sum_s += np.sign(sum_s) * punct
+        compound = np.clip(sum_s / np.sqrt(sum_s * sum_s + 15), -1.0, 1.0)
+
+        # Proportions of positive, negative and neutral words
+        pos_sum = np.bincount(doc, weights=np.where(sentiments > 0, sentiments + 1, 0.0), minlength=n_docs)
+        neg_sum = np.bincount(doc, weights=np.where(sentiments < 0, sentiments - 1, 0.0), minlength=n_docs)
+        neu_count = np.bincount(doc, weights=sentiments == 0, minlength=n_docs)
+        pos_sum, neg_sum = (
+            np.where(pos_sum > -neg_sum, pos_sum + punct, pos_sum),
+            np.where(pos_sum < -neg_sum, neg_sum - punct, neg_sum),
+        )
+        total = pos_sum - neg_sum + neu_count
+        total[total == 0] = 1.0
+
+        # Texts without any token score zero everywhere
+        empty = n_tokens == 0
+        return pd.DataFrame(
+            {
+                "neg": np.where(empty, 0.0, np.round(np.abs(neg_sum / total), 3)),
+                "neu": np.where(empty, 0.0, np.round(np.abs(neu_count / total), 3)),
+                "pos": np.where(empty, 0.0, np.round(np.abs(pos_sum / total), 3)),
+                "compound": np.where(empty, 0.0, np.round(compound, 4)),
+            }
+        )
+
+
+# Function to build the identity of an article from its URL and content
+def article_key(article):
+    content = f"{article['url']}\n{article['description'] or ''}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+# Persistent store of scored articles and of the articles each query returned
+class ArticleStore:
+    def __init__(self, path=ARTICLE_STORE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.lock = threading.Lock()
+
+        # Create the tables
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS articles (
+                    key TEXT PRIMARY KEY,
+                    url TEXT,
+                    title TEXT,
+                    source TEXT,
+                    published_at TEXT,
+                    compound REAL,
+                    pos REAL,
+                    neg REAL,
+                    neu REAL,
+                    seen_at REAL
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS queries (
+                    query TEXT PRIMARY KEY,
+                    keys TEXT,
+                    fetched_at REAL
+                )
+                """
+            )
+
+            # Scores per query and article, kept after the articles expire so
+            # the daily sentiment history keeps growing
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_scores (
+                    query TEXT,
+                    key TEXT,
+                    date TEXT,
+                    compound REAL,
+                    PRIMARY KEY (query, key)
+                )
+                """
+            )
+
+    # Return the article keys of a query if it was fetched within the TTL
+    def get_query(self, query, ttl=QUERY_TTL):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT keys, fetched_at FROM queries WHERE query = ?", (query,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > ttl:
+            return None
+        return json.loads(row[0])
+
+    # Remember the article keys a query returned and add their scores to the
+    # query's sentiment history
+    def put_query(self, query, keys):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?)",
+                (query, json.dumps(keys), time.time()),
+            )
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                self.conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO query_scores
+                    SELECT ?, key, substr(published_at, 1, 10), compound
+                    FROM articles WHERE key IN ({placeholders})
+                    """,
+                    [query, *chunk],
+                )
+
+    # Return the daily sentiment history of a query
+    def get_daily_sentiment(self, query):
+        with self.lock:
+            return pd.read_sql_query(
+                """
+                SELECT
+                    date,
+                    COUNT(*) AS articles,
+                    AVG(compound) AS sentiment,
+                    SUM(compound >= 0) AS positive,
+                    SUM(compound < 0) AS negative
+                FROM query_scores
+                WHERE query = ?
+                GROUP BY date
+                ORDER BY date
+                """,
+                self.conn,
+                params=(query,),
+            )
+
+    # Return the stored articles for the given keys, in key order
+    def get_articles(self, keys):
+        rows = {}
+        with self.lock:
+            # Stay below the SQLite host parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self.conn.execute(
+                    f"SELECT * FROM articles WHERE key IN ({placeholders})", chunk
+                ):
+                    rows[row[0]] = row
+
+        return {
+            key: {
+                "url": row[1],
+                "title": row[2],
+                "source": row[3],
+                "published_at": row[4],
+                "compound": row[5],
+                "pos": row[6],
+                "neg": row[7],
+                "neu": row[8],
+            }
+            for key, row in rows.items()
+        }
+
+    # Store newly scored articles and refresh the last seen time of known ones
+    def put_articles(self, records, seen_keys=()):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        key,
+                        record["url"],
+                        record["title"],
+                        record["source"],
+                        record["published_at"],
+                        record["compound"],
+                        record["pos"],
+                        record["neg"],
+                        record["neu"],
+                        now,
+                    )
+                    for key, record in records.items()
+                ],
+            )
+            self.conn.executemany(
+                "UPDATE articles SET seen_at = ? WHERE key = ?",
+                [(now, key) for key in seen_keys],
+            )
+
+    # Drop articles and queries that have not been seen within the TTL
+    def purge(self, ttl=ARTICLE_TTL):
+        cutoff = time.time() - ttl
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM articles WHERE seen_at < ?", (cutoff,))
+            self.conn.execute("DELETE FROM queries WHERE fetched_at < ?", (cutoff,))
+
+
+# Function to get the shared NewsAPI client with a pooled HTTP session
+@lru_cache(maxsize=None)
+def get_news_client():
+    # Keep one connection per worker alive between requests
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+    session.mount("https://", adapter)
+
+    # Return the client
+    return NewsApiClient(api_key=NEWSAPI_KEY, session=session)
+
+
+# Function to get the shared sentiment analyzer (loads the lexicon once)
+@lru_cache(maxsize=None)
+def get_analyzer():
+    return SentimentIntensityAnalyzer()
+
+
+# Function to get the shared bulk scorer (builds the vocabulary index once)
+@lru_cache(maxsize=None)
+def get_bulk_scorer():
+    return BulkSentimentScorer(get_analyzer())
+
+
+# Function to get the shared rate limiter
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    return RateLimiter(REQUESTS_PER_SECOND)
+
+
+# Function to get the shared article store (expired entries are purged on open)
+@lru_cache(maxsize=None)
+def get_article_store():
+    store = ArticleStore()
+    store.purge()
+    return store
+
+
+# Function to fetch the raw articles page by page as they arrive. With a
+# first page size, a small first page is requested before the full pages,
+# which repeat its articles; that costs one request more than the full pages.
+def fetch_article_pages(ticker, first_page_size=None):
+    # Function to request one page
+    def get_page(page_size, page):
+        get_rate_limiter().wait()
+        return get_news_client().get_everything(
+            q=ticker, language="en", sort_by="relevancy", page_size=page_size, page=page
+        )
+
+    # Small first page, enough when the query has no more results
+    if first_page_size:
+        news = get_page(first_page_size, 1)
+        yield news["articles"]
+        if len(news["articles"]) < first_page_size or news["totalResults"] <= first_page_size:
+            return
+
+    # Full pages
+    fetched = 0
+    for page in range(1, -(-MAX_RESULTS // PAGE_SIZE) + 1):
+        news = get_page(PAGE_SIZE, page)
+        yield news["articles"]
+
+        # Stop at the last page
+        fetched += len(news["articles"])
+        if len(news["articles"]) < PAGE_SIZE or fetched >= news["totalResults"]:
+            break
+
+
+# Function to score descriptions, switching to the bulk scorer for large batches
+def score_descriptions(descriptions):
+    if len(descriptions) >= BULK_SCORER_MIN_BATCH:
+        return get_bulk_scorer().polarity_scores(descriptions).to_dict("records")
+
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(description) for description in descriptions]
+
+
+# Function to score a list of articles, reusing the stored scores of known ones
+def score_articles(articles, store=None):
+    store = store or get_article_store()
+
+    # Keep articles with a description, deduplicated by identity
+    keyed = {}
+    for article in articles:
+        if article["description"]:
+            keyed.setdefault(article_key(article), article)
+
+    # Look up the articles that were already scored
+    known = store.get_articles(list(keyed))
+
+    # Score only the genuinely new articles
+    new_articles = {key: article for key, article in keyed.items() if key not in known}
+    scores = score_descriptions([article["description"] for article in new_articles.values()])
+    new_records = {
+        key: {
+            "url": article["url"],
+            "title": article["title"],
+            "source": article["source"]["name"],
+            "published_at": article["publishedAt"],
+            **score,
+        }
+        for (key, article), score in zip(new_articles.items(), scores)
+    }
+
+    # Persist the new scores
+    store.put_articles(new_records, seen_keys=list(known))
+
+    # Return the scored articles
+    records = {**known, **new_records}
+    return articles_info_from_records(records[key] for key in keyed)
+
+
+# Function to convert stored article records into display rows
+def articles_info_from_records(records):
+    articles_info = []
+
+    for record in records:
+        compound = record["compound"]
+        articles_info.append(
+            {
+                "Title": record["title"],
+                "Source": record["source"],
+                "Published": record["published_at"][:10],  # Only show YYYY-MM-DD
+                "Sentiment": "Positive" if compound >= 0 else "Negative",
+                "Compound": compound,
+                "URL": f"{record['url']}",
+            }
+        )
+
+    return articles_info
+
+
+# Function to summarize scored articles
+def summarize_sentiment(articles_info):
+    sentiment_scores = [article["Compound"] for article in articles_info]
+    positive_count = sum(score >= 0 for score in sentiment_scores)
+    negative_count = len(sentiment_scores) - positive_count
+
+    average_sentiment = (
+        sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
+    )
+
+    return average_sentiment, articles_info, positive_count, negative_count
+
+
+# Function to stream scored articles for a ticker or company name, yielding
+# one list of display rows per NewsAPI page; when streaming, a small first
+# page comes first. A failed page after the first ends the stream with the
+# pages already fetched, and the query is fetched again next time.
+def stream_news_sentiment(ticker, first_page_size=FIRST_PAGE_SIZE):
+    store = get_article_store()
+
+    # Serve the query from the store while it is fresh
+    keys = store.get_query(ticker)
+    if keys is not None:
+        records = store.get_articles(keys)
+        if len(records) == len(keys):
+            yield articles_info_from_records(records[key] for key in keys)
+            return
+
+    # Fetch the query page by page and score only the articles not seen before
+    keys = {}
+    pages = fetch_article_pages(ticker, first_page_size)
+    fetched = 0
+    while True:
+        try:
+            articles = next(pages)
+        except StopIteration:
+            break
+        except Exception:
+            if not fetched:
+                raise
+            return
+        fetched += 1
+
+        page = {}
+        for article in articles:
+            if article["description"]:
+                page.setdefault(article_key(article), article)
+        page = [article for key, article in page.items() if key not in keys]
+        keys.update(dict.fromkeys(article_key(article) for article in page))
+
+        yield score_articles(page, store)
+
+    # Remember the query once every page is in
+    store.put_query(ticker, list(keys))
+
+
+# Function to fetch news sentiment, in full pages only
+def fetch_news_sentiment(ticker):
+    articles_info = [row for rows in stream_news_sentiment(ticker, first_page_size=None) for row in rows]
+    return summarize_sentiment(articles_info)
+
+
+# Function to fetch news sentiment without failing the whole batch
+def try_fetch_news_sentiment(ticker):
+    try:
+        return fetch_news_sentiment(ticker)
+    except Exception:
+        return None
+
+
+# Function to fetch news sentiment for many tickers concurrently
+def fetch_news_sentiment_batch(tickers, max_workers=MAX_WORKERS):
+    # Drop duplicates while keeping the input order
+    tickers = list(dict.fromkeys(tickers))
+
+    # Fetch and score every ticker in the worker pool; scoring of one ticker
+    # overlaps with the network wait of the others
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(try_fetch_news_sentiment, tickers)
+
+        # Return the results keyed by ticker (None for failed tickers)
+        return dict(zip(tickers, results))
+
+
+# Function to get the daily sentiment series of a ticker or company name
+def fetch_daily_sentiment(ticker):
+    daily = get_article_store().get_daily_sentiment(ticker)
+    daily["date"] = pd.to_datetime(daily["date"])
+
+    # Return the series indexed by publish date
+    return daily.set_index("date")
+
+
+# Function to join the daily sentiment of a query onto the daily price history
+# of a stock ticker, e.g. join_sentiment_with_prices("Tesla", "TSLA")
+def join_sentiment_with_prices(ticker, stock_ticker, period="1y"):
+    # Imported here so the news page does not pay for the Yahoo Finance import
+    from history import fetch_stock_history
+
+    # Fetch the daily prices and align them on calendar dates
+    prices = fetch_stock_history(stock_ticker, period, "1d")
+    prices.index = prices.index.tz_localize(None).normalize()
+
+    # Assign news from non-trading days to the next trading day
+    daily = fetch_daily_sentiment(ticker)
+    daily["trading_day"] = prices.index.searchsorted(daily.index)
+    daily = daily[daily["trading_day"] < len(prices)]
+    daily["compound_sum"] = daily["sentiment"] * daily["articles"]
+    daily = daily.groupby("trading_day")[
+        ["articles", "compound_sum", "positive", "negative"]
+    ].sum()
+    daily["sentiment"] = daily["compound_sum"] / daily["articles"]
+    daily.index = prices.index[daily.index]
+
+    # Join the sentiment; days without news count as neutral
+    joined = prices.join(daily.drop(columns="compound_sum"), how="left")
+    joined[["articles", "positive", "negative"]] = (
+        joined[["articles", "positive", "negative"]].fillna(0).astype(int)
+    )
+    joined["sentiment"] = joined["sentiment"].fillna(0.0)
+
+    # Return the aligned daily series
+    return joined
@@ -1,8 +1,24 @@
-# Import streamlit
+# Imports
+import time
+
 import streamlit as st
 
 # Import helper functions
-from helper import *
+from helper import (
+    POLL_INTERVAL,
+    STOCK_INFO_FIELDS,
+    fetch_quote,
+    fetch_stock_info,
+    fetch_stocks,
+    resolve_ticker,
+)
+
+# Import the instrumentation
+from metrics import finish_rerun, start_rerun
+from profiling import tag_profile
+
+# Start timing the rerun
+start_rerun("Stock Info")
 
 # Configure the page for full width
 st.set_page_config(
@@ -84,14 +100,16 @@ stock_dict = fetch_stocks()
 
 # Add a dropdown for selecting the stock
 st.sidebar.markdown("### **Select stock**")
-stock = st.sidebar.selectbox("Choose a stock", list(stock_dict.keys()))
+stock = st.sidebar.selectbox(
+    "Choose a stock", list(stock_dict.keys()), format_func=lambda code: f"{stock_dict[code]} ({code})"
+)
 
 # Add a selector for stock exchange
 st.sidebar.markdown("### **Select stock exchange**")
 stock_exchange = st.sidebar.radio("Choose a stock exchange", ("BSE", "NSE"), index=1)
 
-# Build the stock ticker
-default_stock_ticker = f"{stock_dict[stock]}.{'BO' if stock_exchange == 'BSE' else 'NS'}"
+# Resolve the stock ticker from the issuer master
+default_stock_ticker = resolve_ticker(stock, stock_exchange)
 
 # Add a disabled input for stock ticker
 st.sidebar.markdown("### **Stock ticker**")
@@ -104,6 +122,9 @@ stock_ticker = user_stock_ticker if user_stock_ticker else default_stock_ticker
 # Display the selected ticker
 st.sidebar.write(f"Selected Stock Ticker: {stock_ticker}")
 
+# Tag a profile of this rerun with the ticker
+tag_profile(ticker=stock_ticker)
+
 ##### Sidebar End #####
 
 
@@ -126,474 +147,60 @@ st.markdown("##### **Enhancing Your Stock Market Insights**")
 ##### Title End #####
 
 
-##### Basic Information #####
-
-# Add a heading
-st.markdown("## **Basic Information**")
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame({"Issuer Name": [stock_data_info["Basic Information"]["longName"]]}),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame({"Symbol": [stock_ticker]}),
-    hide_index=True,
-)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame({"Currency": [stock_data_info["Basic Information"]["currency"]]}),
-    hide_index=True,
-)
-col2.dataframe(pd.DataFrame({"Exchange": [stock_exchange]}), hide_index=True)
-
-##### Basic Information End #####
-
-
-##### Market Data #####
-
-# Add a heading
-st.markdown("## **Market Data**")
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame({"Current Price": [stock_data_info["Market Data"]["currentPrice"]]}),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame({"Previous Close": [stock_data_info["Market Data"]["previousClose"]]}),
-    hide_index=True,
-)
-
-# Create 3 columns
-col1, col2, col3 = st.columns(3)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame({"Open": [stock_data_info["Market Data"]["open"]]}),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame({"Day Low": [stock_data_info["Market Data"]["dayLow"]]}),
-    hide_index=True,
-)
-col3.dataframe(
-    pd.DataFrame({"Day High": [stock_data_info["Market Data"]["dayHigh"]]}),
-    hide_index=True,
-)
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {
-            "Regular Market Previous Close": [
-                stock_data_info["Market Data"]["regularMarketPreviousClose"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Regular Market Open": [stock_data_info["Market Data"]["regularMarketOpen"]]}
-    ),
-    hide_index=True,
-)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame(
-        {
-            "Regular Market Day Low": [
-                stock_data_info["Market Data"]["regularMarketDayLow"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Regular Market Day High": [
-                stock_data_info["Market Data"]["regularMarketDayHigh"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-# Create 3 columns
-col1, col2, col3 = st.columns(3)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Fifty-Two Week Low": [stock_data_info["Market Data"]["fiftyTwoWeekLow"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Fifty-Two Week High": [stock_data_info["Market Data"]["fiftyTwoWeekHigh"]]}
-    ),
-    hide_index=True,
-)
-col3.dataframe(
-    pd.DataFrame(
-        {"Fifty-Day Average": [stock_data_info["Market Data"]["fiftyDayAverage"]]}
-    ),
-    hide_index=True,
-)
-
-##### Market Data End #####
-
-
-##### Volume and Shares #####
-
-# Add a heading
-st.markdown("## **Volume and Shares**")
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-col1.dataframe(
-    pd.DataFrame({"Volume": [stock_data_info["Volume and Shares"]["volume"]]}),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Regular Market Volume": [
-                stock_data_info["Volume and Shares"]["regularMarketVolume"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-# Create 3 columns
-col1, col2, col3 = st.columns(3)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Average Volume": [stock_data_info["Volume and Shares"]["averageVolume"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Average Volume (10 Days)": [
-                stock_data_info["Volume and Shares"]["averageVolume10days"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col3.dataframe(
-    pd.DataFrame(
-        {
-            "Average Daily Volume (10 Day)": [
-                stock_data_info["Volume and Shares"]["averageDailyVolume10Day"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame(
-        {
-            "Shares Outstanding": [
-                stock_data_info["Volume and Shares"]["sharesOutstanding"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Implied Shares Outstanding": [
-                stock_data_info["Volume and Shares"]["impliedSharesOutstanding"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col3.dataframe(
-    pd.DataFrame(
-        {"Float Shares": [stock_data_info["Volume and Shares"]["floatShares"]]}
-    ),
-    hide_index=True,
-)
-
-##### Volume and Shares End #####
+##### Live Price #####
 
+# Function to show the live price of the stock; it reruns on its own at the
+# quote service's cadence, without rerunning the rest of the page
+@st.fragment(run_every=POLL_INTERVAL)
+def show_live_quote(ticker):
+    quote = fetch_quote(ticker)
+    if quote is None:
+        st.caption(f"Live price of {ticker} unavailable")
+        return
 
-##### Dividends and Yield #####
+    st.metric(
+        f"{ticker} Live Price",
+        f"{quote['price']:,.2f}",
+        f"{quote['change']:+,.2f} ({quote['change_pct']:+.2f}%)",
+    )
+    st.caption(f"Last updated {time.strftime('%H:%M:%S', time.localtime(quote['updated']))}")
 
-# Add a heading
-st.markdown("## **Dividends and Yield**")
 
-# Create 3 columns
-col1, col2, col3 = st.columns(3)
+# Show the live price
+show_live_quote(stock_ticker)
 
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Dividend Rate": [stock_data_info["Dividends and Yield"]["dividendRate"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Dividend Yield": [stock_data_info["Dividends and Yield"]["dividendYield"]]}
-    ),
-    hide_index=True,
-)
-col3.dataframe(
-    pd.DataFrame(
-        {"Payout Ratio": [stock_data_info["Dividends and Yield"]["payoutRatio"]]}
-    ),
-    hide_index=True,
-)
+##### Live Price End #####
 
-##### Dividends and Yield End #####
 
+##### Stock Info Sections #####
 
-##### Valuation and Ratios #####
 
-# Add a heading
-st.markdown("## **Valuation and Ratios**")
+# Function to format a value for display
+def format_value(value):
+    # Missing values and text are shown as they are
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value).replace("|", "\\|")
 
-# Create 2 columns
-col1, col2 = st.columns(2)
+    # Whole numbers and large values with thousands separators
+    if isinstance(value, int) or abs(value) >= 1000:
+        return f"{value:,.0f}"
 
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Market Cap": [stock_data_info["Valuation and Ratios"]["marketCap"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Enterprise Value": [
-                stock_data_info["Valuation and Ratios"]["enterpriseValue"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame(
-        {"Price to Book": [stock_data_info["Valuation and Ratios"]["priceToBook"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Debt to Equity": [stock_data_info["Valuation and Ratios"]["debtToEquity"]]}
-    ),
-    hide_index=True,
-)
-
-# Row 3
-col1.dataframe(
-    pd.DataFrame(
-        {"Gross Margins": [stock_data_info["Valuation and Ratios"]["grossMargins"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Profit Margins": [stock_data_info["Valuation and Ratios"]["profitMargins"]]}
-    ),
-    hide_index=True,
-)
+    # Small values keep enough decimals for ratios and yields
+    return f"{value:,.2f}" if abs(value) >= 1 else f"{value:.4f}"
 
-##### Valuation and Ratios End #####
 
-
-##### Financial Performance #####
-
-# Add a heading
-st.markdown("## **Financial Performance**")
-
-# Create 2 columns
+# Render every section as a single two-column table
 col1, col2 = st.columns(2)
+for i, (section, fields) in enumerate(STOCK_INFO_FIELDS.items()):
+    rows = "\n".join(
+        f"| {label} | {format_value(stock_data_info[section][key])} |"
+        for key, label in fields.items()
+    )
+    (col1 if i % 2 == 0 else col2).markdown(
+        f"## **{section}**\n\n| Metric | Value |\n| --- | ---: |\n{rows}"
+    )
 
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Total Revenue": [stock_data_info["Financial Performance"]["totalRevenue"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Revenue Per Share": [
-                stock_data_info["Financial Performance"]["revenuePerShare"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-# Create 3 columns
-col1, col2, col3 = st.columns(3)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Total Cash": [stock_data_info["Financial Performance"]["totalCash"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Total Cash Per Share": [
-                stock_data_info["Financial Performance"]["totalCashPerShare"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col3.dataframe(
-    pd.DataFrame(
-        {"Total Debt": [stock_data_info["Financial Performance"]["totalDebt"]]}
-    ),
-    hide_index=True,
-)
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {
-            "Earnings Growth": [
-                stock_data_info["Financial Performance"]["earningsGrowth"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Revenue Growth": [stock_data_info["Financial Performance"]["revenueGrowth"]]}
-    ),
-    hide_index=True,
-)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame(
-        {
-            "Return on Assets": [
-                stock_data_info["Financial Performance"]["returnOnAssets"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Return on Equity": [
-                stock_data_info["Financial Performance"]["returnOnEquity"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-##### Financial Performance End #####
-
-
-##### Cash Flow #####
-
-# Add a heading
-st.markdown("## **Cash Flow**")
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame({"Free Cash Flow": [stock_data_info["Cash Flow"]["freeCashflow"]]}),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Operating Cash Flow": [stock_data_info["Cash Flow"]["operatingCashflow"]]}
-    ),
-    hide_index=True,
-)
-
-##### Cash Flow End #####
-
-
-##### Analyst Targets #####
-
-# Add a heading
-st.markdown("## **Analyst Targets**")
-
-# Create 2 columns
-col1, col2 = st.columns(2)
-
-# Row 1
-col1.dataframe(
-    pd.DataFrame(
-        {"Target High Price": [stock_data_info["Analyst Targets"]["targetHighPrice"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {"Target Low Price": [stock_data_info["Analyst Targets"]["targetLowPrice"]]}
-    ),
-    hide_index=True,
-)
-
-# Row 2
-col1.dataframe(
-    pd.DataFrame(
-        {"Target Mean Price": [stock_data_info["Analyst Targets"]["targetMeanPrice"]]}
-    ),
-    hide_index=True,
-)
-col2.dataframe(
-    pd.DataFrame(
-        {
-            "Target Median Price": [
-                stock_data_info["Analyst Targets"]["targetMedianPrice"]
-            ]
-        }
-    ),
-    hide_index=True,
-)
-
-##### Analyst Targets End #####
+##### Stock Info Sections End #####
 
 
 ##### Footer #####
@@ -610,4 +217,8 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-##### Footer End #####
\ No newline at end of file
+##### Footer End #####
+
+
+# Record the rerun and show its timings with ?debug=metrics
+finish_rerun()
@@ -1,10 +1,36 @@
 # Imports
+import time
+
+import numpy as np
 import plotly.graph_objects as go
 import streamlit as st
 
 # Import helper functions
-from helper import *
+from helper import (
+    POLL_INTERVAL,
+    fetch_periods_intervals,
+    fetch_quote,
+    fetch_stock_history,
+    fetch_stocks,
+    generate_stock_prediction,
+    resolve_ticker,
+)
+
+# Import chart downsampling functions
+from charts import candlestick_figure, downsample_series
+
+# Import the forecasting models
+from forecasting import FORECASTERS
 
+# Import technical indicator functions
+from indicators import INDICATORS, compute_indicators, indicator_columns, live_indicators
+
+# Import the instrumentation
+from metrics import finish_rerun, span, start_rerun
+from profiling import tag_profile
+
+# Start timing the rerun
+start_rerun("Stock Prediction")
 
 
 # Configure the page for full width
@@ -84,14 +110,16 @@ stock_dict = fetch_stocks()
 
 # Add a dropdown for selecting the stock
 st.sidebar.markdown("### **Select stock**")
-stock = st.sidebar.selectbox("Choose a stock", list(stock_dict.keys()))
+stock = st.sidebar.selectbox(
+    "Choose a stock", list(stock_dict.keys()), format_func=lambda code: f"{stock_dict[code]} ({code})"
+)
 
 # Add a selector for stock exchange
 st.sidebar.markdown("### **Select stock exchange**")
 stock_exchange = st.sidebar.radio("Choose a stock exchange", ("BSE", "NSE"), index=1)
 
-# Build the stock ticker
-stock_ticker = f"{stock_dict[stock]}.{'BO' if stock_exchange == 'BSE' else 'NS'}"
+# Resolve the stock ticker from the issuer master
+stock_ticker = resolve_ticker(stock, stock_exchange)
 
 # Add a disabled input for stock ticker
 st.sidebar.markdown("### **Stock ticker**")
@@ -110,6 +138,13 @@ period = st.sidebar.selectbox("Choose a period", list(periods.keys()))
 st.sidebar.markdown("### **Select interval**")
 interval = st.sidebar.selectbox("Choose an interval", periods[period])
 
+# Add a selector for technical indicators
+st.sidebar.markdown("### **Select indicators**")
+indicators = st.sidebar.multiselect("Choose indicators", list(INDICATORS))
+
+# Tag a profile of this rerun with the inputs
+tag_profile(ticker=stock_ticker, period=period, interval=interval)
+
 ##### Sidebar End #####
 
 
@@ -125,7 +160,47 @@ st.markdown("##### **Enhance Investment Decisions through Data-Driven Forecastin
 
 
 # Fetch the stock historical data
-stock_data = fetch_stock_history(stock_ticker, period, interval)
+with span("fetch", period=period, interval=interval):
+    stock_data = fetch_stock_history(stock_ticker, period, interval)
+
+
+##### Live Price #####
+
+# Function to show the live price of the stock, and the selected indicators
+# with the last bar updated by it; it reruns on its own at the quote
+# service's cadence, without rerunning the rest of the page
+@st.fragment(run_every=POLL_INTERVAL)
+def show_live_quote(ticker, bars, indicators):
+    quote = fetch_quote(ticker)
+    if quote is None:
+        st.caption(f"Live price of {ticker} unavailable")
+        return
+
+    st.metric(
+        f"{ticker} Live Price",
+        f"{quote['price']:,.2f}",
+        f"{quote['change']:+,.2f} ({quote['change_pct']:+.2f}%)",
+    )
+    st.caption(f"Last updated {time.strftime('%H:%M:%S', time.localtime(quote['updated']))}")
+
+    # Live indicators, updated in O(1) from the last rerun
+    if indicators and len(bars):
+        values = live_indicators((ticker, period, interval), bars, indicators, quote["price"])
+        st.caption(" · ".join(f"{column} {value:,.2f}" for column, value in values.items()))
+
+
+# Show the live price
+show_live_quote(stock_ticker, stock_data, indicators)
+
+##### Live Price End #####
+
+
+# Compute the selected indicators over the whole history, before zooming;
+# they are cached per ticker, so new bars only extend them
+if indicators and len(stock_data):
+    with span("indicators", count=len(indicators)):
+        indicator_data = compute_indicators(stock_data, indicators, key=(stock_ticker, period, interval))
+    stock_data = stock_data.join(indicator_data)
 
 
 ##### Historical Data Graph #####
@@ -133,24 +208,37 @@ stock_data = fetch_stock_history(stock_ticker, period, interval)
 # Add a title to the historical data graph
 st.markdown("## **Historical Data**")
 
-# Create a plot for the historical data
-fig = go.Figure(
-    data=[
-        go.Candlestick(
-            x=stock_data.index,
-            open=stock_data["Open"],
-            high=stock_data["High"],
-            low=stock_data["Low"],
-            close=stock_data["Close"],
-        )
-    ]
-)
-
-# Customize the historical data graph
-fig.update_layout(xaxis_rangeslider_visible=True)
+# Add a zoom window; the visible bars are re-aggregated to the chart's point
+# budget on the server, so zooming in reveals more detail
+if len(stock_data) > 1:
+    zoom_steps = np.unique(np.linspace(0, len(stock_data) - 1, 200).astype(int)).tolist()
+    zoom_dates = stock_data.index
+    zoom_start, zoom_end = st.select_slider(
+        "Zoom",
+        options=zoom_steps,
+        value=(zoom_steps[0], zoom_steps[-1]),
+        format_func=lambda i: zoom_dates[int(i)].strftime("%Y-%m-%d %H:%M"),
+    )
+    stock_data = stock_data.iloc[zoom_start : zoom_end + 1]
+
+# Create a plot for the historical data, aggregated to the point budget of the
+# chart (the zoom slider replaces the range slider, which would send the whole
+# series a second time)
+with span("build", chart="history"):
+    fig = candlestick_figure(
+        stock_data,
+        layout=dict(xaxis_rangeslider_visible=False),
+        overlays=tuple(
+            column for name in indicators if INDICATORS[name][3] for column in indicator_columns(stock_data, name)
+        ),
+        panels=tuple(
+            tuple(indicator_columns(stock_data, name)) for name in indicators if not INDICATORS[name][3]
+        ),
+    )
 
 # Use the native streamlit theme.
-st.plotly_chart(fig, use_container_width=True)
+with span("render", chart="history"):
+    st.plotly_chart(fig, use_container_width=True)
 
 ##### Historical Data Graph End #####
 
@@ -158,52 +246,63 @@ st.plotly_chart(fig, use_container_width=True)
 ##### Stock Prediction Graph #####
 
 # Unpack the data
-train_df, test_df, forecast, predictions, r2, MAPE = generate_stock_prediction(stock_ticker)
+with span("fit"):
+    train_df, test_df, forecast, predictions, r2, MAPE = generate_stock_prediction(stock_ticker)
 
 # Check if the data is not None
 if train_df is not None and (forecast >= 0).all() and (predictions >= 0).all():
     # Add a title to the stock prediction graph
     st.markdown("## **Stock Prediction**")
 
-    # Create a plot for the stock prediction
-    fig = go.Figure(
-        data=[
-            go.Scatter(
-                x=train_df.index,
-                y=train_df["Close"],
-                name="Train",
-                mode="lines",
-                line=dict(color="blue"),
-            ),
-            go.Scatter(
-                x=test_df.index,
-                y=test_df["Close"],
-                name="Test",
-                mode="lines",
-                line=dict(color="orange"),
-            ),
-            go.Scatter(
-                x=forecast.index,
-                y=forecast,
-                name="Forecast",
-                mode="lines",
-                line=dict(color="red"),
-            ),
-            go.Scatter(
-                x=test_df.index,
-                y=predictions,
-                name="Test Predictions",
-                mode="lines",
-                line=dict(color="green"),
-            ),
-        ]
-    )
+    # Create a plot for the stock prediction, with every line downsampled to
+    # the chart's point budget
+    with span("build", chart="prediction"):
+        train_line = downsample_series(train_df["Close"])
+        test_line = downsample_series(test_df["Close"])
+        forecast_line = downsample_series(forecast)
+        predictions_line = downsample_series(predictions)
+        fig = go.Figure(
+            data=[
+                go.Scatter(
+                    x=train_line.index,
+                    y=train_line,
+                    name="Train",
+                    mode="lines",
+                    line=dict(color="blue"),
+                ),
+                go.Scatter(
+                    x=test_line.index,
+                    y=test_line,
+                    name="Test",
+                    mode="lines",
+                    line=dict(color="orange"),
+                ),
+                go.Scatter(
+                    x=forecast_line.index,
+                    y=forecast_line,
+                    name="Forecast",
+                    mode="lines",
+                    line=dict(color="red"),
+                ),
+                go.Scatter(
+                    x=predictions_line.index,
+                    y=predictions_line,
+                    name="Test Predictions",
+                    mode="lines",
+                    line=dict(color="green"),
+                ),
+            ]
+        )
 
-    # Customize the stock prediction graph
-    fig.update_layout(xaxis_rangeslider_visible=True)
+        # Customize the stock prediction graph
+        fig.update_layout(xaxis_rangeslider_visible=False)
 
     # Use the native streamlit theme.
-    st.plotly_chart(fig, use_container_width=True)
+    with span("render", chart="prediction"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Name the model selected for the stock
+    st.caption(f"Model: {forecast.name}, the best of {len(FORECASTERS)} candidates on the test data")
 
 # If the data is None
 else:
@@ -218,21 +317,23 @@ else:
 
 ##### Accuracy Measure Section #####
 
-# Display a markdown header for the accuracy measure section
-st.markdown("#### Accuracy Measure Between Test and Prediction")
+# Check if the predictions were scored
+if r2 is not None:
+    # Display a markdown header for the accuracy measure section
+    st.markdown("#### Accuracy Measure Between Test and Prediction")
 
-# Create two columns for displaying R2 and MAPE
-col1, col2 = st.columns(2)
+    # Create two columns for displaying R2 and MAPE
+    col1, col2 = st.columns(2)
 
-# Display R2 in the first column with larger font size
-with col1:
-    st.subheader("R² Score")
-    st.markdown(f"<h3 style='font-size:24px;'>{r2:.2f}</h3>", unsafe_allow_html=True)
+    # Display R2 in the first column with larger font size
+    with col1:
+        st.subheader("R² Score")
+        st.markdown(f"<h3 style='font-size:24px;'>{r2:.2f}</h3>", unsafe_allow_html=True)
 
-# Display MAPE in the second column with larger font size
-with col2:
-    st.subheader("Mean Absolute Percentage Error (MAPE)")
-    st.markdown(f"<h3 style='font-size:24px;'>{MAPE:.2f}</h3>", unsafe_allow_html=True)
+    # Display MAPE in the second column with larger font size
+    with col2:
+        st.subheader("Mean Absolute Percentage Error (MAPE)")
+        st.markdown(f"<h3 style='font-size:24px;'>{MAPE:.2f}</h3>", unsafe_allow_html=True)
 
 ##### Accuracy Measure Section End #####
 
@@ -252,3 +353,7 @@ st.markdown(
 )
 
 ##### Footer End #####
+
+
+# Record the rerun and show its timings with ?debug=metrics
+finish_rerun()
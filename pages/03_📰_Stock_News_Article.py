@@ -1,77 +1,96 @@
 import streamlit as st
 import pandas as pd
-from newsapi import NewsApiClient
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-# Initialize NewsAPI (Replace 'YOUR_API_KEY' with your actual API key)
-newsapi = NewsApiClient(api_key='868d82c67ccf4bb586a4ced2c1a0f258')
+# Import news helper functions
+from news import fetch_news_sentiment_batch, stream_news_sentiment, summarize_sentiment
+
+# Import the instrumentation
+from metrics import finish_rerun, start_rerun
+from profiling import tag_profile
+
+# Start timing the rerun
+start_rerun("Stock News")
 
 # Streamlit App Title
 st.set_page_config(page_title="News Sentiment Analyzer", layout="wide")
 st.title("📰 News Sentiment Analyzer")
 st.markdown("Analyze real-time news sentiment for any **stock ticker** or **company**.")
 
-# Input field for user to enter a stock ticker or company name
-ticker = st.text_input("Enter a Stock Ticker or Company Name:", "Tesla")
-
-# Function to fetch news sentiment
-def fetch_news_sentiment(ticker):
-    news = newsapi.get_everything(q=ticker, language='en', sort_by='relevancy')
-    analyzer = SentimentIntensityAnalyzer()
-    sentiment_scores = []
-    articles_info = []
-    positive_count, negative_count = 0, 0
-
-    for article in news['articles']:
-        description = article['description']
-        if description:
-            score = analyzer.polarity_scores(description)
-            sentiment_scores.append(score['compound'])
-            sentiment_label = "Positive" if score['compound'] >= 0 else "Negative"
-
-            articles_info.append({
-                'Title': article['title'],
-                'Source': article['source']['name'],
-                'Published': article['publishedAt'][:10],  # Only show YYYY-MM-DD
-                'Sentiment': sentiment_label,
-                'URL': f"{article['url']}"
-            })
-
-            if score['compound'] >= 0:
-                positive_count += 1
-            else:
-                negative_count += 1
-
-    average_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
-
-    return average_sentiment, articles_info, positive_count, negative_count
-
-# Fetch and Display News Sentiment when the user enters input
-if ticker:
+# Input field for user to enter one or more stock tickers or company names
+ticker_input = st.text_input("Enter Stock Tickers or Company Names (comma separated):", "Tesla")
+tickers = [t.strip() for t in ticker_input.split(",") if t.strip()]
+
+# Tag a profile of this rerun with the queries
+tag_profile(query="+".join(tickers))
+
+
+# Function to display the sentiment of one ticker into a placeholder
+def show_sentiment(placeholder, ticker, result, loading=False):
+    avg_sentiment, articles, pos_count, neg_count = result
+
+    with placeholder.container():
+        # Sentiment Score Display
+        st.subheader(f"📈 Sentiment Analysis for: **{ticker.upper()}**")
+
+        sentiment_emoji = "😊" if avg_sentiment > 0 else "😟" if avg_sentiment < 0 else "😐"
+        st.metric(label="**Average Sentiment Score**", value=f"{avg_sentiment:.2f}", delta=sentiment_emoji)
+
+        st.progress((avg_sentiment + 1) / 2)  # Normalize -1 to 1 for progress bar
+
+        # Summary Statistics
+        st.markdown(f"""
+        - 🔹 **Total Articles Analyzed:** {len(articles)}{" (loading more...)" if loading else ""}
+        - ✅ **Positive Articles:** {pos_count}
+        - ❌ **Negative Articles:** {neg_count}
+        """)
+
+        # Display Articles in a DataFrame
+        if articles:
+            df = pd.DataFrame(articles).drop(columns=['Compound'])
+            st.dataframe(df, hide_index=True, use_container_width=True)
+        elif not loading:
+            st.warning("No relevant articles found. Try a different keyword.")
+
+
+# Single name: stream the articles page by page so the first results show up
+# while the rest are still being fetched
+if len(tickers) == 1:
+    ticker = tickers[0]
+    placeholder = st.empty()
+    articles = []
+    try:
+        with st.spinner("Fetching latest news..."):
+            for rows in stream_news_sentiment(ticker):
+                articles.extend(rows)
+                show_sentiment(placeholder, ticker, summarize_sentiment(articles), loading=True)
+        show_sentiment(placeholder, ticker, summarize_sentiment(articles))
+    except Exception:
+        st.error(f"Error: Unable to fetch news for {ticker}. Please try again later.")
+
+# Watchlist: fetch every name concurrently
+elif tickers:
     with st.spinner("Fetching latest news..."):
-        avg_sentiment, articles, pos_count, neg_count = fetch_news_sentiment(ticker)
-
-    # Sentiment Score Display
-    st.subheader(f"📈 Sentiment Analysis for: **{ticker.upper()}**")
-    
-    sentiment_emoji = "😊" if avg_sentiment > 0 else "😟" if avg_sentiment < 0 else "😐"
-    st.metric(label="**Average Sentiment Score**", value=f"{avg_sentiment:.2f}", delta=sentiment_emoji)
-
-    st.progress((avg_sentiment + 1) / 2)  # Normalize -1 to 1 for progress bar
-
-    # Summary Statistics
-    st.markdown(f"""
-    - 🔹 **Total Articles Analyzed:** {len(articles)}
-    - ✅ **Positive Articles:** {pos_count}
-    - ❌ **Negative Articles:** {neg_count}
-    """)
-
-    # Display Articles in a DataFrame
-    if articles:
-        df = pd.DataFrame(articles)
-        st.dataframe(df, hide_index=True, use_container_width=True)
-    else:
-        st.warning("No relevant articles found. Try a different keyword.")
+        results = fetch_news_sentiment_batch(tickers)
+
+    # Watchlist summary
+    st.subheader("📋 Watchlist Sentiment")
+    summary = pd.DataFrame([
+        {
+            'Ticker': name,
+            'Average Sentiment': result[0],
+            'Articles': len(result[1]),
+            'Positive': result[2],
+            'Negative': result[3],
+        }
+        for name, result in results.items() if result is not None
+    ])
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    for ticker, result in results.items():
+        if result is None:
+            st.error(f"Error: Unable to fetch news for {ticker}. Please try again later.")
+        else:
+            show_sentiment(st.empty(), ticker, result)
 
 # Footer
 st.markdown("---")
@@ -80,3 +99,7 @@ st.markdown("""
     <p>💼 Powered by Advanced Financial Analytics</p>
     </div>
 """, unsafe_allow_html=True)
+
+
+# Record the rerun and show its timings with ?debug=metrics
+finish_rerun()
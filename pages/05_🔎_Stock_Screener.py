@@ -0,0 +1,230 @@
+# Imports
+import time
+
+import streamlit as st
+
+# Import screener functions
+from screener import SNAPSHOT_PATH, get_snapshot_refresh, load_snapshot, screen
+
+# Import the instrumentation
+from metrics import finish_rerun, start_rerun
+
+# Start timing the rerun
+start_rerun("Stock Screener")
+
+# Configure the page for full width
+st.set_page_config(
+    page_title="Stock Screener",
+    page_icon="🔎",
+    layout="wide",  # Set layout to wide for full-width coverage
+)
+
+# Custom CSS for enhanced aesthetics and full-width layout
+st.markdown(
+    """
+    <style>
+    .main {
+        max-width: 100% !important;
+        padding: 2rem;
+        background-color: #f9f9f9;
+        border-radius: 10px;
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
+    }
+    h1 {
+        color: #2c3e50;
+        font-family: 'Georgia', serif;
+        text-align: center;
+    }
+    h2 {
+        color: #34495e;
+        font-family: 'Arial', sans-serif;
+        border-bottom: 2px solid #3498db;
+        padding-bottom: 0.5rem;
+    }
+    h3 {
+        color: #34495e;
+        font-family: 'Arial', sans-serif;
+    }
+    p {
+        color: #666;
+        font-family: 'Verdana', sans-serif;
+        line-height: 1.6;
+    }
+    .footer {
+        text-align: center;
+        color: #777;
+        padding: 1rem;
+        margin-top: 2rem;
+        border-top: 1px solid #ddd;
+    }
+    .stButton button {
+        width: 100%;
+        background-color: #3498db;
+        color: white;
+        font-weight: bold;
+        border-radius: 5px;
+        padding: 0.5rem 1rem;
+    }
+    .stButton button:hover {
+        background-color: #2980b9;
+    }
+    .stSelectbox, .stRadio {
+        margin-bottom: 1rem;
+    }
+    .stTextInput {
+        margin-bottom: 1rem;
+    }
+    .dataframe {
+        width: 100% !important;
+    }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+# Numeric filters offered in the sidebar: (label, field, operator)
+FILTERS = [
+    ("Minimum Market Cap", "marketCap", ">="),
+    ("Maximum Price to Book", "priceToBook", "<="),
+    ("Maximum Debt to Equity", "debtToEquity", "<="),
+    ("Minimum Gross Margins", "grossMargins", ">="),
+    ("Minimum Profit Margins", "profitMargins", ">="),
+    ("Minimum Dividend Yield", "dividendYield", ">="),
+    ("Minimum Revenue Growth", "revenueGrowth", ">="),
+    ("Minimum Earnings Growth", "earningsGrowth", ">="),
+    ("Minimum Return on Equity", "returnOnEquity", ">="),
+]
+
+# Columns shown in the results table
+RESULT_COLUMNS = [
+    "Issuer Name",
+    "Sector Name",
+    "Industry New Name",
+    "currentPrice",
+    "marketCap",
+    "priceToBook",
+    "debtToEquity",
+    "grossMargins",
+    "profitMargins",
+    "dividendYield",
+    "revenueGrowth",
+    "earningsGrowth",
+    "returnOnEquity",
+]
+
+
+##### Title #####
+
+# Add title to the app
+st.markdown("# **Stock Screener**")
+
+# Add a subtitle to the app
+st.markdown("##### **Filter the BSE/NSE Universe by Fundamentals**")
+
+##### Title End #####
+
+
+##### Snapshot #####
+
+# Load the last fundamentals snapshot
+snapshot = load_snapshot()
+loaded_at = snapshot.attrs.get("refreshed_at", 0) if snapshot is not None else 0
+
+# Offer a bulk refresh of the snapshot, run in the background
+st.sidebar.markdown("## **Fundamentals Snapshot**")
+if loaded_at:
+    refreshed = time.strftime("%Y-%m-%d %H:%M", time.localtime(loaded_at))
+    st.sidebar.write(f"Last refreshed: {refreshed}")
+refresh = get_snapshot_refresh()
+if st.sidebar.button("Refresh snapshot", disabled=refresh.running()):
+    refresh.start()
+
+
+# Function to show the progress of a running refresh, reloading the page
+# once a snapshot newer than the loaded one has been written
+@st.fragment(run_every=2)
+def show_refresh_progress():
+    if refresh.running() and not refresh.total:
+        st.progress(0.0, text="Starting the refresh...")
+    elif refresh.running():
+        st.progress(refresh.done / refresh.total, text=f"Fetching fundamentals: {refresh.done:,} of {refresh.total:,} issuers")
+    elif refresh.error is not None:
+        st.error(f"Error refreshing the snapshot: {refresh.error}")
+    elif refresh.refreshed_at is not None and refresh.refreshed_at > loaded_at:
+        st.rerun()
+
+
+with st.sidebar:
+    show_refresh_progress()
+
+# Stop until a snapshot exists
+if snapshot is None:
+    st.info(f"No fundamentals snapshot found at {SNAPSHOT_PATH}. Use **Refresh snapshot** in the sidebar to build it.")
+    st.stop()
+
+##### Snapshot End #####
+
+
+##### Sidebar Start #####
+
+# Add a sidebar
+st.sidebar.markdown("## **Screening Criteria**")
+
+# Sector and industry filters
+predicates = []
+sectors = st.sidebar.multiselect("Sector", sorted(snapshot["Sector Name"].dropna().unique()))
+if sectors:
+    predicates.append(("Sector Name", "in", sectors))
+industries = st.sidebar.multiselect(
+    "Industry", sorted(snapshot["Industry New Name"].dropna().unique())
+)
+if industries:
+    predicates.append(("Industry New Name", "in", industries))
+
+# Numeric filters, applied only when a value is entered
+for label, field, operator in FILTERS:
+    value = st.sidebar.number_input(label, value=None, format="%.4f")
+    if value is not None:
+        predicates.append((field, operator, value))
+
+# Sorting
+sort_by = st.sidebar.selectbox("Sort by", RESULT_COLUMNS[3:], index=1)
+ascending = st.sidebar.checkbox("Ascending", value=False)
+
+##### Sidebar End #####
+
+
+##### Results #####
+
+# Screen the universe
+start = time.perf_counter()
+results = screen(snapshot, predicates, sort_by=sort_by, ascending=ascending)
+elapsed = (time.perf_counter() - start) * 1000
+
+# Display the matches
+st.markdown(f"## **{len(results)} matches**")
+st.caption(f"Screened {len(snapshot)} issuers in {elapsed:.1f} ms")
+st.dataframe(results[RESULT_COLUMNS], use_container_width=True)
+
+##### Results End #####
+
+
+##### Footer #####
+
+# Footer
+st.markdown("---")
+st.markdown(
+    """
+    <div class="footer">
+        <p>💼 Powered by Advanced Financial Analytics</p>
+        <p style='font-size: 0.8em;'>Data sourced from Yahoo Finance</p>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+
+##### Footer End #####
+
+
+# Record the rerun and show its timings with ?debug=metrics
+finish_rerun()
@@ -0,0 +1,182 @@
+# Imports
+import plotly.express as px
+import streamlit as st
+
+# Import sector analytics functions
+from price_store import get_price_store
+from tickers import fetch_issuers
+from sectors import HORIZONS, LEVELS, fetch_sector_stats
+
+# Import the instrumentation
+from metrics import finish_rerun, start_rerun
+from profiling import tag_profile
+
+# Start timing the rerun
+start_rerun("Sector Heatmap")
+
+# Configure the page for full width
+st.set_page_config(
+    page_title="Sector Heatmap",
+    page_icon="🗺️",
+    layout="wide",  # Set layout to wide for full-width coverage
+)
+
+# Custom CSS for enhanced aesthetics and full-width layout
+st.markdown(
+    """
+    <style>
+    .main {
+        max-width: 100% !important;
+        padding: 2rem;
+        background-color: #f9f9f9;
+        border-radius: 10px;
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
+    }
+    h1 {
+        color: #2c3e50;
+        font-family: 'Georgia', serif;
+        text-align: center;
+    }
+    h2 {
+        color: #34495e;
+        font-family: 'Arial', sans-serif;
+        border-bottom: 2px solid #3498db;
+        padding-bottom: 0.5rem;
+    }
+    h3 {
+        color: #34495e;
+        font-family: 'Arial', sans-serif;
+    }
+    p {
+        color: #666;
+        font-family: 'Verdana', sans-serif;
+        line-height: 1.6;
+    }
+    .footer {
+        text-align: center;
+        color: #777;
+        padding: 1rem;
+        margin-top: 2rem;
+        border-top: 1px solid #ddd;
+    }
+    .stButton button {
+        width: 100%;
+        background-color: #3498db;
+        color: white;
+        font-weight: bold;
+        border-radius: 5px;
+        padding: 0.5rem 1rem;
+    }
+    .stButton button:hover {
+        background-color: #2980b9;
+    }
+    .stSelectbox, .stRadio {
+        margin-bottom: 1rem;
+    }
+    .stTextInput {
+        margin-bottom: 1rem;
+    }
+    .dataframe {
+        width: 100% !important;
+    }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+##### Sidebar Start #####
+
+# Add a sidebar
+st.sidebar.markdown("## **User Input Features**")
+
+# Add a selector for the depth of the hierarchy
+st.sidebar.markdown("### **Select grouping**")
+depth = st.sidebar.selectbox(
+    "Group by", LEVELS[1:], format_func=lambda level: f"Sector > {level}"
+)
+levels = LEVELS[: LEVELS.index(depth) + 1]
+
+# Add a selector for the metric
+st.sidebar.markdown("### **Select metric**")
+metrics = [f"Return {name}" for name in HORIZONS] + ["Volatility", "Advancers", "Above SMA"]
+metric = st.sidebar.selectbox("Color by", metrics)
+
+# Tag a profile of this rerun with the grouping and the metric
+tag_profile(group=depth, metric=metric)
+
+# Offer an incremental update of the price store
+st.sidebar.markdown("### **Price data**")
+if st.sidebar.button("Update prices"):
+    with st.spinner("Fetching new daily bars for every issuer..."):
+        new_dates = get_price_store().update(list(fetch_issuers().index))
+    st.sidebar.write(f"Added {new_dates} new trading days")
+
+##### Sidebar End #####
+
+
+##### Title #####
+
+# Add title to the app
+st.markdown("# **Sector Heatmap**")
+
+# Add a subtitle to the app
+st.markdown("##### **Returns, Volatility and Breadth Across the Market**")
+
+##### Title End #####
+
+
+##### Heatmap #####
+
+# Compute the grouped statistics from the cached prices
+stats = fetch_sector_stats(levels)
+
+# Stop until the price store holds data
+if stats["Priced"].sum() == 0:
+    st.info("No cached prices yet. Use **Update prices** in the sidebar to fill the price store.")
+    st.stop()
+
+# Create the heatmap, sized by the number of issuers
+groups = stats[stats["Priced"] > 0].reset_index()
+is_share = metric in ("Advancers", "Above SMA")
+fig = px.treemap(
+    groups,
+    path=[px.Constant("All"), *levels],
+    values="Members",
+    color=metric,
+    color_continuous_scale="RdYlGn_r" if metric == "Volatility" else "RdYlGn",
+    color_continuous_midpoint=0.5 if is_share else (None if metric == "Volatility" else 0),
+    hover_data={column: ":.2%" for column in metrics},
+)
+fig.update_layout(margin=dict(t=30, l=0, r=0, b=0), height=700)
+
+# Use the native streamlit theme.
+st.plotly_chart(fig, use_container_width=True)
+
+# Display the statistics
+st.markdown("## **Group Statistics**")
+st.dataframe(
+    stats.style.format({column: "{:.2%}" for column in metrics}), use_container_width=True
+)
+
+##### Heatmap End #####
+
+
+##### Footer #####
+
+# Footer
+st.markdown("---")
+st.markdown(
+    """
+    <div class="footer">
+        <p>💼 Powered by Advanced Financial Analytics</p>
+        <p style='font-size: 0.8em;'>Data sourced from Yahoo Finance</p>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+
+##### Footer End #####
+
+
+# Record the rerun and show its timings with ?debug=metrics
+finish_rerun()
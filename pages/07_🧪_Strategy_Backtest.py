@@ -0,0 +1,253 @@
+# Imports
+import streamlit as st
+
+# Import backtesting functions
+from backtest import DEFAULT_WORKERS, POOL_WORKERS, STRATEGIES, forecast_backtest, summarize_sweep, sweep_store
+from helper import fetch_stocks, resolve_ticker
+from price_store import get_price_store
+
+# Import the instrumentation
+from metrics import finish_rerun, span, start_rerun
+from profiling import tag_profile
+
+# Start timing the rerun
+start_rerun("Strategy Backtest")
+
+# Configure the page for full width
+st.set_page_config(
+    page_title="Strategy Backtest",
+    page_icon="🧪",
+    layout="wide",  # Set layout to wide for full-width coverage
+)
+
+# Custom CSS for enhanced aesthetics and full-width layout
+st.markdown(
+    """
+    <style>
+    .main {
+        max-width: 100% !important;
+        padding: 2rem;
+        background-color: #f9f9f9;
+        border-radius: 10px;
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
+    }
+    h1 {
+        color: #2c3e50;
+        font-family: 'Georgia', serif;
+        text-align: center;
+    }
+    h2 {
+        color: #34495e;
+        font-family: 'Arial', sans-serif;
+        border-bottom: 2px solid #3498db;
+        padding-bottom: 0.5rem;
+    }
+    h3 {
+        color: #34495e;
+        font-family: 'Arial', sans-serif;
+    }
+    p {
+        color: #666;
+        font-family: 'Verdana', sans-serif;
+        line-height: 1.6;
+    }
+    .footer {
+        text-align: center;
+        color: #777;
+        padding: 1rem;
+        margin-top: 2rem;
+        border-top: 1px solid #ddd;
+    }
+    .stButton button {
+        width: 100%;
+        background-color: #3498db;
+        color: white;
+        font-weight: bold;
+        border-radius: 5px;
+        padding: 0.5rem 1rem;
+    }
+    .stButton button:hover {
+        background-color: #2980b9;
+    }
+    .stSelectbox, .stRadio {
+        margin-bottom: 1rem;
+    }
+    .stTextInput {
+        margin-bottom: 1rem;
+    }
+    .dataframe {
+        width: 100% !important;
+    }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+##### Sidebar Start #####
+
+# Add a sidebar
+st.sidebar.markdown("## **User Input Features**")
+
+# Add a selector for the strategy
+st.sidebar.markdown("### **Select strategy**")
+strategy = st.sidebar.selectbox("Choose a strategy", list(STRATEGIES))
+
+# Add an input for the values of every parameter of the strategy, keeping
+# the parameters whose values are not whole numbers to report them
+st.sidebar.markdown("### **Parameter grid**")
+grid = {}
+invalid = []
+for param, values in STRATEGIES[strategy][1].items():
+    text = st.sidebar.text_input(f"{param} (comma separated)", ", ".join(map(str, values)), key=f"{strategy}_{param}")
+    try:
+        grid[param] = [int(value) for value in text.split(",") if value.strip()]
+    except ValueError:
+        grid[param] = []
+    if not grid[param] or min(grid[param]) < 1:
+        invalid.append(param)
+
+# Add an input for the transaction cost
+st.sidebar.markdown("### **Transaction cost**")
+cost_bps = st.sidebar.number_input("Cost per trade (basis points)", min_value=0.0, value=10.0, step=1.0)
+
+# Add an input for the number of worker processes, used by large sweeps only,
+# when the machine has more than one processor
+st.sidebar.markdown("### **Workers**")
+if POOL_WORKERS > 1:
+    workers = st.sidebar.number_input("Worker processes", min_value=1, max_value=POOL_WORKERS, value=DEFAULT_WORKERS)
+    st.sidebar.caption("Small sweeps run serially, since sending the prices to the workers would cost more.")
+else:
+    workers = 1
+    st.sidebar.caption("Sweeps run serially on this single-processor machine.")
+
+# Tag a profile of this rerun with the strategy
+tag_profile(strategy=strategy)
+
+##### Sidebar End #####
+
+
+##### Title #####
+
+# Add title to the app
+st.markdown("# **Strategy Backtest**")
+
+# Add a subtitle to the app
+st.markdown("##### **Signal-Based Strategies Across the Market and Their Parameters**")
+
+##### Title End #####
+
+
+##### Parameter Sweep #####
+
+st.markdown("## **Parameter Sweep**")
+
+# Sweep the tickers of the price store once it holds data
+tickers = get_price_store().load("Close").columns
+if len(tickers) == 0:
+    st.info("No cached prices yet. Use **Update prices** on the Sector Heatmap page to fill the price store.")
+else:
+    st.write(f"Backtests every parameter set of the grid on the {len(tickers)} tickers of the price store.")
+
+    # Run the sweep on demand, once every parameter has valid values
+    if invalid:
+        st.error(f"Error: Enter positive whole numbers separated by commas for {', '.join(invalid)}.")
+    elif st.button("Run backtest"):
+        with st.spinner("Backtesting..."):
+            with span("backtest", strategy=strategy):
+                results, throughput = sweep_store(strategy, grid, cost=cost_bps / 10_000, workers=workers)
+        st.session_state["backtest"] = (strategy, results, throughput)
+
+    # Display the last sweep of the strategy
+    if st.session_state.get("backtest", (None,))[0] == strategy:
+        _, results, throughput = st.session_state["backtest"]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Backtests", f"{throughput['backtests']:,}")
+        col2.metric("Time", f"{throughput['seconds']:.2f} s")
+        col3.metric("Backtests per Second", f"{throughput['backtests_per_s']:,.0f}")
+        if throughput["workers"] > 1:
+            st.caption(f"Ran in {throughput['workers']} worker processes.")
+        else:
+            st.caption("Ran serially.")
+
+        if len(results):
+            # Parameter sets, best first
+            st.markdown("### **Parameter Sets**")
+            summary = summarize_sweep(results)
+            st.dataframe(
+                summary.style.format(
+                    {
+                        "Mean Sharpe": "{:.2f}",
+                        "Median Return": "{:.2%}",
+                        "Winning Share": "{:.0%}",
+                        "Mean Drawdown": "{:.2%}",
+                        "Mean Trades": "{:.1f}",
+                    }
+                ),
+                use_container_width=True,
+            )
+
+            # Tickers of the best parameter set
+            st.markdown("### **Best Parameter Set by Ticker**")
+            best = summary.index.to_frame(index=False).iloc[0].to_dict()
+            best_results = results.loc[(results[list(best)] == list(best.values())).all(axis=1)]
+            st.write(", ".join(f"{param} = {value}" for param, value in best.items()))
+            st.dataframe(
+                best_results.sort_values("Sharpe", ascending=False).set_index("Ticker"),
+                use_container_width=True,
+            )
+
+##### Parameter Sweep End #####
+
+
+##### Forecast Strategy #####
+
+st.markdown("## **Forecast Strategy**")
+st.write(
+    "Goes long on the days the forecast of the Stock Prediction page expects the next close "
+    "to be above the last one, over the test period of the forecast."
+)
+
+# Add selectors for the stock and the entry threshold
+stock_dict = fetch_stocks()
+col1, col2 = st.columns(2)
+stock = col1.selectbox(
+    "Choose a stock", list(stock_dict.keys()), format_func=lambda code: f"{stock_dict[code]} ({code})"
+)
+threshold = col2.number_input("Entry threshold (%)", min_value=0.0, value=0.0, step=0.1)
+stock_ticker = resolve_ticker(stock, "NSE")
+
+# Run the forecast backtest on demand
+if st.button("Run forecast backtest"):
+    with st.spinner("Forecasting and backtesting..."):
+        stats = forecast_backtest(stock_ticker, threshold / 100, cost_bps / 10_000)
+    if stats is None:
+        st.error(f"Error: Unable to forecast {stock_ticker}. Please try again later.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Return", f"{stats['Total Return']:.2%}")
+        col2.metric("Sharpe", f"{stats['Sharpe']:.2f}")
+        col3.metric("Max Drawdown", f"{stats['Max Drawdown']:.2%}")
+        col4.metric("Trades", f"{stats['Trades']:.0f}")
+
+##### Forecast Strategy End #####
+
+
+##### Footer #####
+
+# Footer
+st.markdown("---")
+st.markdown(
+    """
+    <div class="footer">
+        <p>💼 Powered by Advanced Financial Analytics</p>
+        <p style='font-size: 0.8em;'>Data sourced from Yahoo Finance</p>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+
+##### Footer End #####
+
+
+# Record the rerun and show its timings with ?debug=metrics
+finish_rerun()
@@ -0,0 +1,59 @@
+# Imports
+import pandas as pd
+import yfinance as yf
+
+from forecasting import FORECAST_DAYS, mean_absolute_percentage_error, r2_score, select_forecast
+from tickers import is_known_bad
+
+
+# Function to generate the stock prediction
+def generate_stock_prediction(stock_ticker):
+    # Try to generate the predictions
+    try:
+        # Skip symbols already known to have no data
+        if is_known_bad(stock_ticker):
+            raise ValueError(f"No data for {stock_ticker}")
+
+        # Pull the data for the first security
+        stock_data = yf.Ticker(stock_ticker)
+
+        # Extract the data for last 1yr with 1d interval
+        stock_data_hist = stock_data.history(period="2y", interval="1d")
+
+        # Clean the data for to keep only the required columns
+        stock_data_close = stock_data_hist[["Close"]]
+
+        # Change frequency to day
+        stock_data_close = stock_data_close.asfreq("D", method="ffill")
+
+        # Fill missing values
+        stock_data_close = stock_data_close.ffill()
+
+        # Define training and testing area
+        train_df = stock_data_close.iloc[: int(len(stock_data_close) * 0.9) + 1]  # 90%
+        test_df = stock_data_close.iloc[int(len(stock_data_close) * 0.9) :]  # 10%
+
+        # Select the model predicting the test data best, fitting the
+        # candidates in the shared pool; the last training close is the first
+        # test close, so models are fit on those before it
+        name, path, _ = select_forecast(train_df["Close"].iloc[:-1], test_df["Close"], parallel=True)
+        if name is None:
+            raise ValueError(f"No model fits {stock_ticker}")
+
+        # Predictions for the test data, and 90 days into the future
+        forecast = pd.Series(
+            path,
+            index=pd.date_range(test_df.index[0], periods=len(test_df) + FORECAST_DAYS, freq="D"),
+            name=name,
+        )
+        predictions = forecast.iloc[: len(test_df)]
+        r2 = r2_score(test_df, predictions)
+        MAPE = mean_absolute_percentage_error(test_df, predictions)
+
+        # Return the required data
+        return train_df, test_df, forecast, predictions, r2, MAPE
+
+    # If error occurs
+    except:
+        # Return None
+        return None, None, None, None, None, None
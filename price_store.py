@@ -0,0 +1,154 @@
+# Imports
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+
+from tickers import is_known_bad, mark_bad
+
+# Location of the daily price store
+PRICE_STORE_DIR = Path.cwd() / "data" / "cache" / "prices"
+
+# Fields kept in the store, one wide parquet file (dates x tickers) per field
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# History fetched for tickers that are not in the store yet
+DEFAULT_PERIOD = "2y"
+
+# Number of tickers per Yahoo Finance download request
+DOWNLOAD_CHUNK = 200
+
+# Days a ticker's last bar may lag the newest bar of the store before the
+# ticker counts as stale (delisted or suspended) and is left out of updates
+STALE_DAYS = 30
+
+
+# Function to download daily bars for many tickers; returns {field: wide
+# frame} and the chunks of tickers whose request returned any data (a chunk
+# returning nothing at all is taken as a failed request)
+def download_prices(tickers, **kwargs):
+    frames = []
+    chunks = []
+    for i in range(0, len(tickers), DOWNLOAD_CHUNK):
+        chunk = tickers[i : i + DOWNLOAD_CHUNK]
+        data = yf.download(
+            chunk,
+            interval="1d",
+            group_by="column",
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+            **kwargs,
+        )
+        if not data.dropna(how="all").empty:
+            frames.append(data)
+            chunks.append(chunk)
+
+    if not frames:
+        return {}, chunks
+    data = pd.concat(frames, axis=1)
+
+    # Align the bars on calendar dates
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    data.index = data.index.normalize()
+
+    # Split the frame by field, dropping tickers without any data
+    return {field: data[field].dropna(axis=1, how="all") for field in PRICE_FIELDS}, chunks
+
+
+# Store of daily bars for many tickers, updated incrementally
+class PriceStore:
+    def __init__(self, path=PRICE_STORE_DIR):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
+        self.frames = {}
+
+    # Path of the file holding a field
+    def field_path(self, field):
+        return self.path / f"{field.lower()}.parquet"
+
+    # Load one field as a wide frame (dates x tickers), reloading only when
+    # the file changed
+    def load(self, field="Close"):
+        path = self.field_path(field)
+        if not path.exists():
+            return pd.DataFrame(dtype=float)
+
+        mtime = path.stat().st_mtime
+        with self.lock:
+            cached = self.frames.get(field)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, pd.read_parquet(path))
+                self.frames[field] = cached
+
+        return cached[1]
+
+    # Return the Open/High/Low/Close/Volume bars of one ticker
+    def ohlc(self, ticker):
+        bars = pd.DataFrame(
+            {field: self.load(field).get(ticker) for field in PRICE_FIELDS}
+        )
+        return bars.dropna(subset=["Close"])
+
+    # Write one field, swapping the file in whole so loads never read a
+    # partial one
+    def write(self, field, frame):
+        path = self.field_path(field)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        frame.to_parquet(tmp)
+        tmp.replace(path)
+
+    # Fetch the bars missing from the store for the given tickers; returns the
+    # number of new dates added. Updates run one at a time, so concurrent ones
+    # never drop each other's bars.
+    def update(self, tickers, period=DEFAULT_PERIOD):
+        with self.update_lock:
+            close = self.load("Close")
+            tickers = [t for t in dict.fromkeys(tickers) if not is_known_bad(t)]
+            known = [t for t in tickers if t in close.columns]
+            unknown = [t for t in tickers if t not in close.columns]
+
+            # Known tickers only need the bars since their last date (re-fetching
+            # that bar replaces a partial day), fetched together with the tickers
+            # ending on the same date; stale tickers are left out, so they never
+            # make the others fetch their whole gap
+            downloads = []
+            if known:
+                last = close[known].apply(pd.Series.last_valid_index).dropna()
+                last = last[last >= last.max() - pd.Timedelta(days=STALE_DAYS)]
+                for start, group in last.groupby(last):
+                    downloads.append(download_prices(list(group.index), start=start)[0])
+            if unknown:
+                download, chunks = download_prices(unknown, period=period)
+                downloads.append(download)
+
+                # Remember new tickers that returned no bars while others of the
+                # same request did (a request returning nothing at all means the
+                # provider was unreachable)
+                returned = set(download.get("Close", pd.DataFrame()).columns)
+                missing = [t for chunk in chunks for t in chunk if t not in returned]
+                if missing:
+                    mark_bad(*missing)
+
+            # Merge the new bars over the stored ones
+            self.path.mkdir(parents=True, exist_ok=True)
+            for field in PRICE_FIELDS:
+                merged = self.load(field)
+                for download in downloads:
+                    if field in download:
+                        merged = download[field].combine_first(merged)
+                self.write(field, merged.sort_index())
+
+            # Return the number of new dates
+            return len(self.load("Close").index.difference(close.index))
+
+
+# Function to get the shared price store
+@lru_cache(maxsize=None)
+def get_price_store():
+    return PriceStore()
@@ -0,0 +1,145 @@
+# Imports
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# Profile every rerun when STOCKPLAY_PROFILE is set; otherwise only reruns of
+# pages opened with ?profile=1 are profiled
+PROFILE_ALL = os.environ.get("STOCKPLAY_PROFILE", "") not in ("", "0")
+
+# Directory of the written profiles
+PROFILE_DIR = Path(os.environ.get("STOCKPLAY_PROFILE_DIR", Path.cwd() / "data" / "cache" / "profiles"))
+
+# Seconds between two stack samples, and the longest a profile may run (a
+# rerun stopped by st.stop never reaches finish_profile)
+SAMPLE_INTERVAL = 0.005
+MAX_PROFILE_SECONDS = 300
+
+# Longest the page and input tags of a profile file name may be, in bytes;
+# longer tags are cut and end with a hash of the full tags, keeping the name
+# under the 255 bytes file systems allow
+MAX_TAGS_BYTES = 120
+
+# Profile of the current rerun of each session thread
+_local = threading.local()
+
+
+# Sampling profiler recording the stacks of one thread at a fixed interval, as
+# collapsed stacks ("outer;inner;leaf" -> number of samples)
+class StackSampler(threading.Thread):
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True, name="stack-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    # Function to name a frame like "module.py:function"
+    @staticmethod
+    def frame_name(frame):
+        return f"{Path(frame.f_code.co_filename).name}:{frame.f_code.co_name}"
+
+    # Sample until stopped, the thread is gone or the time limit is reached
+    def run(self):
+        import streamlit
+
+        streamlit_dir = str(Path(streamlit.__file__).parent)
+        deadline = time.monotonic() + MAX_PROFILE_SECONDS
+        while not self.done.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+
+            # Walk the stack from the leaf up, then drop the threading and
+            # Streamlit frames that run the page script
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            stack.reverse()
+            start = next(
+                (
+                    i
+                    for i, f in enumerate(stack)
+                    if f.f_code.co_filename != threading.__file__
+                    and not f.f_code.co_filename.startswith(streamlit_dir)
+                ),
+                0,
+            )
+            self.stacks[";".join(self.frame_name(f) for f in stack[start:])] += 1
+
+    # Stop sampling and return the collapsed stacks
+    def stop(self):
+        self.done.set()
+        self.join()
+        return self.stacks
+
+
+# Function to check whether the current rerun should be profiled
+def profiling_requested():
+    if PROFILE_ALL:
+        return True
+
+    import streamlit as st
+
+    return st.query_params.get("profile") not in (None, "", "0")
+
+
+# Function to start profiling the current rerun of a page
+def start_profile(page):
+    # Stop a profile left running by a rerun that ended early
+    if getattr(_local, "sampler", None) is not None:
+        _local.sampler.stop()
+        _local.sampler = None
+
+    if not profiling_requested():
+        return
+
+    _local.page = page
+    _local.inputs = {}
+    _local.started = time.perf_counter()
+    _local.sampler = StackSampler(threading.get_ident())
+    _local.sampler.start()
+
+
+# Function to tag the current profile with the inputs of the rerun, e.g.
+# tag_profile(ticker="RELIANCE.NS", period="1y")
+def tag_profile(**inputs):
+    if getattr(_local, "sampler", None) is not None:
+        _local.inputs.update(inputs)
+
+
+# Function to get a file-name safe version of a text
+def safe_name(text):
+    return "".join(c if c.isalnum() or c in "-." else "_" for c in str(text))
+
+
+# Function to stop profiling the current rerun and write its collapsed stacks
+# (for flamegraph.pl, speedscope or inferno) to PROFILE_DIR; returns the path
+# of the written file, or None when the rerun was not profiled
+def finish_profile():
+    sampler = getattr(_local, "sampler", None)
+    if sampler is None:
+        return None
+    _local.sampler = None
+    stacks = sampler.stop()
+    elapsed = time.perf_counter() - _local.started
+
+    # Name the file after the page, the inputs and the time of the rerun
+    tags = "_".join(
+        [safe_name(_local.page)] + [f"{key}={safe_name(value)}" for key, value in _local.inputs.items()]
+    )
+    if len(tags.encode()) > MAX_TAGS_BYTES:
+        digest = hashlib.sha1(tags.encode()).hexdigest()[:8]
+        tags = tags.encode()[: MAX_TAGS_BYTES - len(digest) - 1].decode(errors="ignore") + "_" + digest
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}_{tags}_{elapsed * 1000:.0f}ms.folded"
+
+    # Write the stacks
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / name
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+    return path
@@ -0,0 +1,146 @@
+# Imports
+import threading
+import time
+from functools import lru_cache
+
+from metrics import increment, span
+from price_store import download_prices
+from tickers import is_known_bad
+
+# Seconds between two polls of the provider
+POLL_INTERVAL = 15
+
+# Seconds a ticker keeps being polled after the last session showing it
+SUBSCRIPTION_TTL = 60
+
+# Seconds a session waits for the first quote of a ticker
+FIRST_QUOTE_TIMEOUT = 5
+
+# Seconds the poller waits after a new ticker, to fetch the new tickers of
+# sessions opening at about the same time in one request
+NEW_TICKER_DELAY = 0.2
+
+
+# Service polling the latest prices of the tickers shown by any session, with
+# one batched request per cycle for all of them, and sharing the quotes
+# between sessions; the provider load grows with the number of distinct
+# tickers, not with the number of sessions
+class QuoteService:
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.viewers = {}
+        self.quotes = {}
+        self.empty = set()
+        self.failures = 0
+        self.lock = threading.Lock()
+        self.updated = threading.Condition(self.lock)
+        self.wake = threading.Event()
+        self.thread = None
+
+    # Register a session showing a ticker; the poller starts with the first
+    # subscription and polls early for a new ticker. Returns whether the
+    # ticker is new.
+    def subscribe(self, ticker):
+        with self.lock:
+            new = ticker not in self.viewers
+            self.viewers[ticker] = time.monotonic()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True, name="quote-poller")
+                self.thread.start()
+            if new:
+                self.wake.set()
+            return new
+
+    # Return the latest quote of a ticker, waiting for the first one only when
+    # the ticker is new, until the provider returns it, returns nothing for it
+    # or fails
+    def quote(self, ticker, timeout=FIRST_QUOTE_TIMEOUT):
+        failures = self.failures
+        new = self.subscribe(ticker)
+        with self.updated:
+            if new and not is_known_bad(ticker):
+                self.updated.wait_for(
+                    lambda: ticker in self.quotes or ticker in self.empty or self.failures != failures, timeout
+                )
+            return self.quotes.get(ticker)
+
+    # Return the tickers still shown by a session, forgetting the others
+    def active_tickers(self):
+        now = time.monotonic()
+        with self.lock:
+            for ticker in [t for t, seen in self.viewers.items() if now - seen > SUBSCRIPTION_TTL]:
+                del self.viewers[ticker]
+                self.quotes.pop(ticker, None)
+                self.empty.discard(ticker)
+            return [t for t in self.viewers if not is_known_bad(t)]
+
+    # Fetch the quotes of every active ticker (or only of the new ones) in one
+    # batched request
+    def poll(self, new_only=False):
+        tickers = self.active_tickers()
+        if new_only:
+            with self.lock:
+                tickers = [t for t in tickers if t not in self.quotes and t not in self.empty]
+        if not tickers:
+            return
+
+        with span("quotes.poll"):
+            close = download_prices(tickers, period="5d")[0].get("Close")
+        increment("stockplay_quote_polls_total")
+
+        # Latest price and change from the previous close of every ticker
+        quotes = {}
+        for ticker in [] if close is None else close.columns:
+            prices = close[ticker].dropna()
+            if prices.empty:
+                continue
+            price = float(prices.iloc[-1])
+            previous = float(prices.iloc[-2]) if len(prices) > 1 else price
+            quotes[ticker] = {
+                "price": price,
+                "previous_close": previous,
+                "change": price - previous,
+                "change_pct": (price / previous - 1) * 100 if previous else 0.0,
+                "date": prices.index[-1],
+                "updated": time.time(),
+            }
+
+        # Store the quotes, and remember the tickers the provider returned
+        # nothing for
+        with self.updated:
+            self.quotes.update(quotes)
+            self.empty.difference_update(quotes)
+            self.empty.update(t for t in tickers if t not in quotes)
+            self.updated.notify_all()
+
+    # Poll every ticker at a fixed cadence, and new tickers as they come
+    def run(self):
+        next_poll = time.monotonic()
+        while True:
+            new_only = self.wake.wait(max(next_poll - time.monotonic(), 0))
+            if new_only:
+                time.sleep(NEW_TICKER_DELAY)
+            else:
+                next_poll += self.interval
+            self.wake.clear()
+            try:
+                self.poll(new_only)
+            except Exception:
+                # Keep the last quotes when the provider is unreachable, and
+                # stop the sessions waiting for a first quote
+                increment("stockplay_quote_poll_errors_total")
+                with self.updated:
+                    self.failures += 1
+                    self.updated.notify_all()
+
+
+# Function to get the shared quote service
+@lru_cache(maxsize=None)
+def get_quote_service():
+    return QuoteService()
+
+
+# Function to get the latest quote of a ticker ({price, previous_close,
+# change, change_pct, date, updated}), or None when it has none
+def fetch_quote(ticker):
+    return get_quote_service().quote(ticker)
@@ -0,0 +1,165 @@
+# Imports
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fundamentals import STOCK_INFO_FIELDS, fetch_fundamentals
+from tickers import fetch_issuers
+
+# Location of the fundamentals snapshot of the whole issuer universe
+SNAPSHOT_PATH = Path.cwd() / "data" / "cache" / "fundamentals_snapshot.parquet"
+
+# Number of issuers fetched between two progress reports of a refresh
+REFRESH_CHUNK = 200
+
+# Numeric fields captured in the snapshot
+SCREENER_FIELDS = [
+    key
+    for section, fields in STOCK_INFO_FIELDS.items()
+    if section != "Basic Information"
+    for key in fields
+]
+
+# Predicate operators, each evaluated on a whole column at once
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "in": lambda column, values: np.isin(column, list(values)),
+    "between": lambda column, bounds: (column >= bounds[0]) & (column <= bounds[1]),
+}
+
+
+# Function to refresh the snapshot by fetching the fundamentals of every
+# issuer, REFRESH_CHUNK issuers at a time, calling progress(done, total) after
+# every chunk; the snapshot is swapped in whole once every issuer is fetched
+def refresh_snapshot(max_workers=16, path=SNAPSHOT_PATH, progress=None):
+    issuers = fetch_issuers()
+
+    # Fetch all fundamentals in bulk through the fundamentals service
+    chunks = []
+    for i in range(0, len(issuers), REFRESH_CHUNK):
+        chunks.append(fetch_fundamentals(issuers.index[i : i + REFRESH_CHUNK], SCREENER_FIELDS, max_workers=max_workers))
+        if progress is not None:
+            progress(min(i + REFRESH_CHUNK, len(issuers)), len(issuers))
+    fundamentals = pd.concat(chunks) if chunks else pd.DataFrame(columns=SCREENER_FIELDS)
+
+    # Join them onto the issuer master, stored column-wise as float64
+    snapshot = issuers.join(fundamentals.apply(pd.to_numeric, errors="coerce"))
+    snapshot.attrs["refreshed_at"] = time.time()
+
+    # Save the snapshot, so sessions loading it never read a partial file
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    snapshot.to_parquet(tmp)
+    tmp.replace(path)
+
+    # Return the snapshot
+    return snapshot
+
+
+# Background refresh of the snapshot shared by every session: at most one
+# runs at a time, in a thread of its own, so it neither blocks the session
+# that started it nor stops when that session goes away
+class SnapshotRefresh:
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.thread = None
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.refreshed_at = None
+
+    # Check whether a refresh is running
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    # Start a refresh unless one is running; returns whether it started
+    def start(self, max_workers=16):
+        with self.lock:
+            if self.running():
+                return False
+            self.done, self.total, self.error = 0, 0, None
+            self.thread = threading.Thread(
+                target=self.run, args=(max_workers,), daemon=True, name="snapshot-refresh"
+            )
+            self.thread.start()
+            return True
+
+    # Record the progress of the running refresh
+    def progress(self, done, total):
+        self.done, self.total = done, total
+
+    # Refresh the snapshot, keeping the error of a failed refresh to report it
+    def run(self, max_workers):
+        try:
+            snapshot = refresh_snapshot(max_workers, self.path, self.progress)
+        except Exception as e:
+            self.error = str(e)
+        else:
+            self.refreshed_at = snapshot.attrs["refreshed_at"]
+
+
+# Function to get the shared snapshot refresh
+@lru_cache(maxsize=None)
+def get_snapshot_refresh():
+    return SnapshotRefresh()
+
+
+# Cache of the loaded snapshots: {path: (modification time, snapshot)}
+_snapshot_cache = {}
+
+
+# Function to load the snapshot (None if it was never refreshed)
+def load_snapshot(path=SNAPSHOT_PATH):
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    # Reload only when the file changed; the modification time and the frame
+    # are stored together so concurrent sessions never see one without the other
+    mtime = path.stat().st_mtime
+    cached = _snapshot_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, pd.read_parquet(path))
+        _snapshot_cache[path] = cached
+
+    return cached[1]
+
+
+# Function to screen the snapshot, e.g.
+# screen(snapshot, [("priceToBook", "<", 3), ("Sector Name", "in", ["Energy"])],
+#        sort_by="dividendYield")
+def screen(snapshot, predicates=(), sort_by=None, ascending=False, limit=None):
+    # Combine the predicates into one boolean mask
+    mask = np.ones(len(snapshot), dtype=bool)
+    for column, operator, value in predicates:
+        values = snapshot[column].to_numpy()
+        with np.errstate(invalid="ignore"):
+            mask &= OPERATORS[operator](values, value)
+
+    # Keep the matching rows
+    rows = np.flatnonzero(mask)
+
+    # Sort the matches, with missing values last
+    if sort_by is not None:
+        keys = snapshot[sort_by].to_numpy(dtype=float)[rows]
+        order = np.argsort(keys if ascending else -keys, kind="stable")
+        rows = rows[order]
+
+    # Limit the number of results
+    if limit is not None:
+        rows = rows[:limit]
+
+    # Return the matching issuers
+    return snapshot.iloc[rows]
@@ -0,0 +1,183 @@
+# Imports
+import threading
+
+import numpy as np
+import pandas as pd
+
+from price_store import get_price_store
+from tickers import fetch_issuers
+
+# Hierarchy levels of the issuer master, from broadest to narrowest
+LEVELS = ["Sector Name", "Industry New Name", "Igroup Name", "ISubgroup Name"]
+
+# Return horizons in trading days
+HORIZONS = {"1D": 1, "1W": 5, "1M": 21, "3M": 63, "1Y": 252}
+
+# Window of daily returns used for volatility, and of closes for the moving average
+VOL_WINDOW = 21
+SMA_WINDOW = 50
+
+
+# Per-ticker rolling statistics over the wide close matrix of the price store,
+# updated in O(tickers) work per new daily bar
+class SectorAnalytics:
+    def __init__(self, tickers):
+        self.tickers = pd.Index(tickers)
+        self.reset()
+
+    # Clear the rolling state
+    def reset(self):
+        n = len(self.tickers)
+        self.state = {
+            "ret_sum": np.zeros(n),
+            "ret_sq_sum": np.zeros(n),
+            "ret_count": np.zeros(n),
+            "close_sum": np.zeros(n),
+            "close_count": np.zeros(n),
+        }
+        self.committed = None
+        self.dates = pd.DatetimeIndex([])
+        self.values = np.empty((0, n))
+
+    # Add bar t to the rolling windows and drop the bars leaving them
+    def push(self, values, t):
+        state = self.state
+
+        # Daily return window
+        if t >= 1:
+            ret = values[t] / values[t - 1] - 1
+            ok = np.isfinite(ret)
+            state["ret_sum"] += np.where(ok, ret, 0.0)
+            state["ret_sq_sum"] += np.where(ok, ret * ret, 0.0)
+            state["ret_count"] += ok
+        if t - VOL_WINDOW >= 1:
+            old = values[t - VOL_WINDOW] / values[t - VOL_WINDOW - 1] - 1
+            ok = np.isfinite(old)
+            state["ret_sum"] -= np.where(ok, old, 0.0)
+            state["ret_sq_sum"] -= np.where(ok, old * old, 0.0)
+            state["ret_count"] -= ok
+
+        # Close window
+        ok = np.isfinite(values[t])
+        state["close_sum"] += np.where(ok, values[t], 0.0)
+        state["close_count"] += ok
+        if t - SMA_WINDOW >= 0:
+            ok = np.isfinite(values[t - SMA_WINDOW])
+            state["close_sum"] -= np.where(ok, values[t - SMA_WINDOW], 0.0)
+            state["close_count"] -= ok
+
+    # Bring the state up to date with the close matrix, only processing the
+    # bars after the last one seen (the last bar is re-processed since it may
+    # have been a partial day)
+    def update(self, close):
+        close = close.reindex(columns=self.tickers)
+        values = close.to_numpy(dtype=float)
+
+        # Find the first bar to process
+        start = 0
+        seen = len(self.dates) - 1
+        if (
+            seen > 0
+            and close.index[:seen].equals(self.dates[:seen])
+            and np.array_equal(values[:seen], self.values[:seen], equal_nan=True)
+        ):
+            start = seen
+            self.state = {key: value.copy() for key, value in self.committed.items()}
+        else:
+            self.reset()
+
+        # Process the new bars, keeping the state before the last one
+        for t in range(start, len(values)):
+            if t == len(values) - 1:
+                self.committed = {key: value.copy() for key, value in self.state.items()}
+            self.push(values, t)
+
+        self.dates = close.index
+        self.values = values
+
+    # Return the per-ticker statistics as of the last bar
+    def ticker_stats(self):
+        values = self.values
+        state = self.state
+        stats = {}
+
+        # Returns over each horizon
+        for name, days in HORIZONS.items():
+            if len(values) > days:
+                stats[f"Return {name}"] = values[-1] / values[-1 - days] - 1
+            else:
+                stats[f"Return {name}"] = np.full(len(self.tickers), np.nan)
+
+        # Annualized volatility of the daily returns in the window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            count = state["ret_count"]
+            mean = state["ret_sum"] / count
+            var = (state["ret_sq_sum"] - count * mean * mean) / (count - 1)
+            stats["Volatility"] = np.sqrt(np.clip(var, 0, None) * 252)
+
+            # Closing above the moving average
+            sma = state["close_sum"] / state["close_count"]
+            last = values[-1] if len(values) else np.full(len(self.tickers), np.nan)
+            stats["Above SMA"] = np.where(np.isfinite(last) & np.isfinite(sma), last > sma, np.nan)
+
+        return pd.DataFrame(stats, index=self.tickers)
+
+
+# Function to average per-ticker columns within groups, ignoring missing values
+def grouped_mean(codes, n_groups, values):
+    ok = np.isfinite(values)
+    sums = np.bincount(codes[ok], weights=values[ok], minlength=n_groups)
+    counts = np.bincount(codes[ok], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+# Shared analytics over the issuer universe
+_analytics = {}
+_analytics_lock = threading.Lock()
+
+
+# Function to get the analytics updated with the latest bars in the price store
+def get_sector_analytics():
+    issuers = fetch_issuers()
+    close = get_price_store().load("Close")
+
+    with _analytics_lock:
+        analytics = _analytics.get("universe")
+        if analytics is None:
+            analytics = SectorAnalytics(issuers.index)
+            _analytics["universe"] = analytics
+        if not analytics.dates.equals(close.index):
+            analytics.update(close)
+
+    return analytics, issuers
+
+
+# Function to compute the sector statistics grouped by a path of hierarchy
+# levels, e.g. ["Sector Name", "Industry New Name"]
+def fetch_sector_stats(levels=("Sector Name",)):
+    analytics, issuers = get_sector_analytics()
+    stats = analytics.ticker_stats()
+
+    # Group code of every ticker
+    keys = pd.MultiIndex.from_frame(issuers[list(levels)].fillna("-"))
+    codes, groups = keys.factorize()
+    n_groups = len(groups)
+
+    # Grouped reductions over the per-ticker statistics
+    result = {
+        "Members": np.bincount(codes, minlength=n_groups),
+        "Priced": np.bincount(codes, weights=np.isfinite(stats["Return 1D"].to_numpy()), minlength=n_groups),
+    }
+    for column in stats.columns:
+        result[column] = grouped_mean(codes, n_groups, stats[column].to_numpy(dtype=float))
+
+    # Share of advancing issuers on the last day
+    day = stats["Return 1D"].to_numpy()
+    advancing = np.bincount(codes, weights=day > 0, minlength=n_groups)
+    declining = np.bincount(codes, weights=day < 0, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["Advancers"] = advancing / (advancing + declining)
+
+    # Return the statistics with one row per group
+    return pd.DataFrame(result, index=pd.MultiIndex.from_tuples(list(groups), names=list(levels)))
@@ -0,0 +1,166 @@
+# Imports
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+# Location of the cache of symbols Yahoo Finance has no data for
+BAD_TICKERS_PATH = Path.cwd() / "data" / "cache" / "bad_tickers.json"
+
+# Seconds a symbol stays known-bad before it may be tried again
+BAD_TICKER_TTL = 30 * 24 * 60 * 60
+
+# Yahoo Finance suffix of each exchange
+EXCHANGE_SUFFIXES = {"NSE": ".NS", "BSE": ".BO"}
+
+# Issuer master columns kept for the app
+ISSUER_COLUMNS = [
+    "Security Code",
+    "Issuer Name",
+    "Security Id",
+    "ISIN No",
+    "Sector Name",
+    "Industry New Name",
+    "Igroup Name",
+    "ISubgroup Name",
+]
+
+
+# Function to load the issuer master indexed by security code, with the NSE
+# and BSE symbols of every issuer
+@lru_cache(maxsize=None)
+def fetch_issuer_master():
+    # Load the data
+    df = pd.read_csv(Path.cwd() / "data" / "equity_issuers.csv", index_col=False)
+    df = df[ISSUER_COLUMNS].set_index("Security Code", drop=False)
+
+    # BSE symbols are the security code; NSE symbols are the scrip id, whose
+    # BSE-only "-B" style suffixes are not part of the NSE symbol
+    df["BSE Symbol"] = df["Security Code"].astype(str) + EXCHANGE_SUFFIXES["BSE"]
+    df["NSE Symbol"] = (
+        df["Security Id"].str.strip().str.replace(r"-[A-Z]$", "", regex=True)
+        + EXCHANGE_SUFFIXES["NSE"]
+    )
+
+    # Return the issuers
+    return df
+
+
+# Create function to fetch stock name and id
+def fetch_stocks():
+    # Load the data from the cached issuer master
+    df = fetch_issuer_master()
+
+    # Create a dictionary
+    stock_dict = dict(zip(df["Security Code"], df["Issuer Name"]))
+
+    # Return the dictionary
+    return stock_dict
+
+
+# Function to load the issuer master indexed by the BSE ticker of each issuer
+@lru_cache(maxsize=None)
+def fetch_issuers():
+    df = fetch_issuer_master().rename(columns={"BSE Symbol": "ticker"})
+    return df.set_index("ticker").drop(columns="NSE Symbol")
+
+
+# Persistent cache of symbols known to have no data, so they never hit the
+# network again until they expire
+class BadTickerCache:
+    def __init__(self, path=BAD_TICKERS_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = self.read()
+        self.batches = 0
+        self.dirty = False
+
+    # Read the entries on disk, treating a missing or unreadable file as empty
+    def read(self):
+        try:
+            entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    # Check whether a symbol is known-bad
+    def contains(self, symbol):
+        marked_at = self.entries.get(symbol)
+        return marked_at is not None and time.time() - marked_at < BAD_TICKER_TTL
+
+    # Write the entries, merged with those other processes wrote since; the
+    # file is swapped in whole so readers never see a partial one
+    def write(self):
+        entries = {**self.read(), **self.entries}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entries))
+        tmp.replace(self.path)
+        self.entries = entries
+        self.dirty = False
+
+    # Remember symbols as known-bad, writing them at once unless in a batch
+    def add(self, *symbols):
+        with self.lock:
+            now = time.time()
+            self.entries = {**self.entries, **{symbol: now for symbol in symbols}}
+            self.dirty = True
+            if not self.batches:
+                self.write()
+
+    # Context manager writing the symbols added inside it once, at the end
+    @contextmanager
+    def batch(self):
+        with self.lock:
+            self.batches += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.batches -= 1
+                if not self.batches and self.dirty:
+                    self.write()
+
+
+# Function to get the shared known-bad symbol cache
+@lru_cache(maxsize=None)
+def get_bad_tickers():
+    return BadTickerCache()
+
+
+# Function to check whether a symbol is known to have no data
+def is_known_bad(symbol):
+    return get_bad_tickers().contains(symbol)
+
+
+# Function to record symbols that returned no data
+def mark_bad(*symbols):
+    get_bad_tickers().add(*symbols)
+
+
+# Function to record the symbols marked bad by a bulk fetch in one write, e.g.
+# with batch_bad_tickers(): ...
+def batch_bad_tickers():
+    return get_bad_tickers().batch()
+
+
+# Function to resolve many security codes to Yahoo Finance symbols at once. An
+# NSE symbol known to be bad falls back to the issuer's BSE symbol, which
+# exists for every issuer in the master.
+def resolve_tickers(security_codes, exchange="NSE"):
+    issuers = fetch_issuer_master().reindex(security_codes)
+    if exchange == "BSE":
+        return issuers["BSE Symbol"]
+
+    bad = issuers["NSE Symbol"].map(is_known_bad).fillna(True).astype(bool)
+    return issuers["NSE Symbol"].where(~bad, issuers["BSE Symbol"])
+
+
+# Function to resolve one security code to a Yahoo Finance symbol
+def resolve_ticker(security_code, exchange="NSE"):
+    return resolve_tickers([security_code], exchange).iloc[0]